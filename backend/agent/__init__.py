@@ -1,5 +1,39 @@
-from .coach import entrypoint, main, InterviewCoach
-from .prompts import COACH_SYSTEM_PROMPT
+"""
+Agent Package
+
+The voice agent (coach) pulls in livekit.agents, the STT/TTS/VAD plugins and
+openai, so its entry points are exported lazily: `from agent import entrypoint`
+works as before, while importing a submodule such as agent.leetcode_service
+(as the API server does) leaves the voice stack unloaded.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+_LAZY_EXPORTS = {
+    "entrypoint": ".coach",
+    "main": ".coach",
+    "InterviewCoach": ".coach",
+    "COACH_SYSTEM_PROMPT": ".prompts",
+}
+
+if TYPE_CHECKING:
+    from .coach import entrypoint, main, InterviewCoach
+    from .prompts import COACH_SYSTEM_PROMPT
+
+
+def __getattr__(name: str):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
 
 __all__ = [
     "entrypoint",
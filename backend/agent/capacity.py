@@ -0,0 +1,166 @@
+"""
+Capacity-aware load reporting and admission control for the agent worker.
+
+Each job process measures its own event-loop lag and drops a tiny report file
+into a shared directory. The worker's load function combines the worst recent
+lag with its active session count and host CPU, so LiveKit stops dispatching
+rooms to a worker that is already struggling, and the request handler logs why
+a room was refused.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+MAX_SESSIONS = int(os.getenv("AGENT_MAX_SESSIONS", "8"))
+MAX_LOOP_LAG_MS = float(os.getenv("AGENT_MAX_LOOP_LAG_MS", "100"))
+LOAD_THRESHOLD = float(os.getenv("AGENT_LOAD_THRESHOLD", "0.75"))
+NUM_IDLE_PROCESSES = int(os.getenv("AGENT_NUM_IDLE_PROCESSES", "2"))
+LOAD_DIR = Path(os.getenv("AGENT_LOAD_DIR", Path(tempfile.gettempdir()) / "codecoach-agent-load"))
+
+# Lag reports older than this are ignored (the job has ended or stalled badly)
+REPORT_MAX_AGE = 5.0
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag in a job process and publishes it for the worker."""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.lag_ms = 0.0
+        self.peak_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._report_path = LOAD_DIR / f"{os.getpid()}.json"
+
+    def start(self) -> None:
+        if self._task is None:
+            LOAD_DIR.mkdir(parents=True, exist_ok=True)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._report_path.unlink(missing_ok=True)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_report = 0.0
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            # Smooth single hiccups but react quickly to sustained lag
+            self.lag_ms = max(lag_ms, self.lag_ms * 0.8)
+            self.peak_lag_ms = max(self.peak_lag_ms, lag_ms)
+
+            if lag_ms > MAX_LOOP_LAG_MS:
+                logger.warning(f"Event loop lag {lag_ms:.0f}ms exceeds {MAX_LOOP_LAG_MS:.0f}ms budget")
+
+            now = time.time()
+            if now - last_report >= 1.0:
+                last_report = now
+                self._write_report(now)
+
+    def _write_report(self, now: float) -> None:
+        try:
+            tmp_path = self._report_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"lag_ms": self.lag_ms, "updated_at": now}))
+            os.replace(tmp_path, self._report_path)
+        except OSError as e:
+            logger.debug(f"Could not write load report: {e}")
+
+
+def _worst_loop_lag_ms() -> float:
+    """Highest recently reported lag across job processes on this host."""
+    worst = 0.0
+    now = time.time()
+    if not LOAD_DIR.exists():
+        return worst
+    for report_path in LOAD_DIR.glob("*.json"):
+        try:
+            report = json.loads(report_path.read_text())
+        except (OSError, ValueError):
+            continue
+        if now - report.get("updated_at", 0) > REPORT_MAX_AGE:
+            report_path.unlink(missing_ok=True)
+            continue
+        worst = max(worst, report.get("lag_ms", 0.0))
+    return worst
+
+
+@dataclass
+class LoadReport:
+    load: float
+    reason: str
+    active_sessions: int
+    loop_lag_ms: float
+    cpu_percent: Optional[float]
+    rss_mb: Optional[float]
+
+
+_last_report: Optional[LoadReport] = None
+
+
+def compute_load(worker) -> float:
+    """LiveKit load function: the most saturated of sessions, loop lag and CPU, in [0, 1]."""
+    global _last_report
+
+    active_sessions = len(worker.active_jobs)
+    loop_lag_ms = _worst_loop_lag_ms()
+    cpu_percent = psutil.cpu_percent() if psutil else None
+    rss_mb = psutil.Process().memory_info().rss / 1e6 if psutil else None
+
+    components = {
+        # Scaled so a full worker (MAX_SESSIONS rooms) sits exactly at the threshold
+        "sessions": active_sessions / max(MAX_SESSIONS, 1) * LOAD_THRESHOLD,
+        "loop_lag": loop_lag_ms / MAX_LOOP_LAG_MS,
+    }
+    if cpu_percent is not None:
+        components["cpu"] = cpu_percent / 100
+
+    reason = max(components, key=components.get)
+    report = LoadReport(
+        load=min(1.0, components[reason]),
+        reason=reason,
+        active_sessions=active_sessions,
+        loop_lag_ms=round(loop_lag_ms, 1),
+        cpu_percent=cpu_percent,
+        rss_mb=round(rss_mb, 1) if rss_mb is not None else None,
+    )
+
+    was_overloaded = _last_report is not None and _last_report.load >= LOAD_THRESHOLD
+    if report.load >= LOAD_THRESHOLD and not was_overloaded:
+        logger.warning(f"Worker at capacity, no longer accepting rooms: {asdict(report)}")
+    elif report.load < LOAD_THRESHOLD and was_overloaded:
+        logger.info(f"Worker below capacity again, accepting rooms: {asdict(report)}")
+
+    _last_report = report
+    return report.load
+
+
+def last_load_report() -> Optional[LoadReport]:
+    return _last_report
+
+
+async def admit_job(request) -> None:
+    """Job request handler: refuse rooms while the last load report is over threshold."""
+    report = _last_report
+    if report is not None and report.load >= LOAD_THRESHOLD:
+        logger.warning(f"Refusing room {request.room.name}: {report.reason} saturated {asdict(report)}")
+        await request.reject()
+        return
+    await request.accept()
@@ -1,108 +1,295 @@
 import os
 import json
+import time
+import asyncio
+import logging
+from typing import Optional
 import openai
 from dotenv import load_dotenv
 from livekit import rtc
-from livekit.agents import JobContext, WorkerOptions, cli, AgentSession, Agent, function_tool, RunContext
+from livekit.agents import JobContext, JobProcess, WorkerOptions, cli, AgentSession, Agent, function_tool, RunContext, llm
 from livekit.plugins import silero, openai as lk_openai, cartesia, deepgram
 
-from .prompts import COACH_SYSTEM_PROMPT
+from .prompts import build_system_prompt
+from .framing import ProblemPublisher, publish_message
+from .context import ContextCompactor, LIVE_CONTEXT_PREFIX
+from .turn_metrics import TurnLatencyRecorder
+from .tracing import TurnTracer, get_tracer, span as trace_span
+from .phrase_cache import PhraseAudioCache
+from .code_analysis import CodeAnalyzer, CodeAnalysis
+from .code_runner import get_code_runner, parse_test_lines, format_test_summary
+from .problem_resolver import frontend_id, get_problem_resolver
+from .leetcode_service import AGENT_DEADLINE, get_leetcode_service
+from .diagnostics import start_diagnostics_server
+from .capacity import (
+    LoopLagMonitor,
+    compute_load,
+    admit_job,
+    LOAD_THRESHOLD,
+    NUM_IDLE_PROCESSES,
+)
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# "inject": attach code/problem context to each user turn; "tool": the LLM calls get_current_code_and_problem itself
+CONTEXT_MODE = os.getenv("CODECOACH_CONTEXT_MODE", "inject")
+# Tool work that finishes within this many seconds is answered without a filler phrase
+FILLER_DELAY = float(os.getenv("FILLER_DELAY_SECONDS", "0.7"))
+
+TTS_MODEL = "sonic-3"
+TTS_VOICE = "79a125e8-cd45-4c13-8a67-188112f4dd22"
+
+GREETING = "Hey! I'm Maya. What do you want to work on today?"
+RAG_FILLER = "Let me check the database for you, give me a moment."
+SOLUTION_FILLER = "Alright, let me generate a clean solution for you. Give me a moment."
+FIXED_PHRASES = [GREETING, RAG_FILLER, SOLUTION_FILLER]
+
 _room = None
-_shared_context = {"current_code": "", "current_problem": "", "code_template": "", "cursor_line": None, "cursor_column": None} 
+_phrase_cache = None
+_problem_publisher = ProblemPublisher()
+_code_analyzer = CodeAnalyzer()
+_shared_context = {"current_code": "", "current_problem": "", "code_template": "", "test_cases": "", "cursor_line": None, "cursor_column": None} 
+# Problems loaded this session, oldest first; recommendations skip them
+_session_problems = []
+# Fire-and-forget tasks; the loop only holds weak references, so keep them alive here
+_background_tasks = set()
+
+
+def _spawn(coro) -> asyncio.Task:
+    """Run a coroutine in the background, keeping a reference and logging any failure."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+    return task
+
+
+def _background_task_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background task failed: {task.exception()!r}")
+
+
+def _live_context_key() -> tuple:
+    return (
+        _shared_context.get("current_code", ""),
+        _shared_context.get("current_problem", ""),
+        _shared_context.get("cursor_line"),
+        _shared_context.get("cursor_column"),
+    )
+
+
+def _format_live_context(analysis: Optional[CodeAnalysis] = None) -> str:
+    """The user's current code, problem description, cursor position and code analysis as prompt text."""
+    code = _shared_context.get("current_code", "")
+    problem = _shared_context.get("current_problem", "")
+    cursor_line = _shared_context.get("cursor_line")
+    cursor_column = _shared_context.get("cursor_column")
+    
+    if not problem and not code:
+        return "No problem selected and no code written yet."
+    
+    result_parts = []
+    result_parts.append(f"[Current Problem]\n{problem}" if problem else "[Current Problem]\nNo problem selected yet.")
+    
+    if code and code.strip():
+        code_lines = code.split('\n')
+        numbered_code = '\n'.join([f"{i+1:3d} | {line}" for i, line in enumerate(code_lines)])
+        result_parts.append(f"[User's Current Code]\n```python\n{numbered_code}\n```")
+        
+        if cursor_line is not None:
+            cursor_info = f"[Cursor Position]\nLine {cursor_line + 1}"
+            if cursor_column is not None:
+                cursor_info += f", Column {cursor_column + 1}"
+            if 0 <= cursor_line < len(code_lines):
+                current_line_content = code_lines[cursor_line]
+                cursor_info += f"\nCurrent line content: `{current_line_content}`"
+                cursor_info += f"\n\n💡 The user is actively working on line {cursor_line + 1}. Focus your feedback on this area if relevant."
+            result_parts.append(cursor_info)
+        
+        if analysis is not None:
+            result_parts.append(f"[Code Analysis]\n{analysis.summary()}")
+    else:
+        result_parts.append("[User's Current Code]\nNo code written yet.")
+    
+    return "\n\n".join(result_parts)
 
 
 class InterviewCoach(Agent):
     def __init__(self):
-        super().__init__(instructions=COACH_SYSTEM_PROMPT)
+        super().__init__(instructions=build_system_prompt(CONTEXT_MODE))
+        self._context_compactor = ContextCompactor()
+        self._injected_context_key = None
     
     async def on_enter(self) -> None:
-        await self.session.say("Hey! I'm Maya. What do you want to work on today?", allow_interruptions=True)
+        await self._say_fixed(GREETING)
     
-    @function_tool()
-    async def get_current_code_and_problem(self, context: RunContext) -> str:
-        """Gets the user's current code, problem description, and cursor position. CALL THIS ON EVERY TURN."""
-        global _shared_context
-        
-        code = _shared_context.get("current_code", "")
-        problem = _shared_context.get("current_problem", "")
-        cursor_line = _shared_context.get("cursor_line")
-        cursor_column = _shared_context.get("cursor_column")
+    async def on_user_turn_completed(self, turn_ctx: llm.ChatContext, new_message: llm.ChatMessage) -> None:
+        chat_ctx = self.chat_ctx.copy()
         
-        if not problem and not code:
-            return "No problem selected and no code written yet."
+        if CONTEXT_MODE == "inject" and _live_context_key() != self._injected_context_key:
+            # Answer in a single LLM pass instead of a get_current_code_and_problem round-trip
+            self._injected_context_key = _live_context_key()
+            analysis = await _code_analyzer.current()
+            live_context = llm.ChatMessage(role="system", content=[LIVE_CONTEXT_PREFIX + _format_live_context(analysis)])
+            turn_ctx.items.append(live_context)
+            chat_ctx.items.append(live_context)
         
-        result_parts = []
-        result_parts.append(f"[Current Problem]\n{problem}" if problem else "[Current Problem]\nNo problem selected yet.")
-        
-        if code and code.strip():
-            code_lines = code.split('\n')
-            numbered_code = '\n'.join([f"{i+1:3d} | {line}" for i, line in enumerate(code_lines)])
-            result_parts.append(f"[User's Current Code]\n```python\n{numbered_code}\n```")
-            
-            if cursor_line is not None:
-                cursor_info = f"[Cursor Position]\nLine {cursor_line + 1}"
-                if cursor_column is not None:
-                    cursor_info += f", Column {cursor_column + 1}"
-                if 0 <= cursor_line < len(code_lines):
-                    current_line_content = code_lines[cursor_line]
-                    cursor_info += f"\nCurrent line content: `{current_line_content}`"
-                    cursor_info += f"\n\n💡 The user is actively working on line {cursor_line + 1}. Focus your feedback on this area if relevant."
-                result_parts.append(cursor_info)
+        # Keep the prompt for this turn small, and the stored history bounded for the next ones
+        self._context_compactor.compact(turn_ctx)
+        self._context_compactor.compact(chat_ctx)
+        await self.update_chat_ctx(chat_ctx)
+        if self._context_compactor.needs_summary(chat_ctx):
+            self._context_compactor.start_summary(self)
+    
+    async def _say_fixed(self, text: str):
+        """Say one of FIXED_PHRASES, from pre-synthesized audio when available; returns once it has played."""
+        if _phrase_cache is None:
+            handle = self.session.say(text, allow_interruptions=True)
         else:
-            result_parts.append("[User's Current Code]\nNo code written yet.")
+            handle = await _phrase_cache.say(self.session, text, allow_interruptions=True)
+        return await handle
+    
+    async def _with_filler(self, work, filler: str):
+        """Run tool work, speaking a filler alongside it only if it isn't done within FILLER_DELAY."""
+        started = time.perf_counter()
+        task = asyncio.ensure_future(work)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=FILLER_DELAY)
+            if not done:
+                _spawn(self._say_fixed(filler))
+            result = await task
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
         
-        return "\n\n".join(result_parts)
+        logger.info(f"tool_latency_ms={(time.perf_counter() - started) * 1000:.0f} filler={not done}")
+        return result
+    
+    @function_tool()
+    async def get_current_code_and_problem(self, context: RunContext) -> str:
+        """Gets the user's current code, problem description, and cursor position. Call to refresh when the latest [Live Context] may be out of date."""
+        with trace_span("tool.get_current_code_and_problem"):
+            return _format_live_context(await _code_analyzer.current())
     
     @function_tool()
     async def search_leetcode_problems(self, context: RunContext, topic: str, difficulty: str = None) -> str:
-        """Search for LeetCode problems by topic."""
+        """Search for LeetCode problems by topic, or by a tag expression like "graph and heap and not paid"."""
         from .tools import search_leetcode_problems as search_problems_impl
-        return await search_problems_impl(topic, difficulty)
+        with trace_span("tool.search_leetcode_problems", topic=topic, difficulty=difficulty):
+            return await search_problems_impl(topic, difficulty)
+    
+    @function_tool()
+    async def semantic_search_problems(self, context: RunContext, description: str, difficulty: str = None, topic: str = None) -> str:
+        """Find problems by what they ask, e.g. "fixed size sliding window over a string". Optional difficulty and topic narrow it."""
+        from .tools import semantic_search_problems as semantic_search_impl
+        with trace_span("tool.semantic_search_problems", difficulty=difficulty, topic=topic):
+            return await semantic_search_impl(description, difficulty, topic)
     
     @function_tool()
     async def select_leetcode_problem(self, context: RunContext, problem_id: str) -> str:
-        """Get detailed information about a specific problem and load it for the user."""
+        """Get detailed information about a specific problem and load it for the user. Accepts a name, slug or problem number."""
         from .tools import select_leetcode_problem as select_problem_impl
-        global _room, _shared_context
+        global _room, _shared_context, _session_problems
+        
+        # Spoken names ("LRU cash", "problem 146") resolve against the local catalog first
+        resolver = get_problem_resolver()
+        resolution = resolver.resolve(problem_id) if resolver else None
+        fallback = None
+        if resolution and not resolution.confident and not resolver.complete:
+            # A loose match on a subset catalog may miss a real problem outside it: ask LeetCode first
+            fallback, resolution = resolution, None
+        number = frontend_id(problem_id)
         
-        if " " in problem_id or any(c.isupper() for c in problem_id):
+        if resolution:
+            problem_id = resolution.slug
+        elif resolver and resolver.complete:
+            return json.dumps({
+                "success": False,
+                "message": f"No problem matches '{problem_id}'.",
+                "did_you_mean": resolver.suggest(problem_id),
+            })
+        elif number is not None:
+            # The catalog doesn't know this number, but LeetCode does
+            slug = await get_leetcode_service().find_slug_by_frontend_id(number, deadline=AGENT_DEADLINE)
+            if not slug:
+                return json.dumps({"success": False, "message": f"No LeetCode problem number {number}."})
+            problem_id = slug
+        elif " " in problem_id or any(c.isupper() for c in problem_id):
             problem_slug = problem_id.lower().strip().replace(" ", "-")
             problem_slug = "".join(c for c in problem_slug if c.isalnum() or c == "-")
             while "--" in problem_slug:
                 problem_slug = problem_slug.replace("--", "-")
             problem_id = problem_slug.strip("-")
         
-        result = await select_problem_impl(problem_id)
-        
-        try:
-            result_data = json.loads(result)
-            if result_data.get("success") and _room:
-                problem = result_data["problem"]
-                _shared_context["code_template"] = problem.get("codeTemplate", "")
-                await _room.local_participant.publish_data(
-                    json.dumps({"type": "problem_selected", "problem": problem}).encode('utf-8'),
-                    reliable=True
-                )
-        except Exception:
-            pass
-        
-        return result
+        resolved_by = resolution.method if resolution else None
+        with trace_span("tool.select_leetcode_problem", problem_id=problem_id, resolved_by=resolved_by) as span:
+            result = await select_problem_impl(problem_id)
+            if fallback and not json.loads(result).get("success"):
+                span.set(problem_id=fallback.slug, resolved_by=fallback.method)
+                result = await select_problem_impl(fallback.slug)
+            
+            try:
+                result_data = json.loads(result)
+                if result_data.get("success") and _room:
+                    problem = result_data["problem"]
+                    _shared_context["code_template"] = problem.get("codeTemplate", "")
+                    _shared_context["test_cases"] = problem.get("testCases", "")
+                    _shared_context["problem_topics"] = problem.get("topics", [])
+                    if problem.get("id") and problem["id"] not in _session_problems:
+                        _session_problems.append(problem["id"])
+                    with trace_span("room.publish_problem"):
+                        await _problem_publisher.publish(_room, problem)
+            except Exception:
+                pass
+            
+            return result
     
     @function_tool()
     async def query_company_leetcode_questions(self, context: RunContext, company_name: str, difficulty: str = None) -> str:
         """Query company-specific LeetCode interview questions from the knowledge base."""
         from .rag import query_leetcode_rag
         
-        await self.session.say("Let me check the database for you, give me a moment.", allow_interruptions=True)
-        
         query_parts = [f"{company_name} LeetCode interview questions"]
         if difficulty:
             query_parts.append(f"{difficulty} difficulty")
         
-        return await query_leetcode_rag(" ".join(query_parts))
+        with trace_span("tool.query_company_leetcode_questions", company=company_name, difficulty=difficulty):
+            return await self._with_filler(
+                query_leetcode_rag(" ".join(query_parts), company=company_name, difficulty=difficulty),
+                RAG_FILLER,
+            )
+    
+    @function_tool()
+    async def recommend_next_problem(self, context: RunContext, difficulty: str = None) -> str:
+        """Recommend related problems the user hasn't done yet, based on the current problem's topics."""
+        from .tools import recommend_next_problem as recommend_impl
+        
+        current_slug = _session_problems[-1] if _session_problems else None
+        with trace_span("tool.recommend_next_problem", current=current_slug, difficulty=difficulty):
+            return await recommend_impl(
+                current_slug,
+                _session_problems,
+                difficulty=difficulty,
+                current_topics=_shared_context.get("problem_topics"),
+            )
+    
+    @function_tool()
+    async def run_tests(self, context: RunContext) -> str:
+        """Run the user's current code against the problem's example test cases and report outputs, errors and timing."""
+        code = _shared_context.get("current_code", "")
+        test_cases = _shared_context.get("test_cases", "")
+        
+        if not code.strip():
+            return "No code written yet."
+        if not test_cases:
+            return "No example test cases are available for the current problem."
+        
+        with trace_span("tool.run_tests") as span:
+            result = await get_code_runner().run(code, parse_test_lines(test_cases))
+            span.set(success=result.get("success"), wall_time_ms=result.get("wall_time_ms"))
+            return format_test_summary(result)
     
     @function_tool()
     async def generate_solution(self, context: RunContext) -> str:
@@ -115,12 +302,33 @@ class InterviewCoach(Agent):
         if not problem:
             return "No problem is currently loaded."
         
-        await self.session.say("Alright, let me generate a clean solution for you. Give me a moment.", allow_interruptions=True)
-        
         try:
-            function_context = f"\nFunction Definition (YOU MUST USE THIS EXACT SIGNATURE):\n```python\n{code_template}\n```\n" if code_template else ""
+            with trace_span("tool.generate_solution"):
+                response = await self._with_filler(
+                    _request_solution(problem, code_template),
+                    SOLUTION_FILLER,
+                )
             
-            solution_prompt = f"""You are an expert coding instructor. Generate a clean, optimal, and well-commented Python solution for this LeetCode problem.
+            solution_code = response.choices[0].message.content.strip()
+            if solution_code.startswith("```python"):
+                solution_code = solution_code.replace("```python", "").replace("```", "").strip()
+            elif solution_code.startswith("```"):
+                solution_code = solution_code.replace("```", "").strip()
+            
+            if _room:
+                await publish_message(_room, {"type": "solution_generated", "solution": solution_code})
+            
+            return "Solution generated successfully and displayed in the code editor."
+            
+        except Exception as e:
+            return f"Sorry, I encountered an error generating the solution: {str(e)}"
+
+
+async def _request_solution(problem: str, code_template: str):
+    """Ask the LLM for a full solution to the current problem."""
+    function_context = f"\nFunction Definition (YOU MUST USE THIS EXACT SIGNATURE):\n```python\n{code_template}\n```\n" if code_template else ""
+    
+    solution_prompt = f"""You are an expert coding instructor. Generate a clean, optimal, and well-commented Python solution for this LeetCode problem.
 
             Problem:
             {problem}
@@ -136,38 +344,41 @@ class InterviewCoach(Agent):
 
             Return ONLY the Python code, no markdown formatting or explanations outside the code."""
 
-            client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert coding instructor who writes clean, optimal solutions. Always follow the exact function signature provided."},
-                    {"role": "user", "content": solution_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1500
-            )
-            
-            solution_code = response.choices[0].message.content.strip()
-            if solution_code.startswith("```python"):
-                solution_code = solution_code.replace("```python", "").replace("```", "").strip()
-            elif solution_code.startswith("```"):
-                solution_code = solution_code.replace("```", "").strip()
-            
-            if _room:
-                await _room.local_participant.publish_data(
-                    json.dumps({"type": "solution_generated", "solution": solution_code}).encode('utf-8'),
-                    reliable=True
-                )
-            
-            return "Solution generated successfully and displayed in the code editor."
-            
-        except Exception as e:
-            return f"Sorry, I encountered an error generating the solution: {str(e)}"
+    client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    with trace_span("openai.solution", model="gpt-4o-mini"):
+        return await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You are an expert coding instructor who writes clean, optimal solutions. Always follow the exact function signature provided."},
+                {"role": "user", "content": solution_prompt}
+            ],
+            temperature=0.3,
+            max_tokens=1500
+        )
+
+
+def prewarm(proc: JobProcess):
+    proc.userdata["vad"] = silero.VAD.load()
 
 
 async def entrypoint(ctx: JobContext):
-    global _room, _shared_context
+    global _room, _shared_context, _phrase_cache
     _room = ctx.room
+    
+    lag_monitor = LoopLagMonitor()
+    lag_monitor.start()
+    ctx.add_shutdown_callback(lag_monitor.stop)
+    
+    diagnostics_server = start_diagnostics_server(asyncio.get_running_loop())
+    if diagnostics_server:
+        logger.info(f"Diagnostics for room {ctx.room.name} on port {diagnostics_server.server_address[1]}")
+        
+        async def stop_diagnostics():
+            await asyncio.to_thread(diagnostics_server.shutdown)
+            diagnostics_server.server_close()
+        
+        ctx.add_shutdown_callback(stop_diagnostics)
+    
     await ctx.connect()
     
     @ctx.room.on("data_received")
@@ -180,16 +391,34 @@ async def entrypoint(ctx: JobContext):
                 _shared_context["current_problem"] = message.get("problem", "")
                 _shared_context["cursor_line"] = message.get("cursor_line")
                 _shared_context["cursor_column"] = message.get("cursor_column")
+                if message.get("test_cases"):
+                    _shared_context["test_cases"] = message["test_cases"]
+                _code_analyzer.update(_shared_context["current_code"])
+            elif message.get("type") == "problem_request":
+                _spawn(_problem_publisher.resend(ctx.room, message.get("slug", "")))
         except Exception:
             pass
 
     session = AgentSession(
-        vad=silero.VAD.load(),
+        vad=ctx.proc.userdata.get("vad") or silero.VAD.load(),
         stt=deepgram.STT(model="nova-3"), 
         llm=lk_openai.LLM(model="gpt-4o"),
-        tts=cartesia.TTS(model="sonic-3", voice="79a125e8-cd45-4c13-8a67-188112f4dd22"),
+        tts=cartesia.TTS(model=TTS_MODEL, voice=TTS_VOICE),
     )
     
+    _phrase_cache = PhraseAudioCache(session.tts, voice=TTS_VOICE)
+    _spawn(_phrase_cache.warm(FIXED_PHRASES))
+    
+    latency_recorder = TurnLatencyRecorder(CONTEXT_MODE)
+    latency_recorder.attach(session)
+    ctx.add_shutdown_callback(latency_recorder.log_summary)
+    
+    tracer = get_tracer()
+    tracer.resource.update({"session.id": ctx.room.name, "context_mode": CONTEXT_MODE})
+    turn_tracer = TurnTracer(tracer)
+    turn_tracer.attach(session)
+    ctx.add_shutdown_callback(turn_tracer.close)
+    
     await session.start(room=ctx.room, agent=InterviewCoach())
 
 
@@ -201,7 +430,14 @@ def main():
         print(f"Missing required environment variables: {', '.join(missing)}")
         return
     
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
+    cli.run_app(WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        request_fnc=admit_job,
+        load_fnc=compute_load,
+        load_threshold=LOAD_THRESHOLD,
+        num_idle_processes=NUM_IDLE_PROCESSES,
+    ))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,282 @@
+"""
+Static analysis of the user's code for the coach.
+
+Parses the session's code off the event loop whenever it changes (debounced,
+keyed by content) and condenses the result into a few facts the LLM can use
+directly: syntax errors with locations, undefined names, functions that never
+return a value, loop nesting and recursion.
+"""
+
+import ast
+import asyncio
+import builtins
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Names LeetCode templates use without importing them (see api/server.py:run_code)
+PRELUDE_NAMES = {
+    "List", "Optional", "Dict", "Set", "Tuple", "Deque", "DefaultDict", "Counter",
+    "ListNode", "TreeNode", "Node", "collections", "heapq", "math", "bisect",
+    "itertools", "functools", "deque", "defaultdict", "inf",
+}
+KNOWN_NAMES = set(dir(builtins)) | PRELUDE_NAMES
+
+_LOOP_NODES = (ast.For, ast.AsyncFor, ast.While, ast.comprehension)
+_SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+
+@dataclass
+class SyntaxProblem:
+    message: str
+    line: Optional[int]
+    column: Optional[int]
+
+
+@dataclass
+class FunctionInfo:
+    name: str
+    line: int
+    loop_depth: int
+    loops: int
+    returns_value: bool
+    expects_value: bool
+    recursive: bool
+    empty: bool
+
+
+@dataclass
+class CodeAnalysis:
+    digest: str
+    syntax_error: Optional[SyntaxProblem] = None
+    functions: List[FunctionInfo] = field(default_factory=list)
+    undefined_names: List[str] = field(default_factory=list)
+
+    @property
+    def hints(self) -> List[str]:
+        hints = []
+        for fn in self.functions:
+            if fn.empty:
+                continue
+            if fn.loop_depth >= 2:
+                hints.append(
+                    f"{fn.name}() has loops nested {fn.loop_depth} deep - likely O(n^{fn.loop_depth}) time"
+                )
+            if fn.expects_value and not fn.returns_value:
+                hints.append(f"{fn.name}() is annotated to return a value but has no return statement")
+            if fn.recursive:
+                hints.append(f"{fn.name}() is recursive - check the base case")
+        return hints
+
+    def summary(self) -> str:
+        """Compact, LLM-facing description of the analysis."""
+        if self.syntax_error:
+            where = f"line {self.syntax_error.line}" if self.syntax_error.line else "unknown line"
+            if self.syntax_error.column:
+                where += f", column {self.syntax_error.column}"
+            return f"Syntax error at {where}: {self.syntax_error.message}"
+
+        lines = []
+        if self.functions:
+            lines.append("Functions: " + "; ".join(
+                f"{fn.name} (line {fn.line}, {fn.loops} loop{'s' if fn.loops != 1 else ''}, "
+                f"max nesting {fn.loop_depth}{', empty' if fn.empty else ''})"
+                for fn in self.functions
+            ))
+        if self.undefined_names:
+            lines.append("Possibly undefined names: " + ", ".join(self.undefined_names))
+        lines.extend(self.hints)
+        return "\n".join(lines) if lines else "No issues detected."
+
+
+class _FunctionVisitor(ast.NodeVisitor):
+    """Collects loop nesting and return facts for one function, not descending into nested scopes."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.depth = 0
+        self.max_depth = 0
+        self.loops = 0
+        self.returns_value = False
+        self.recursive = False
+
+    def _visit_loop(self, node):
+        self.loops += 1
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        self.generic_visit(node)
+        self.depth -= 1
+
+    visit_For = visit_AsyncFor = visit_While = _visit_loop
+
+    def _visit_comprehension_owner(self, node):
+        # Each `for` clause in a comprehension is one more level of iteration
+        self.loops += len(node.generators)
+        self.depth += len(node.generators)
+        self.max_depth = max(self.max_depth, self.depth)
+        self.generic_visit(node)
+        self.depth -= len(node.generators)
+
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _visit_comprehension_owner
+
+    def visit_Return(self, node):
+        if node.value is not None:
+            self.returns_value = True
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name) and func.id == self.name:
+            self.recursive = True
+        elif isinstance(func, ast.Attribute) and func.attr == self.name and isinstance(func.value, ast.Name) and func.value.id == "self":
+            self.recursive = True
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        pass
+
+    visit_AsyncFunctionDef = visit_ClassDef = visit_Lambda = visit_FunctionDef
+
+
+def _is_empty_body(body: List[ast.stmt]) -> bool:
+    for stmt in body:
+        if isinstance(stmt, ast.Pass):
+            continue
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant):
+            continue  # docstring or `...`
+        return False
+    return True
+
+
+def _function_info(node) -> FunctionInfo:
+    visitor = _FunctionVisitor(node.name)
+    for stmt in node.body:
+        visitor.visit(stmt)
+    expects_value = node.returns is not None and not (
+        isinstance(node.returns, ast.Constant) and node.returns.value is None
+    )
+    return FunctionInfo(
+        name=node.name,
+        line=node.lineno,
+        loop_depth=visitor.max_depth,
+        loops=visitor.loops,
+        returns_value=visitor.returns_value,
+        expects_value=expects_value,
+        recursive=visitor.recursive,
+        empty=_is_empty_body(node.body),
+    )
+
+
+def _bound_names(tree: ast.AST) -> Set[str]:
+    """Every name bound anywhere in the module (scope-insensitive, to avoid false alarms)."""
+    bound: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, ast.alias):
+            bound.add((node.asname or node.name).split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+        elif isinstance(node, ast.MatchAs) and node.name:
+            bound.add(node.name)
+    return bound
+
+
+def analyze_code(code: str) -> CodeAnalysis:
+    """Parse and analyze a snippet of Python code."""
+    digest = hashlib.sha1(code.encode("utf-8")).hexdigest()
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return CodeAnalysis(digest=digest, syntax_error=SyntaxProblem(e.msg, e.lineno, e.offset))
+
+    functions = [
+        _function_info(node) for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    ]
+    functions.sort(key=lambda fn: fn.line)
+
+    known = _bound_names(tree) | KNOWN_NAMES
+    undefined = sorted({
+        node.id for node in ast.walk(tree)
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in known
+    })
+
+    return CodeAnalysis(digest=digest, functions=functions, undefined_names=undefined)
+
+
+class CodeAnalyzer:
+    """Keeps a debounced, incrementally refreshed analysis of the session's code."""
+
+    def __init__(self, debounce: float = 0.3):
+        self.debounce = debounce
+        self._code = ""
+        self._version = 0
+        self._analyzed_version = 0
+        self._latest: Optional[CodeAnalysis] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Optional[asyncio.Future] = None
+
+    def update(self, code: str) -> None:
+        """Record a new code version; analysis runs once updates pause for `debounce` seconds."""
+        if code == self._code:
+            return
+        self._code = code
+        self._version += 1
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(self.debounce, self._start)
+
+    def _start(self) -> None:
+        self._timer = None
+        version, code = self._version, self._code
+
+        digest = hashlib.sha1(code.encode("utf-8")).hexdigest()
+        if self._latest is not None and self._latest.digest == digest:
+            self._analyzed_version = version
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, analyze_code, code)
+        self._running = future
+
+        def _done(fut: asyncio.Future) -> None:
+            if fut.cancelled() or fut.exception() is not None:
+                if not fut.cancelled():
+                    logger.warning(f"Code analysis failed: {fut.exception()}")
+                return
+            # A newer version may have been analyzed already; never go backwards
+            if version >= self._analyzed_version:
+                self._latest = fut.result()
+                self._analyzed_version = version
+
+        future.add_done_callback(_done)
+
+    @property
+    def latest(self) -> Optional[CodeAnalysis]:
+        return self._latest
+
+    @property
+    def is_current(self) -> bool:
+        return self._latest is not None and self._analyzed_version == self._version
+
+    async def current(self, timeout: float = 0.5) -> Optional[CodeAnalysis]:
+        """Analysis of the newest code, flushing any pending debounce; falls back to the latest one."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._start()
+        if self._running is not None and not self._running.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._running), timeout)
+            except (asyncio.TimeoutError, Exception):
+                pass
+        return self._latest
@@ -0,0 +1,307 @@
+"""
+Sandboxed execution of user solutions against LeetCode example test cases.
+
+Each submission runs in its own short-lived interpreter taken from a pool of
+pre-started processes, so user code never runs on (or blocks) the caller's
+event loop, a runaway solution is killed at its timeout without affecting
+anything else, and warm processes keep start-up cost off the request path.
+
+This module only depends on the standard library: the pool launches this very
+file as a script (`python -I code_runner.py`) to host one submission.
+"""
+
+import asyncio
+import inspect
+import io
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+RUNNER_POOL_SIZE = int(os.getenv("CODE_RUNNER_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+RUNNER_TIMEOUT = float(os.getenv("CODE_RUNNER_TIMEOUT", "5.0"))
+RUNNER_MEMORY_MB = int(os.getenv("CODE_RUNNER_MEMORY_MB", "512"))
+
+MAX_OUTPUT_CHARS = 2000
+# Upper bound on one serialized result (outputs of large test inputs can be big)
+RESULT_LINE_LIMIT = 16 * 1024 * 1024
+
+
+def parse_test_lines(test_cases: str) -> List[str]:
+    """Split LeetCode's exampleTestcases into one line per argument value."""
+    return [line.strip() for line in test_cases.strip().split('\n') if line.strip()]
+
+
+def parse_test_values(lines: List[str]) -> List[Any]:
+    """JSON-decode each argument line once (a line that fails to decode is kept as an error marker)."""
+    values = []
+    for line in lines:
+        try:
+            values.append({"value": json.loads(line)})
+        except ValueError as e:
+            values.append({"error": f"Could not parse test input {line!r}: {e}"})
+    return values
+
+
+def execute_submission(code: str, lines: List[str], values: Optional[List[Any]] = None) -> Dict:
+    """Run a Solution against pre-split test lines. Runs user code in the current process."""
+    if values is None:
+        values = parse_test_values(lines)
+
+    printed = io.StringIO()
+    try:
+        exec_globals = {
+            '__builtins__': __builtins__,
+            '__name__': 'solution',
+            'List': list,
+            'Optional': type(None),
+            'Dict': dict,
+            'Set': set,
+        }
+
+        with redirect_stdout(printed):
+            exec(code, exec_globals)
+
+        if 'Solution' not in exec_globals:
+            return {
+                "success": False,
+                "error": "No Solution class found in code"
+            }
+
+        solution = exec_globals['Solution']()
+
+        method_name = next((name for name in dir(solution)
+                           if not name.startswith('_') and callable(getattr(solution, name))), None)
+
+        if not method_name:
+            return {"success": False, "error": "No solution method found"}
+
+        method = getattr(solution, method_name)
+        sig = inspect.signature(method)
+        param_count = len(sig.parameters)
+
+        if param_count == 0 or len(lines) % param_count != 0:
+            return {
+                "success": False,
+                "error": f"Test case count mismatch. Method expects {param_count} parameters, but got {len(lines)} values."
+            }
+
+        results = []
+        all_passed = True
+
+        for test_num, start in enumerate(range(0, len(lines), param_count), 1):
+            test_inputs_str = lines[start:start + param_count]
+            test_values = values[start:start + param_count]
+            input_display = ", ".join(test_inputs_str) if test_inputs_str else "N/A"
+            started = time.perf_counter()
+            try:
+                parse_error = next((v["error"] for v in test_values if "error" in v), None)
+                if parse_error:
+                    raise ValueError(parse_error)
+                # Deep-copy through JSON so one test (or submission) can't mutate another's inputs
+                inputs = [json.loads(json.dumps(v["value"])) for v in test_values]
+                with redirect_stdout(printed):
+                    result = method(*inputs)
+
+                results.append({
+                    "test_case": test_num,
+                    "input": input_display,
+                    "output": str(result),
+                    "passed": True,
+                    "error": None,
+                    "time_ms": round((time.perf_counter() - started) * 1000, 3),
+                })
+
+            except (Exception, SystemExit) as e:
+                all_passed = False
+                results.append({
+                    "test_case": test_num,
+                    "input": input_display,
+                    "output": None,
+                    "passed": False,
+                    "error": f"{type(e).__name__}: {e}",
+                    "time_ms": round((time.perf_counter() - started) * 1000, 3),
+                })
+
+        return {
+            "success": True,
+            "all_passed": all_passed,
+            "results": results,
+            "stdout": printed.getvalue()[:MAX_OUTPUT_CHARS],
+        }
+
+    except (Exception, SystemExit) as e:
+        return {
+            "success": False,
+            "error": f"Execution error: {str(e)}",
+            "traceback": traceback.format_exc()
+        }
+
+
+def format_test_summary(result: Dict) -> str:
+    """Short, speakable summary of a run for the voice agent."""
+    if not result.get("success"):
+        return f"Could not run the code: {result.get('error', 'unknown error')}"
+
+    tests = result.get("results", [])
+    ok = [t for t in tests if t["passed"]]
+    total_ms = sum(t.get("time_ms", 0) for t in tests)
+    lines = [f"{len(ok)}/{len(tests)} example tests ran without errors ({total_ms:.1f} ms total)."]
+    for test in tests:
+        if test["passed"]:
+            lines.append(f"Test {test['test_case']}: input {test['input']} -> output {test['output'][:200]}")
+        else:
+            lines.append(f"Test {test['test_case']}: input {test['input']} -> {test['error'][:200]}")
+    lines.append("Note: LeetCode examples carry no expected outputs here; compare outputs against the problem's examples.")
+    return "\n".join(lines)
+
+
+class CodeRunnerPool:
+    """Pool of warm, single-use interpreter processes for running submissions."""
+
+    def __init__(self, size: int = RUNNER_POOL_SIZE, timeout: float = RUNNER_TIMEOUT):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle: List[asyncio.subprocess.Process] = []
+        self._slots = asyncio.Semaphore(self.size)
+        self._refill_task: Optional[asyncio.Task] = None
+        # proc.wait() tasks for used processes; the loop only keeps weak references to tasks
+        self._reaping: Set[asyncio.Task] = set()
+
+    async def _spawn(self) -> asyncio.subprocess.Process:
+        return await asyncio.create_subprocess_exec(
+            sys.executable, "-I", os.path.abspath(__file__), "--worker",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=RESULT_LINE_LIMIT,
+        )
+
+    async def _refill(self) -> None:
+        while len(self._idle) < self.size:
+            self._idle.append(await self._spawn())
+
+    def _schedule_refill(self) -> None:
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def start(self) -> None:
+        """Pre-start the warm processes."""
+        await self._refill()
+
+    def _reap(self, proc: asyncio.subprocess.Process) -> None:
+        """Collect a used process's exit status in the background, without holding up the reply."""
+        if proc.returncode is not None:
+            return
+        task = asyncio.create_task(proc.wait())
+        self._reaping.add(task)
+        task.add_done_callback(self._reaping.discard)
+
+    async def _take_process(self) -> asyncio.subprocess.Process:
+        while self._idle:
+            proc = self._idle.pop()
+            if proc.returncode is None:
+                return proc
+        return await self._spawn()
+
+    async def run(
+        self,
+        code: str,
+        test_lines: List[str],
+        test_values: Optional[List[Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict:
+        """Run one submission in an isolated process and return its result dict.
+
+        `timeout` can shorten the pool's time limit for this run, never extend it.
+        """
+        timeout = self.timeout if timeout is None else min(max(timeout, 0.01), self.timeout)
+        payload = json.dumps({"code": code, "lines": test_lines, "values": test_values}).encode("utf-8")
+
+        async with self._slots:
+            proc = await self._take_process()
+            self._schedule_refill()
+            started = time.perf_counter()
+            try:
+                proc.stdin.write(payload)
+                proc.stdin.close()
+                # The result is a single JSON line; don't wait for interpreter shutdown to reply
+                stdout = await asyncio.wait_for(proc.stdout.readline(), timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                return {
+                    "success": False,
+                    "error": f"Time limit exceeded: code ran longer than {timeout:g} seconds",
+                    "timed_out": True,
+                }
+            except ValueError:
+                proc.kill()
+                await proc.wait()
+                return {"success": False, "error": "Code runner output exceeded the size limit"}
+            except asyncio.CancelledError:
+                proc.kill()
+                raise
+            finally:
+                self._reap(proc)
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        try:
+            result = json.loads(stdout.decode("utf-8"))
+        except ValueError:  # empty or truncated output
+            return {
+                "success": False,
+                "error": "Code runner crashed before returning a result",
+            }
+        result["wall_time_ms"] = elapsed_ms
+        return result
+
+    async def close(self) -> None:
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+        for proc in self._idle:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        self._idle.clear()
+        await asyncio.gather(*self._reaping, return_exceptions=True)
+
+
+_code_runner: Optional[CodeRunnerPool] = None
+
+
+def get_code_runner() -> CodeRunnerPool:
+    """Get or create this process's code runner pool."""
+    global _code_runner
+    if _code_runner is None:
+        # Read on use: production serving sets a per-worker size after this module is imported
+        _code_runner = CodeRunnerPool(size=int(os.getenv("CODE_RUNNER_POOL_SIZE", str(RUNNER_POOL_SIZE))))
+    return _code_runner
+
+
+def _limit_resources() -> None:
+    try:
+        import resource
+        limit = RUNNER_MEMORY_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _worker_main() -> None:
+    """Entry point of a pooled process: read one submission from stdin, write the result to stdout."""
+    request = json.loads(sys.stdin.buffer.read().decode("utf-8"))
+    _limit_resources()
+    result = execute_submission(request["code"], request["lines"], request.get("values"))
+    sys.__stdout__.write(json.dumps(result, default=str) + "\n")
+    sys.__stdout__.flush()
+
+
+if __name__ == "__main__" and "--worker" in sys.argv:
+    _worker_main()
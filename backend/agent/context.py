@@ -0,0 +1,175 @@
+"""
+Bounded chat context for long coaching sessions.
+
+The policy keeps the system prompt and the most recent exchanges verbatim,
+blanks out every code/problem snapshot except the newest one, and once the
+history crosses a token budget folds older turns into a running summary that
+is produced in the background so it never delays a reply.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Iterable, List, Optional, Set
+
+import openai
+from livekit.agents import llm
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+KEEP_RECENT_ITEMS = int(os.getenv("CONTEXT_KEEP_RECENT_ITEMS", "12"))
+SUMMARY_MODEL = os.getenv("CONTEXT_SUMMARY_MODEL", "gpt-4o-mini")
+
+SNAPSHOT_TOOLS = {"get_current_code_and_problem"}
+SUPERSEDED_SNAPSHOT = "[Superseded by a newer code/problem snapshot]"
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+LIVE_CONTEXT_PREFIX = "[Live Context]\n"
+
+
+def _item_text(item) -> str:
+    if item.type == "message":
+        return item.text_content or ""
+    if item.type == "function_call":
+        return f"{item.name}({item.arguments})"
+    if item.type == "function_call_output":
+        return item.output or ""
+    return ""
+
+
+def estimate_tokens(items: Iterable) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting."""
+    return sum(len(_item_text(item)) for item in items) // 4 + 1
+
+
+def _is_pinned(item) -> bool:
+    """System/developer messages (the prompt and our summary) are never compacted."""
+    return item.type == "message" and item.role in ("system", "developer")
+
+
+def is_live_context(item) -> bool:
+    return item.type == "message" and (item.text_content or "").startswith(LIVE_CONTEXT_PREFIX)
+
+
+def prune_snapshots(items: List) -> None:
+    """Keep only the most recent code/problem snapshot, in place.
+
+    Older tool outputs are blanked (the call/output pair must stay intact);
+    older injected [Live Context] messages are dropped outright.
+    """
+    latest_seen = False
+    for index in range(len(items) - 1, -1, -1):
+        item = items[index]
+        if is_live_context(item):
+            if latest_seen:
+                del items[index]
+            latest_seen = True
+            continue
+        if item.type != "function_call_output" or item.name not in SNAPSHOT_TOOLS:
+            continue
+        if not latest_seen:
+            latest_seen = True
+        elif item.output != SUPERSEDED_SNAPSHOT:
+            items[index] = item.model_copy(update={"output": SUPERSEDED_SNAPSHOT})
+
+
+def _summarizable(items: List) -> List:
+    """Items old enough to be folded into the summary, never splitting a tool call from its output."""
+    unpinned = [item for item in items if not _is_pinned(item)]
+    if len(unpinned) <= KEEP_RECENT_ITEMS:
+        return []
+
+    candidates = unpinned[:-KEEP_RECENT_ITEMS]
+    kept_call_ids = {
+        item.call_id for item in unpinned[-KEEP_RECENT_ITEMS:]
+        if item.type in ("function_call", "function_call_output")
+    }
+    return [
+        item for item in candidates
+        if item.type not in ("function_call", "function_call_output") or item.call_id not in kept_call_ids
+    ]
+
+
+class ContextCompactor:
+    """Applies the context policy to an agent's chat history."""
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self._summary: str = ""
+        self._summary_task: Optional[asyncio.Task] = None
+        self._client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    def compact(self, chat_ctx: llm.ChatContext) -> llm.ChatContext:
+        """Prune stale snapshots in place and return the context."""
+        prune_snapshots(chat_ctx.items)
+        return chat_ctx
+
+    def needs_summary(self, chat_ctx: llm.ChatContext) -> bool:
+        return estimate_tokens(chat_ctx.items) > self.token_budget and not self.summarizing
+
+    @property
+    def summarizing(self) -> bool:
+        return self._summary_task is not None and not self._summary_task.done()
+
+    def start_summary(self, agent) -> None:
+        """Summarize older turns in the background and swap them out when done."""
+        if self.summarizing:
+            return
+        self._summary_task = asyncio.create_task(self._summarize(agent))
+
+    async def _summarize(self, agent) -> None:
+        # Runs as a fire-and-forget task: anything that escapes would be lost unobserved
+        try:
+            await self._summarize_once(agent)
+        except Exception:
+            logger.exception("Context summary failed, keeping full history")
+
+    async def _summarize_once(self, agent) -> None:
+        old_items = _summarizable(agent.chat_ctx.items)
+        if not old_items:
+            return
+
+        transcript = "\n".join(
+            f"{getattr(item, 'role', 'tool')}: {_item_text(item)}"
+            for item in old_items
+            if item.type == "message"
+            or (item.type == "function_call_output" and item.output != SUPERSEDED_SNAPSHOT)
+        )
+        prompt = (
+            "Condense this coaching conversation into a short brief for the coach: "
+            "which problem is being worked on, the user's level, approaches tried, "
+            "hints already given and open questions. Plain sentences, under 150 words.\n\n"
+            + (f"Previous summary:\n{self._summary}\n\n" if self._summary else "")
+            + f"Conversation:\n{transcript}"
+        )
+
+        try:
+            response = await self._client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2,
+                max_tokens=300,
+            )
+            summary = response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.warning(f"Context summary failed, keeping full history: {e}")
+            return
+
+        self._summary = summary
+        removed_ids: Set[str] = {item.id for item in old_items}
+        chat_ctx = agent.chat_ctx.copy()
+        items = [
+            item for item in chat_ctx.items
+            if item.id not in removed_ids and not (
+                _is_pinned(item) and (item.text_content or "").startswith(SUMMARY_PREFIX)
+            )
+        ]
+        insert_at = next((i for i, item in enumerate(items) if not _is_pinned(item)), len(items))
+        items.insert(insert_at, llm.ChatMessage(role="system", content=[SUMMARY_PREFIX + summary]))
+        chat_ctx.items[:] = items
+
+        await agent.update_chat_ctx(chat_ctx)
+        logger.info(
+            f"Compacted chat context: {len(removed_ids)} items summarized, "
+            f"~{estimate_tokens(chat_ctx.items)} tokens remain"
+        )
@@ -0,0 +1,337 @@
+"""
+On-demand diagnostics for live processes: CPU profiles, memory diffs, loop health.
+
+Everything is off unless DIAGNOSTICS_TOKEN is set, and every request must
+present it (`Authorization: Bearer <token>`). Nothing runs until asked:
+- CPU: a sampling profiler thread reads every thread's stack via
+  sys._current_frames() every few milliseconds for N seconds and returns
+  collapsed stacks ("frame;frame;frame count"), ready for flamegraph.pl or
+  speedscope. The profiled code is never instrumented, so overhead is one
+  stack walk per sample.
+- Memory: tracemalloc is started on request; each snapshot reports the top
+  allocation sites and the growth since the previous snapshot and since the
+  first one, which is what points at a leak.
+- Loop: asyncio task counts by coroutine, plus event-loop lag measured over a
+  short window.
+
+The API server mounts these under /debug (api/debug.py). Agent job processes
+have no HTTP server of their own, so start_diagnostics_server() runs a tiny
+one on a background thread, bound to localhost.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import hmac
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+# First port tried by an agent job process; each process takes the next free one
+AGENT_DIAGNOSTICS_PORT = int(os.getenv("AGENT_DIAGNOSTICS_PORT", "9300"))
+AGENT_DIAGNOSTICS_PORT_RANGE = 64
+MAX_PROFILE_SECONDS = 60.0
+DEFAULT_SAMPLE_INTERVAL_MS = 5.0
+TRACEMALLOC_FRAMES = int(os.getenv("DIAGNOSTICS_TRACEMALLOC_FRAMES", "10"))
+
+
+def _token() -> str:
+    # Read on use: entrypoints call load_dotenv() after importing this module
+    return os.getenv("DIAGNOSTICS_TOKEN", "")
+
+
+def diagnostics_enabled() -> bool:
+    return bool(_token())
+
+
+def check_token(authorization: Optional[str]) -> bool:
+    """Whether an Authorization header carries the diagnostics token."""
+    token = _token()
+    if not token or not authorization:
+        return False
+    scheme, _, presented = authorization.partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(presented.strip().encode(), token.encode())
+
+
+class DiagnosticsBusy(RuntimeError):
+    """A profile is already running in this process."""
+
+
+def _frame_label(code) -> str:
+    path = Path(code.co_filename)
+    return f"{path.parent.name}/{path.name}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Stack sampler over all threads of this process; one profile at a time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def profile(
+        self,
+        seconds: float,
+        interval_ms: float = DEFAULT_SAMPLE_INTERVAL_MS,
+        include_idle: bool = False,
+    ) -> Dict[str, int]:
+        """Sample for `seconds` and return collapsed stacks (root first) with sample counts.
+
+        Call from a worker thread (asyncio.to_thread), never on the event loop you
+        want to see. Idle threads (blocked in select/wait) are skipped unless
+        `include_idle`.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise DiagnosticsBusy("A CPU profile is already running")
+        try:
+            seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+            interval = max(interval_ms, 1.0) / 1000
+            me = threading.get_ident()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            counts: Counter = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == me:
+                        continue
+                    if not include_idle and _is_idle(frame.f_code.co_filename, frame.f_code.co_name):
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_label(frame.f_code))
+                        frame = frame.f_back
+                    thread_name = names.get(thread_id) or str(thread_id)
+                    counts[";".join([thread_name] + stack[::-1])] += 1
+                time.sleep(interval)
+            return dict(counts)
+        finally:
+            self._lock.release()
+
+
+_STDLIB_DIR = os.path.dirname(os.__file__)
+# Innermost Python frames of a thread that is waiting rather than working, as (stdlib file, function).
+# Matching the file too keeps app code with the same names (a cache's get(), say) in the profile
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("concurrent/futures/thread.py", "_worker"),
+    ("socket.py", "accept"),
+    ("socket.py", "readinto"),
+    ("ssl.py", "read"),
+    ("ssl.py", "recv_into"),
+    ("subprocess.py", "_try_wait"),
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_idle(filename: str, function: str) -> bool:
+    if not filename.startswith(_STDLIB_DIR + os.sep):
+        return False
+    module = filename[len(_STDLIB_DIR) + 1:].replace(os.sep, "/")
+    return (module, function) in _IDLE_FRAMES
+
+
+def collapse(counts: Dict[str, int]) -> str:
+    """Collapsed-stack text: one "frame;frame count" line per stack, hottest first."""
+    return "\n".join(f"{stack} {count}" for stack, count in sorted(counts.items(), key=lambda item: -item[1])) + "\n"
+
+
+class MemoryTracker:
+    """tracemalloc snapshots with diffs against the previous and the first snapshot."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._count = 0
+
+    def start(self, frames: int = TRACEMALLOC_FRAMES) -> Dict:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self._baseline = self._previous = None
+                self._count = 0
+            return {"tracing": True, "frames": tracemalloc.get_traceback_limit()}
+
+    def stop(self) -> Dict:
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = self._previous = None
+            return {"tracing": False}
+
+    @staticmethod
+    def _stats(stats, limit: int) -> List[Dict]:
+        return [
+            {
+                "where": str(stat.traceback[0]) if stat.traceback else "?",
+                "size_kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+                **({"size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+                   if hasattr(stat, "size_diff") else {}),
+            }
+            for stat in stats[:limit]
+        ]
+
+    def snapshot(self, limit: int = 20) -> Dict:
+        """Top allocation sites now, and what grew since the previous and first snapshots."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc is not running; start it first")
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            current, peak = tracemalloc.get_traced_memory()
+            self._count += 1
+            report = {
+                "snapshot": self._count,
+                "traced_kb": round(current / 1024, 1),
+                "peak_kb": round(peak / 1024, 1),
+                "top": self._stats(snapshot.statistics("lineno"), limit),
+            }
+            if self._previous is not None:
+                report["since_previous"] = self._stats(snapshot.compare_to(self._previous, "lineno"), limit)
+            if self._baseline is not None and self._baseline is not self._previous:
+                report["since_first"] = self._stats(snapshot.compare_to(self._baseline, "lineno"), limit)
+            if self._baseline is None:
+                self._baseline = snapshot
+            self._previous = snapshot
+            return report
+
+
+async def loop_stats(sample_seconds: float = 1.0, interval: float = 0.01) -> Dict:
+    """Task counts on the running loop and its scheduling lag over a short window."""
+    loop = asyncio.get_running_loop()
+    tasks = asyncio.all_tasks(loop)
+    by_coroutine = Counter(
+        getattr(task.get_coro(), "__qualname__", type(task.get_coro()).__name__) for task in tasks
+    )
+
+    lags = []
+    deadline = loop.time() + min(max(sample_seconds, interval), MAX_PROFILE_SECONDS)
+    while loop.time() < deadline:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, (loop.time() - expected) * 1000))
+
+    lags.sort()
+    return {
+        "tasks": len(tasks),
+        "tasks_by_coroutine": dict(by_coroutine.most_common(25)),
+        "loop_lag_ms": {
+            "samples": len(lags),
+            "p50": round(statistics.median(lags), 2) if lags else None,
+            "p99": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))], 2) if lags else None,
+            "max": round(lags[-1], 2) if lags else None,
+        },
+        "threads": threading.active_count(),
+        "pid": os.getpid(),
+    }
+
+
+_profiler = SamplingProfiler()
+_memory = MemoryTracker()
+
+
+def get_profiler() -> SamplingProfiler:
+    return _profiler
+
+
+def get_memory_tracker() -> MemoryTracker:
+    return _memory
+
+
+class _DiagnosticsHandler(BaseHTTPRequestHandler):
+    loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _send(self, status: int, body, content_type: str = "application/json"):
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body)
+        payload = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method: str):
+        if not check_token(self.headers.get("Authorization")):
+            self._send(401, {"detail": "Invalid diagnostics token"})
+            return
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if method == "GET" and url.path == "/debug/profile":
+                counts = _profiler.profile(
+                    float(params.get("seconds", 10)),
+                    float(params.get("interval_ms", DEFAULT_SAMPLE_INTERVAL_MS)),
+                    params.get("include_idle") == "1",
+                )
+                self._send(200, collapse(counts), "text/plain; charset=utf-8")
+            elif method == "POST" and url.path == "/debug/memory/start":
+                frames = int(params.get("frames", TRACEMALLOC_FRAMES))
+                if frames < 1:
+                    raise ValueError("frames must be at least 1")
+                self._send(200, _memory.start(frames))
+            elif method == "POST" and url.path == "/debug/memory/stop":
+                self._send(200, _memory.stop())
+            elif method == "GET" and url.path == "/debug/memory/snapshot":
+                self._send(200, _memory.snapshot(int(params.get("limit", 20))))
+            elif method == "GET" and url.path == "/debug/loop":
+                seconds = float(params.get("seconds", 1.0))
+                future = asyncio.run_coroutine_threadsafe(loop_stats(seconds), self.loop)
+                try:
+                    self._send(200, future.result(timeout=seconds + 5))
+                except concurrent.futures.TimeoutError:
+                    # A stalled loop is exactly what this endpoint is for: say so rather than hang up
+                    future.cancel()
+                    self._send(503, {"detail": f"Event loop unresponsive (no reply within {seconds + 5:g}s)"})
+            else:
+                self._send(404, {"detail": "Not found"})
+        except DiagnosticsBusy as e:
+            self._send(409, {"detail": str(e)})
+        except (RuntimeError, ValueError) as e:
+            self._send(400, {"detail": str(e)})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def log_message(self, format, *args):
+        logger.debug(f"diagnostics: {format % args}")
+
+
+def start_diagnostics_server(
+    loop: asyncio.AbstractEventLoop,
+    port: int = AGENT_DIAGNOSTICS_PORT,
+) -> Optional[ThreadingHTTPServer]:
+    """Serve /debug for this process on a daemon thread (localhost only); None if disabled."""
+    if not diagnostics_enabled():
+        return None
+    handler = type("DiagnosticsHandler", (_DiagnosticsHandler,), {"loop": loop})
+    for candidate in range(port, port + AGENT_DIAGNOSTICS_PORT_RANGE):
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", candidate), handler)
+        except OSError:
+            continue
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="diagnostics-http", daemon=True).start()
+        logger.info(f"Diagnostics for pid {os.getpid()} on http://127.0.0.1:{candidate}/debug")
+        return server
+    logger.warning(f"No free diagnostics port in {port}-{port + AGENT_DIAGNOSTICS_PORT_RANGE - 1}")
+    return None
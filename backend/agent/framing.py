@@ -0,0 +1,88 @@
+"""
+Framing for agent → frontend data-channel messages.
+
+Small messages go out as plain JSON, exactly as before. Larger ones are
+deflate-compressed and, if still too big for a single data packet, split
+into ordered frames the frontend reassembles (see frontend/src/lib/framing.ts).
+"""
+
+import base64
+import hashlib
+import json
+import uuid
+import zlib
+from typing import Dict, List, Optional
+
+# LiveKit caps reliable data packets at ~15 KiB; leave room for the frame envelope
+MAX_FRAME_DATA = 12 * 1024
+# Messages below this size are cheaper to send as-is than to compress
+COMPRESS_THRESHOLD = 1024
+
+
+def encode_message(message: Dict) -> List[bytes]:
+    """Encode a message into one or more data-channel packets."""
+    raw = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    if len(raw) <= COMPRESS_THRESHOLD:
+        return [raw]
+
+    data = base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+    chunks = [data[i:i + MAX_FRAME_DATA] for i in range(0, len(data), MAX_FRAME_DATA)]
+    message_id = uuid.uuid4().hex[:12]
+
+    return [
+        json.dumps({
+            "type": "frame",
+            "id": message_id,
+            "index": index,
+            "count": len(chunks),
+            "encoding": "deflate",
+            "data": chunk,
+        }, separators=(",", ":")).encode("utf-8")
+        for index, chunk in enumerate(chunks)
+    ]
+
+
+async def publish_message(room, message: Dict) -> None:
+    """Publish a message reliably, compressing and chunking it when needed."""
+    for packet in encode_message(message):
+        await room.local_participant.publish_data(packet, reliable=True)
+
+
+def _problem_fingerprint(problem: Dict) -> str:
+    return hashlib.sha1(json.dumps(problem, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ProblemPublisher:
+    """Sends problem payloads once per room and references them by slug afterwards."""
+
+    def __init__(self):
+        self._sent: Dict[str, str] = {}
+        self._problems: Dict[str, Dict] = {}
+
+    def remember(self, problem: Dict) -> None:
+        slug = problem.get("id")
+        if slug:
+            self._problems[slug] = problem
+
+    async def publish(self, room, problem: Dict) -> None:
+        """Publish a selected problem, sending only a reference if the frontend already has it."""
+        slug = problem.get("id")
+        self.remember(problem)
+        fingerprint = _problem_fingerprint(problem)
+
+        if slug and self._sent.get(slug) == fingerprint:
+            await publish_message(room, {"type": "problem_selected", "problem_ref": slug})
+            return
+
+        await publish_message(room, {"type": "problem_selected", "problem": problem})
+        if slug:
+            self._sent[slug] = fingerprint
+
+    async def resend(self, room, slug: str) -> bool:
+        """Send the full payload again, e.g. when the frontend missed a cached reference."""
+        problem: Optional[Dict] = self._problems.get(slug)
+        if problem is None:
+            return False
+        self._sent.pop(slug, None)
+        await self.publish(room, problem)
+        return True
@@ -0,0 +1,121 @@
+"""
+Batch grading of many submissions against a shared test set.
+
+Built for cohort sessions where dozens of people submit the same problem at
+once: test inputs are split and decoded once per batch, every submission
+still runs in its own isolated, time-limited process, and the batch is spread
+over a dedicated runner pool sized to the machine's cores so it does not
+compete with interactive `/run-code` requests.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .code_runner import CodeRunnerPool, parse_test_lines, parse_test_values
+
+logger = logging.getLogger(__name__)
+
+GRADER_POOL_SIZE = int(os.getenv("GRADER_POOL_SIZE", str(os.cpu_count() or 1)))
+
+TABLE_COLUMNS = ["id", "problem_id", "status", "passed", "total", "time_ms", "error"]
+
+
+@dataclass
+class Submission:
+    id: str
+    problem_id: str
+    code: str
+
+
+@dataclass
+class TestSet:
+    lines: List[str]
+    values: list
+    expected: Optional[List[str]] = None
+
+    @classmethod
+    def parse(cls, test_cases: str, expected_outputs: Optional[str] = None) -> "TestSet":
+        lines = parse_test_lines(test_cases)
+        expected = None
+        if expected_outputs:
+            # Render expected JSON values the way the runner renders results (str of the Python value)
+            expected = []
+            for line in parse_test_lines(expected_outputs):
+                try:
+                    expected.append(str(json.loads(line)))
+                except ValueError:
+                    expected.append(line)
+        return cls(lines=lines, values=parse_test_values(lines), expected=expected)
+
+
+def _grade_row(submission: Submission, result: Dict, tests: TestSet) -> list:
+    if not result.get("success"):
+        status = "timeout" if result.get("timed_out") else "error"
+        return [submission.id, submission.problem_id, status, 0, 0, result.get("wall_time_ms"), result.get("error")]
+
+    results = result.get("results", [])
+    error = next((test["error"] for test in results if test["error"]), None)
+    if tests.expected is not None:
+        passed = sum(
+            1 for test, expected in zip(results, tests.expected)
+            if test["passed"] and test["output"] == expected
+        )
+        accepted = passed == len(results) == len(tests.expected)
+    else:
+        # Without expected outputs "passed" means the test ran without raising
+        passed = sum(1 for test in results if test["passed"])
+        accepted = passed == len(results)
+    if error:
+        status = "runtime_error"
+    elif tests.expected is None:
+        status = "ran"
+    else:
+        status = "accepted" if accepted else "wrong_answer"
+    time_ms = round(sum(test.get("time_ms", 0) for test in results), 3)
+    return [submission.id, submission.problem_id, status, passed, len(results), time_ms, error and error[:200]]
+
+
+async def grade_batch(
+    submissions: List[Submission],
+    tests: TestSet,
+    runner: CodeRunnerPool,
+    timeout: Optional[float] = None,
+) -> Dict:
+    """Run every submission against the shared test set and return a compact result table."""
+    started = time.perf_counter()
+
+    async def _grade(submission: Submission) -> list:
+        result = await runner.run(submission.code, tests.lines, tests.values, timeout=timeout)
+        return _grade_row(submission, result, tests)
+
+    rows = await asyncio.gather(*(_grade(submission) for submission in submissions))
+
+    elapsed = time.perf_counter() - started
+    statuses: Dict[str, int] = {}
+    for row in rows:
+        statuses[row[2]] = statuses.get(row[2], 0) + 1
+    summary = {
+        "submissions": len(rows),
+        "statuses": statuses,
+        "wall_time_ms": round(elapsed * 1000, 1),
+        "submissions_per_sec": round(len(rows) / elapsed, 1) if elapsed > 0 else None,
+    }
+    logger.info(f"Graded batch: {summary}")
+    return {"columns": TABLE_COLUMNS, "rows": rows, "summary": summary}
+
+
+_grading_runner: Optional[CodeRunnerPool] = None
+
+
+def get_grading_runner() -> CodeRunnerPool:
+    """Get or create the runner pool reserved for batch grading."""
+    global _grading_runner
+    if _grading_runner is None:
+        # Read on use: production serving sets a per-worker size after this module is imported
+        _grading_runner = CodeRunnerPool(size=int(os.getenv("GRADER_POOL_SIZE", str(GRADER_POOL_SIZE))))
+    return _grading_runner
@@ -1,107 +1,335 @@
 import os
 import json
+import time
 import logging
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 import httpx
 import asyncio
 
+from .shared_cache import get_shared_cache
+from .circuit_breaker import CircuitBreaker
+from .tracing import span as trace_span
+
 logger = logging.getLogger(__name__)
 
+# Problem statements change rarely; search results can shift as problems are added
+PROBLEM_CACHE_TTL = 24 * 3600
+SEARCH_CACHE_TTL = 3600
+# In-process copies are short-lived so processes pick up shared-cache refreshes
+MEMORY_CACHE_TTL = 600
+MEMORY_CACHE_MAX_ENTRIES = 2048
+RATE_LIMIT_BACKOFF = 60.0
+UPSTREAM_BUDGET_BUCKET = "leetcode-graphql"
+
+# How long callers can wait for LeetCode (seconds): a voice turn can't wait long, the API can
+AGENT_DEADLINE = float(os.getenv("LEETCODE_AGENT_DEADLINE", "2.0"))
+API_DEADLINE = float(os.getenv("LEETCODE_API_DEADLINE", "10.0"))
+# Launch a parallel attempt when one hasn't answered within this long, up to MAX_ATTEMPTS in total
+HEDGE_DELAY = float(os.getenv("LEETCODE_HEDGE_DELAY", "0.6"))
+MAX_ATTEMPTS = 3
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("LEETCODE_BREAKER_FAILURES", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("LEETCODE_BREAKER_RESET_SECONDS", "30"))
+
+
+_PROBLEM_LIST_QUERY = """
+query problemsetQuestionList($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
+  problemsetQuestionList: questionList(
+    categorySlug: $categorySlug
+    limit: $limit
+    skip: $skip
+    filters: $filters
+  ) {
+    total: totalNum
+    questions: data {
+      questionId
+      questionFrontendId
+      title
+      titleSlug
+      difficulty
+      topicTags {
+        name
+        slug
+      }
+      isPaidOnly
+    }
+  }
+}
+"""
+
 
 class LeetCodeService:
     """Service to interact with LeetCode's GraphQL API."""
     
     def __init__(self):
-        self.base_url = "https://leetcode.com/graphql"
+        # Overridable so load tests can point at a recorded-response stand-in
+        self.base_url = os.getenv("LEETCODE_GRAPHQL_URL", "https://leetcode.com/graphql")
         self.session_cookie = os.getenv("LEETCODE_SESSION")
         self._last_request_time = 0
-        self._min_request_interval = 1.0  
+        self._min_request_interval = float(os.getenv("LEETCODE_MIN_REQUEST_INTERVAL", "1.0"))
+        self._throttle_lock = asyncio.Lock()
+        self._memory_cache: Dict[str, Tuple[float, object]] = {}
+        self._shared_cache = get_shared_cache()
+        self._breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+        self._stats = {
+            "memory_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "upstream_requests": 0,
+            "rate_limited": 0,
+            "hedged_requests": 0,
+            "upstream_failures": 0,
+            "short_circuited": 0,
+            "budget_exhausted": 0,
+            "stale_served": 0,
+        }
+    
+    async def _cache_get(self, key: str, allow_stale: bool = False):
+        # Expired memory entries are kept (size-bounded) as the last good copy for serve-stale
+        entry = self._memory_cache.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if allow_stale or expires_at >= time.time():
+                self._stats["memory_hits"] += 1
+                return value
+        
+        if self._shared_cache is not None:
+            try:
+                # SQLite can block on a busy writer for up to busy_timeout; keep that off the event loop
+                value = await asyncio.to_thread(self._shared_cache.get, key, allow_stale)
+            except Exception as e:
+                logger.warning(f"Shared cache read failed: {e}")
+                value = None
+            if value is not None:
+                self._stats["shared_hits"] += 1
+                self._memory_cache[key] = (time.time() + MEMORY_CACHE_TTL, value)
+                return value
+        
+        if not allow_stale:
+            self._stats["misses"] += 1
+        return None
+    
+    async def _serve_stale(self, key: str):
+        """Last good cached copy when LeetCode can't answer in time (or the breaker is open)."""
+        value = await self._cache_get(key, allow_stale=True)
+        if value is not None:
+            self._stats["stale_served"] += 1
+            logger.warning(f"LeetCode unavailable, serving cached copy of {key[:80]}")
+        return value
+    
+    async def _cache_set(self, key: str, value, ttl: float) -> None:
+        self._memory_cache.pop(key, None)
+        self._memory_cache[key] = (time.time() + min(ttl, MEMORY_CACHE_TTL), value)
+        while len(self._memory_cache) > MEMORY_CACHE_MAX_ENTRIES:
+            self._memory_cache.pop(next(iter(self._memory_cache)))
+        if self._shared_cache is not None:
+            try:
+                await asyncio.to_thread(self._shared_cache.set, key, value, ttl)
+            except Exception as e:
+                logger.warning(f"Shared cache write failed: {e}")
+    
+    async def _wait_for_request_slot(self, expires: float) -> bool:
+        """Rate limiting: wait for our turn in the (possibly cross-process) request budget.
+        
+        Returns False without waiting when the turn would come after the caller's deadline.
+        """
+        if self._shared_cache is not None:
+            try:
+                delay = await asyncio.to_thread(
+                    self._shared_cache.reserve_slot,
+                    UPSTREAM_BUDGET_BUCKET,
+                    self._min_request_interval,
+                    expires - time.monotonic(),
+                )
+                if delay is None:
+                    return False
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                return True
+            except Exception as e:
+                logger.warning(f"Shared request budget unavailable, throttling locally: {e}")
+        
+        async with self._throttle_lock:
+            delay = self._min_request_interval - (time.time() - self._last_request_time)
+            if time.monotonic() + max(delay, 0) >= expires:
+                return False
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_request_time = time.time()
+            return True
+    
+    async def _attempt(self, query: str, variables: Dict, expires: float) -> Tuple[str, Optional[Dict]]:
+        """One upstream request; returns ("ok", data) or (outcome, None).
+
+        Outcomes other than "ok": "failed" (transport error or 5xx, the only ones that count
+        against the breaker), "rate_limited" (429), "error" (any other bad answer) and
+        "budget_exhausted" (no request slot before the deadline, so nothing was sent).
+        """
+        operation = query.split("(", 1)[0].split()[-1]
+        with trace_span("leetcode.graphql", operation=operation) as span:
+            outcome, data = await self._request(query, variables, expires)
+            span.set(outcome=outcome)
+            return outcome, data
+    
+    async def _request(self, query: str, variables: Dict, expires: float) -> Tuple[str, Optional[Dict]]:
+        if not await self._wait_for_request_slot(expires):
+            self._stats["budget_exhausted"] += 1
+            return "budget_exhausted", None
+        self._stats["upstream_requests"] += 1
+        
+        async with httpx.AsyncClient() as client:
+            headers = {
+                "Content-Type": "application/json",
+                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+            }
+            if self.session_cookie:
+                headers["Cookie"] = f"LEETCODE_SESSION={self.session_cookie}"
+            
+            try:
+                response = await client.post(
+                    self.base_url,
+                    json={"query": query, "variables": variables},
+                    headers=headers,
+                    timeout=max(0.05, expires - time.monotonic())
+                )
+            except httpx.HTTPError as e:
+                logger.warning(f"LeetCode request failed: {type(e).__name__}: {e}")
+                return "failed", None
+            
+            self._last_request_time = time.time()
+        
+        if response.status_code == 200:
+            try:
+                data = response.json()
+            except ValueError as e:
+                logger.error(f"LeetCode returned invalid JSON: {e}")
+                return "error", None
+            if not isinstance(data, dict) or "errors" in data:
+                errors = data.get("errors") if isinstance(data, dict) else data
+                logger.error(f"LeetCode GraphQL errors: {str(errors)[:200]}")
+                return "error", None
+            return "ok", data.get("data", {})
+        elif response.status_code == 429:
+            self._stats["rate_limited"] += 1
+            logger.error(f"LeetCode API rate limit exceeded. Backing off {RATE_LIMIT_BACKOFF:.0f} seconds...")
+            if self._shared_cache is not None:
+                await asyncio.to_thread(self._shared_cache.backoff, UPSTREAM_BUDGET_BUCKET, RATE_LIMIT_BACKOFF)
+            else:
+                self._last_request_time = time.time() + RATE_LIMIT_BACKOFF
+            return "rate_limited", None
+        else:
+            logger.error(f"LeetCode API error: {response.status_code} - {response.text[:200]}")
+            return ("failed" if response.status_code >= 500 else "error"), None
+    
+    async def _graphql(self, query: str, variables: Dict, deadline: float) -> Optional[Dict]:
+        """POST a GraphQL query to LeetCode within `deadline` seconds; returns its `data`, or None.
+        
+        A slow attempt is hedged with a parallel one and a transport error or 5xx is retried
+        while the budget lasts; only those count against the circuit breaker, which fails the
+        call immediately while it is open. Rate limits, bad answers and an exhausted request
+        budget end the call without retrying, and a call that runs out of time or is cancelled
+        settles the breaker without blaming LeetCode.
+        """
+        if not self._breaker.allow():
+            self._stats["short_circuited"] += 1
+            return None
+        
+        expires = time.monotonic() + deadline
+        pending = set()
+        attempts = 0
+        outcome = "timeout"
+        upstream_failed = False
+        try:
+            while True:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    break
+                if not pending:
+                    if attempts >= MAX_ATTEMPTS:
+                        break
+                    pending.add(asyncio.create_task(self._attempt(query, variables, expires)))
+                    attempts += 1
+                
+                done, pending = await asyncio.wait(
+                    pending, timeout=min(remaining, HEDGE_DELAY), return_when=asyncio.FIRST_COMPLETED
+                )
+                results = []
+                for task in done:
+                    try:
+                        results.append(task.result())
+                    except Exception as e:
+                        logger.warning(f"LeetCode attempt crashed: {type(e).__name__}: {e}")
+                        results.append(("error", None))
+                for outcome, data in results:
+                    if outcome == "ok":
+                        return data
+                upstream_failed = upstream_failed or any(outcome == "failed" for outcome, _ in results)
+                final = [outcome for outcome, _ in results if outcome != "failed"]
+                if final:
+                    # Retrying won't help (and hedging into a rate limit or an empty budget makes it worse)
+                    outcome = final[0]
+                    break
+                
+                if not done and attempts < MAX_ATTEMPTS and expires - time.monotonic() > HEDGE_DELAY / 2:
+                    self._stats["hedged_requests"] += 1
+                    pending.add(asyncio.create_task(self._attempt(query, variables, expires)))
+                    attempts += 1
+        finally:
+            for task in pending:
+                task.cancel()
+            # Always settle the breaker (a half-open probe otherwise stays "in flight" forever)
+            if outcome == "ok":
+                self._breaker.record_success()
+            elif upstream_failed:
+                self._stats["upstream_failures"] += 1
+                self._breaker.record_failure()
+            else:
+                self._breaker.release()
         
+        logger.warning(f"LeetCode request gave up: {outcome} ({attempts} attempts, {deadline:.1f}s budget)")
+        return None
+    
     async def search_problems(
         self,
         tags: Optional[List[str]] = None,
         difficulty: Optional[str] = None,
-        limit: int = 10
+        limit: int = 10,
+        deadline: float = API_DEADLINE,
+        skip: int = 0,
+        include_paid: bool = False,
+        keywords: Optional[str] = None
     ) -> List[Dict]:
-        """Search LeetCode problems by tags and difficulty."""
-        
-        query = """
-        query problemsetQuestionList($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
-          problemsetQuestionList: questionList(
-            categorySlug: $categorySlug
-            limit: $limit
-            skip: $skip
-            filters: $filters
-          ) {
-            total: totalNum
-            questions: data {
-              questionId
-              questionFrontendId
-              title
-              titleSlug
-              difficulty
-              topicTags {
-                name
-                slug
-              }
-              isPaidOnly
-            }
-          }
-        }
-        """
+        """Search LeetCode problems by tags, difficulty and keywords, waiting at most `deadline` seconds."""
         
         filters = {}
         if tags:
             filters["tags"] = tags
         if difficulty:
             filters["difficulty"] = difficulty
+        if keywords:
+            filters["searchKeywords"] = keywords
             
         variables = {
             "categorySlug": "",
-            "skip": 0,
+            "skip": skip,
             "limit": limit,
             "filters": filters
         }
         
+        cache_key = "search:" + json.dumps(variables, sort_keys=True) + (":paid" if include_paid else "")
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Rate limiting: wait if needed
-            import time
-            current_time = time.time()
-            time_since_last = current_time - self._last_request_time
-            if time_since_last < self._min_request_interval:
-                await asyncio.sleep(self._min_request_interval - time_since_last)
+            data = await self._graphql(_PROBLEM_LIST_QUERY, variables, deadline)
+            if data is None:
+                return await self._serve_stale(cache_key) or []
             
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Content-Type": "application/json",
-                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-                }
-                if self.session_cookie:
-                    headers["Cookie"] = f"LEETCODE_SESSION={self.session_cookie}"
-                
-                response = await client.post(
-                    self.base_url,
-                    json={"query": query, "variables": variables},
-                    headers=headers,
-                    timeout=30.0  # Increased timeout
-                )
-                
-                self._last_request_time = time.time()
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if "errors" in data:
-                        logger.error(f"LeetCode GraphQL errors: {data['errors']}")
-                        return []
-                    problems = data.get("data", {}).get("problemsetQuestionList", {}).get("questions", [])
-                    return [p for p in problems if not p.get("isPaidOnly", False)]
-                elif response.status_code == 429:
-                    logger.error("LeetCode API rate limit exceeded. Waiting 60 seconds...")
-                    await asyncio.sleep(60)
-                    return []
-                else:
-                    logger.error(f"LeetCode API error: {response.status_code} - {response.text[:200]}")
-                    return []
+            problems = (data.get("problemsetQuestionList") or {}).get("questions", [])
+            if not include_paid:
+                problems = [p for p in problems if not p.get("isPaidOnly", False)]
+            await self._cache_set(cache_key, problems, SEARCH_CACHE_TTL)
+            return problems
                     
         except httpx.TimeoutException:
             logger.error("LeetCode API timeout - request took too long")
@@ -110,8 +338,35 @@ class LeetCodeService:
             logger.error(f"Error fetching LeetCode problems: {e}", exc_info=True)
             return []
     
-    async def get_problem_details(self, title_slug: str) -> Optional[Dict]:
-        """Get detailed information about a specific problem including description and code template."""
+    async def get_problem_page(self, skip: int, limit: int, deadline: float = API_DEADLINE) -> Optional[Tuple[Optional[int], List[Dict]]]:
+        """One page of the whole problem set, paid-only included, and LeetCode's total count.
+
+        Uncached, and None (rather than an empty page) when LeetCode didn't answer, so a
+        caller walking the list can tell a failure from its end.
+        """
+        variables = {"categorySlug": "", "skip": skip, "limit": limit, "filters": {}}
+        data = await self._graphql(_PROBLEM_LIST_QUERY, variables, deadline)
+        listing = (data or {}).get("problemsetQuestionList")
+        if not listing:
+            return None
+        return listing.get("total"), listing.get("questions") or []
+    
+    async def find_slug_by_frontend_id(self, frontend_id: str, deadline: float = API_DEADLINE) -> Optional[str]:
+        """Slug of the problem LeetCode numbers `frontend_id` ("146" -> "lru-cache"), or None."""
+        # A keyword search for the number also matches titles containing it; keep the exact ID
+        problems = await self.search_problems(
+            limit=50, deadline=deadline, include_paid=True, keywords=frontend_id
+        )
+        for problem in problems:
+            if str(problem.get("questionFrontendId")) == frontend_id:
+                return problem["titleSlug"]
+        return None
+    
+    async def get_problem_details(self, title_slug: str, deadline: float = API_DEADLINE) -> Optional[Dict]:
+        """Get detailed information about a specific problem including description and code template.
+        
+        Waits at most `deadline` seconds for LeetCode before falling back to a cached copy.
+        """
         
         query = """
         query questionData($titleSlug: String!) {
@@ -139,55 +394,38 @@ class LeetCodeService:
         
         variables = {"titleSlug": title_slug}
         
+        cache_key = f"problem:{title_slug}"
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Rate limiting: wait if needed
-            import time
-            current_time = time.time()
-            time_since_last = current_time - self._last_request_time
-            if time_since_last < self._min_request_interval:
-                await asyncio.sleep(self._min_request_interval - time_since_last)
+            data = await self._graphql(query, variables, deadline)
+            if data is None:
+                return await self._serve_stale(cache_key)
             
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Content-Type": "application/json",
-                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-                }
-                if self.session_cookie:
-                    headers["Cookie"] = f"LEETCODE_SESSION={self.session_cookie}"
-                
-                response = await client.post(
-                    self.base_url,
-                    json={"query": query, "variables": variables},
-                    headers=headers,
-                    timeout=30.0  # Increased timeout
-                )
-                
-                self._last_request_time = time.time()
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if "errors" in data:
-                        logger.error(f"LeetCode GraphQL errors: {data['errors']}")
-                        return None
-                    question = data.get("data", {}).get("question")
-                    
-                    if question:
-                        return question
-                    else:
-                        logger.error(f"Problem not found: {title_slug}")
-                        return None
-                elif response.status_code == 429:
-                    logger.error("LeetCode API rate limit exceeded. Waiting 60 seconds...")
-                    await asyncio.sleep(60)
-                    return None
-                else:
-                    logger.error(f"LeetCode API error: {response.status_code}")
-                    return None
+            question = data.get("question")
+            
+            if question:
+                await self._cache_set(cache_key, question, PROBLEM_CACHE_TTL)
+                return question
+            else:
+                logger.error(f"Problem not found: {title_slug}")
+                return None
                     
         except Exception as e:
             logger.error(f"Error fetching problem details: {e}")
             return None
     
+    def get_stats(self) -> Dict:
+        """Cache, upstream request and circuit breaker state for this process."""
+        return {
+            **self._stats,
+            "breaker": self._breaker.snapshot(),
+            "memory_cache_entries": len(self._memory_cache),
+            "shared_cache": str(self._shared_cache.path) if self._shared_cache else None,
+        }
+    
     def format_problem_for_display(self, problem_details: Dict) -> Dict:
         """Format problem details for frontend display."""
         python_code = next((s["code"] for s in problem_details.get("codeSnippets", []) 
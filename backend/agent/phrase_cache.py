@@ -0,0 +1,187 @@
+"""
+Pre-synthesized audio for the agent's fixed phrases.
+
+The greeting and tool fillers never change, so they are synthesized once per
+TTS model and voice, written to disk as WAV and played straight into the
+session's audio output afterwards instead of going through TTS every time.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import wave
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from livekit import rtc
+
+logger = logging.getLogger(__name__)
+
+PHRASE_CACHE_DIR = Path(os.getenv("PHRASE_AUDIO_CACHE_DIR", Path(__file__).parent / "phrase_audio"))
+
+# Playback frame size: 20ms, the usual WebRTC packetization
+FRAME_MS = 20
+
+# (pcm bytes, sample rate, channels)
+_Audio = Tuple[bytes, int, int]
+
+
+class PhraseAudioCache:
+    """Synthesizes fixed phrases once and replays the stored audio."""
+
+    def __init__(self, tts, voice: str, cache_dir: Path = PHRASE_CACHE_DIR):
+        self.tts = tts
+        self.voice = voice
+        self.model = getattr(tts, "model", type(tts).__name__)
+        self.cache_dir = Path(cache_dir)
+        self._memory: Dict[str, _Audio] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def _path(self, text: str) -> Path:
+        key = hashlib.sha1(f"{self.model}|{self.voice}|{text}".encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.wav"
+
+    def _read(self, path: Path) -> Optional[_Audio]:
+        try:
+            with wave.open(str(path), "rb") as wav:
+                return wav.readframes(wav.getnframes()), wav.getframerate(), wav.getnchannels()
+        except (OSError, wave.Error, EOFError):
+            return None
+
+    def _write(self, path: Path, audio: _Audio) -> None:
+        pcm, sample_rate, num_channels = audio
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with wave.open(str(tmp_path), "wb") as wav:
+            wav.setnchannels(num_channels)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm)
+        os.replace(tmp_path, path)
+
+    async def _synthesize(self, text: str) -> _Audio:
+        chunks: List[bytes] = []
+        sample_rate, num_channels = self.tts.sample_rate, self.tts.num_channels
+        async with self.tts.synthesize(text) as stream:
+            async for event in stream:
+                chunks.append(event.frame.data.tobytes())
+                sample_rate, num_channels = event.frame.sample_rate, event.frame.num_channels
+        return b"".join(chunks), sample_rate, num_channels
+
+    async def load(self, text: str) -> _Audio:
+        """Audio for a phrase from memory, disk, or (once) the TTS."""
+        if text in self._memory:
+            return self._memory[text]
+        if text in self._pending:
+            return await self._pending[text]
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[text] = future
+        try:
+            path = self._path(text)
+            audio = await asyncio.to_thread(self._read, path) if path.exists() else None
+            if audio is None:
+                audio = await self._synthesize(text)
+                await asyncio.to_thread(self._write, path, audio)
+                logger.info(f"Cached phrase audio for {text!r} ({len(audio[0])} bytes)")
+            self._memory[text] = audio
+            future.set_result(audio)
+            return audio
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved; callers awaiting it still get the error
+            raise
+        finally:
+            del self._pending[text]
+
+    async def warm(self, phrases: Iterable[str]) -> None:
+        """Make sure every phrase is on disk and in memory."""
+        for text in phrases:
+            try:
+                await self.load(text)
+            except Exception as e:
+                logger.warning(f"Could not pre-synthesize {text!r}: {e}")
+
+    async def frames(self, text: str) -> AsyncIterator[rtc.AudioFrame]:
+        pcm, sample_rate, num_channels = await self.load(text)
+        samples_per_frame = sample_rate * FRAME_MS // 1000
+        frame_bytes = samples_per_frame * num_channels * 2
+        for offset in range(0, len(pcm), frame_bytes):
+            chunk = pcm[offset:offset + frame_bytes]
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=sample_rate,
+                num_channels=num_channels,
+                samples_per_channel=len(chunk) // (2 * num_channels),
+            )
+
+    async def say(self, session, text: str, **kwargs):
+        """session.say() that plays cached audio, falling back to live TTS on any cache failure."""
+        try:
+            await self.load(text)
+        except Exception as e:
+            logger.warning(f"Phrase cache unavailable, using live TTS: {e}")
+            return session.say(text, **kwargs)
+        return session.say(text, audio=self.frames(text), **kwargs)
+
+
+class _ToneStream:
+    def __init__(self, tts: "LocalTTS", text: str):
+        self._tts = tts
+        self._text = text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        for frame in self._tts.render(self._text):
+            yield _SynthesizedFrame(frame)
+
+
+class _SynthesizedFrame:
+    def __init__(self, frame: rtc.AudioFrame):
+        self.frame = frame
+
+
+class LocalTTS:
+    """Deterministic offline stand-in for a TTS plugin (a short tone per word), for tests and dev."""
+
+    model = "local-tone"
+
+    def __init__(self, sample_rate: int = 24000, num_channels: int = 1):
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.synthesize_calls = 0
+
+    def render(self, text: str) -> List[rtc.AudioFrame]:
+        samples_per_word = self.sample_rate // 10
+        samples = []
+        for word_index, word in enumerate(text.split()):
+            freq = 220 + 20 * (len(word) + word_index % 5)
+            for n in range(samples_per_word):
+                value = int(8000 * math.sin(2 * math.pi * freq * n / self.sample_rate))
+                samples.extend([value] * self.num_channels)
+
+        pcm = b"".join(v.to_bytes(2, "little", signed=True) for v in samples)
+        frame_bytes = self.sample_rate * FRAME_MS // 1000 * self.num_channels * 2
+        return [
+            rtc.AudioFrame(
+                data=pcm[i:i + frame_bytes],
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(pcm[i:i + frame_bytes]) // (2 * self.num_channels),
+            )
+            for i in range(0, len(pcm), frame_bytes)
+        ]
+
+    def synthesize(self, text: str) -> _ToneStream:
+        self.synthesize_calls += 1
+        return _ToneStream(self, text)
@@ -0,0 +1,247 @@
+"""
+Resolve spoken problem names to LeetCode slugs without a network call.
+
+Speech-to-text hands select_leetcode_problem things like "LRU cash", "two
+some", "three sum" or "problem 146". Against the locally stored problem
+catalog, a name is tried as, in order:
+1. A frontend ID ("146", "problem 146", "#146")
+2. An exact slug or title
+3. A normalized title: lowercase, number words as digits, punctuation dropped
+4. A phonetic match: Soundex per word, so "cash" ~ "cache" and "some" ~ "sum"
+5. The closest normalized title within a small edit distance
+
+Sequel numerals count as numbers ("II" = "two" = "2"), and steps 4-5 never
+match a title whose trailing number differs, so "jump game two" can't land on
+"Jump Game". Only a name that fails all five needs a LeetCode round-trip. On a
+partial catalog a close approximate match (a couple of edits) is still taken
+as is, while a looser one is only a fallback, and a number the catalog doesn't
+know is looked up on LeetCode by frontend ID.
+"""
+
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .recommender import CATALOG_PATH, load_catalog
+
+logger = logging.getLogger(__name__)
+
+_NUMBER_WORDS = {
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+    "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10",
+    "eleven": "11", "twelve": "12", "first": "1", "second": "2", "third": "3",
+    # Sequel numerals ("Course Schedule II"); a lone "i" is left alone, it's usually a word
+    "ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6", "vii": "7", "viii": "8",
+}
+_FRONTEND_ID = re.compile(r"^(?:leetcode\s+)?(?:problem|question|number|no\.?)?\s*#?\s*(\d{1,5})$")
+_WORD = re.compile(r"\d+|[a-z]+")
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+
+# Edits an approximate match may be from its title and still be taken without asking LeetCode:
+# a phonetic match already sounds the same word for word, a fuzzy one only looks similar
+CONFIDENT_DISTANCE = {"phonetic": 2, "fuzzy": 1}
+
+
+def _words(text: str) -> List[str]:
+    return [_NUMBER_WORDS.get(word, word) for word in _WORD.findall(text.lower())]
+
+
+def _number_suffix(text: str) -> Optional[str]:
+    """Trailing number of a title ("Jump Game II" -> "2"), which marks a sequel."""
+    words = _words(text)
+    return words[-1] if len(words) > 1 and words[-1].isdigit() else None
+
+
+def frontend_id(name: str) -> Optional[str]:
+    """The problem number in "146", "problem 146" or "#146", or None for a name."""
+    match = _FRONTEND_ID.match(" ".join(name.strip().lower().split()))
+    return (match.group(1).lstrip("0") or "0") if match else None
+
+
+def normalize_title(text: str) -> str:
+    """'Three Sum' / '3Sum' / '3-sum' -> '3sum'."""
+    return "".join(_words(text))
+
+
+def soundex(word: str) -> str:
+    if word.isdigit():
+        return word
+    code = word[0].upper()
+    previous = _SOUNDEX_CODES.get(word[0], "")
+    for char in word[1:]:
+        digit = _SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+        # h and w don't separate letters with the same code; vowels do
+        if char not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+
+def phonetic_key(text: str) -> str:
+    return " ".join(soundex(word) for word in _words(text))
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or limit + 1 once it must exceed `limit`.
+
+    Only the band of cells within `limit` of the diagonal can stay under the
+    limit, so each row costs O(limit) rather than O(len(b)).
+    """
+    over = limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return over
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        char_a = a[i - 1]
+        for j in range(low, high + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != b[j - 1]),
+                over,
+            )
+        if min(current[low - 1:high + 1]) > limit:
+            return over
+        previous = current
+    return previous[-1]
+
+
+@dataclass
+class Resolution:
+    slug: str
+    title: str
+    # "id", "slug", "title", "normalized", "phonetic" or "fuzzy"
+    method: str
+    distance: int = 0
+
+    @property
+    def approximate(self) -> bool:
+        return self.method in ("phonetic", "fuzzy")
+
+    @property
+    def confident(self) -> bool:
+        """Exact, or close enough to take even from a partial catalog."""
+        return not self.approximate or self.distance <= CONFIDENT_DISTANCE[self.method]
+
+
+class ProblemResolver:
+    def __init__(self, problems, complete: bool = False):
+        self.complete = complete
+        self._titles: Dict[str, str] = {}
+        self._normalized: Dict[str, str] = {}
+        self._suffix: Dict[str, Optional[str]] = {}
+        self._by_id: Dict[str, str] = {}
+        self._by_title: Dict[str, str] = {}
+        self._by_normalized: Dict[str, str] = {}
+        self._by_phonetic: Dict[str, List[str]] = defaultdict(list)
+        self._by_length: Dict[int, List[str]] = defaultdict(list)
+
+        for problem in problems:
+            slug = problem.slug
+            self._titles[slug] = problem.title
+            if problem.frontend_id:
+                self._by_id[str(problem.frontend_id)] = slug
+            self._by_title[problem.title.lower()] = slug
+            normalized = self._normalized[slug] = normalize_title(problem.title)
+            self._suffix[slug] = _number_suffix(problem.title)
+            self._by_normalized.setdefault(normalized, slug)
+            self._by_phonetic[phonetic_key(problem.title)].append(slug)
+            self._by_length[len(normalized)].append(slug)
+
+    @classmethod
+    def from_catalog(cls, path: Path = CATALOG_PATH) -> "ProblemResolver":
+        catalog = load_catalog(path)
+        return cls(catalog.problems, complete=catalog.complete)
+
+    def _closest(self, normalized: str, suffix: Optional[str], candidates: List[str], limit: int) -> Optional[Resolution]:
+        best = None
+        for slug in candidates:
+            # "Jump Game 2" is one edit from "Jump Game" but a different problem
+            if self._suffix[slug] != suffix:
+                continue
+            distance = edit_distance(normalized, self._normalized[slug], limit)
+            if distance <= limit and (best is None or distance < best.distance):
+                best = Resolution(slug, self._titles[slug], "fuzzy", distance)
+        return best
+
+    def resolve(self, name: str) -> Optional[Resolution]:
+        """Best catalog match for a spoken or typed problem name, or None.
+
+        Phonetic and fuzzy matches are `approximate`. Unless one is also `confident`,
+        on an incomplete catalog the name may be a real problem that just isn't in
+        it, so callers should try LeetCode with the name first.
+        """
+        text = " ".join(name.strip().lower().split())
+        if not text:
+            return None
+
+        number = frontend_id(text)
+        if number is not None:
+            slug = self._by_id.get(number)
+            return Resolution(slug, self._titles[slug], "id") if slug else None
+
+        if text in self._titles:
+            return Resolution(text, self._titles[text], "slug")
+        if text in self._by_title:
+            slug = self._by_title[text]
+            return Resolution(slug, self._titles[slug], "title")
+
+        normalized = normalize_title(text)
+        if not normalized:
+            return None
+        if normalized in self._by_normalized:
+            slug = self._by_normalized[normalized]
+            return Resolution(slug, self._titles[slug], "normalized")
+
+        suffix = _number_suffix(text)
+        # Allow roughly one typo per five characters
+        limit = max(1, len(normalized) // 5)
+        sounds_like = self._by_phonetic.get(phonetic_key(text))
+        if sounds_like:
+            # Soundex is coarse ("Two Sum" and "Two Sum II" differ, but two titles can share a key)
+            closest = self._closest(normalized, suffix, sounds_like, limit=len(normalized))
+            if closest:
+                closest.method = "phonetic"
+                return closest
+
+        candidates = [
+            slug
+            for length in range(len(normalized) - limit, len(normalized) + limit + 1)
+            for slug in self._by_length.get(length, ())
+        ]
+        return self._closest(normalized, suffix, candidates, limit)
+
+    def suggest(self, name: str, limit: int = 3) -> List[str]:
+        """Titles closest to a name that didn't resolve, for a "did you mean" reply."""
+        normalized = normalize_title(name)
+        scored = sorted(
+            (edit_distance(normalized, other, len(normalized)), self._titles[slug])
+            for slug, other in self._normalized.items()
+        )
+        return [title for _, title in scored[:limit]]
+
+
+_resolver: Optional[ProblemResolver] = None
+
+
+def get_problem_resolver() -> Optional[ProblemResolver]:
+    """Resolver over the problem catalog, or None when there is no catalog."""
+    global _resolver
+    if _resolver is None:
+        try:
+            _resolver = ProblemResolver.from_catalog()
+        except FileNotFoundError:
+            return None
+    return _resolver
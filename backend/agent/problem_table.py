@@ -0,0 +1,283 @@
+"""
+In-memory problem table with bitset indexes for tag / difficulty / paid filters.
+
+Rows are `__slots__` records in a fixed order (LeetCode frontend ID for a full
+catalog). Every tag, difficulty and the paid-only flag has a bitset - a Python
+int whose bit i is set when row i matches - so a boolean filter is a handful of
+`&`, `|` and `~` operations on ~3k-bit integers, and pages come out in the same
+row order every time.
+
+Query expressions combine tags with AND / OR / NOT (or & | !) and parentheses;
+adjacent terms are ANDed. `easy`, `medium`, `hard`, `paid` and `free` are
+keywords, tags can be slugs ("hash-table") or names ("hash table"):
+
+    medium graph heap free
+    (tree or graph) and not hard
+    dynamic programming & !array
+"""
+
+import json
+import logging
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .recommender import CATALOG_PATH, TAGS_PATH, load_catalog, normalize_tag
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTIES = ("easy", "medium", "hard")
+EXPRESSION_CACHE_SIZE = 256
+
+_TOKEN = re.compile(r"\s*(\(|\)|&&?|\|\|?|!|[^\s()&|!]+)")
+_OPERATORS = {
+    "and": "&", "&&": "&", "or": "|", "||": "|",
+    "not": "!", "without": "!", "excluding": "!", "aren't": "!", "isn't": "!",
+}
+# Filler an LLM or user tends to leave in a spoken filter
+_FILLER_WORDS = {"problem", "problems", "question", "questions", "with", "using", "that", "also", "use", "uses"}
+
+
+_PAID_WORDS = re.compile(r"\b(?:paid|premium)\b")
+_EXPRESSION_HINT = re.compile(r"[()&|!]|\b(?:and|or|not|without|excluding)\b")
+
+
+def is_expression(text: str) -> bool:
+    """Whether a topic string uses boolean operators rather than naming one topic."""
+    return bool(_EXPRESSION_HINT.search(text.lower()))
+
+
+class QueryError(ValueError):
+    """The filter expression could not be parsed or names an unknown tag."""
+
+
+class ProblemRow:
+    __slots__ = ("slug", "title", "difficulty", "frontend_id", "paid", "tags")
+
+    def __init__(self, slug: str, title: str, difficulty: str, frontend_id: Optional[str], paid: bool, tags: Tuple[str, ...]):
+        self.slug = slug
+        self.title = title
+        self.difficulty = difficulty
+        self.frontend_id = frontend_id
+        self.paid = paid
+        self.tags = tags
+
+    def as_question(self, tag_names: Dict[str, str]) -> Dict:
+        """Same shape as a question from LeetCode's problemsetQuestionList."""
+        return {
+            "questionFrontendId": self.frontend_id,
+            "title": self.title,
+            "titleSlug": self.slug,
+            "difficulty": self.difficulty,
+            "topicTags": [{"name": tag_names.get(tag, tag.replace("-", " ").title()), "slug": tag} for tag in self.tags],
+            "isPaidOnly": self.paid,
+        }
+
+
+def _iter_bits(mask: int) -> Iterator[int]:
+    """Set bit positions, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _load_tag_names() -> Dict[str, str]:
+    try:
+        with open(TAGS_PATH) as f:
+            return {slug: name for name, slug in json.load(f)["mapping"].items()}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+class ProblemTable:
+    def __init__(self, rows: List[ProblemRow], complete: bool = False):
+        self.rows = rows
+        self.complete = complete
+        self.all = (1 << len(rows)) - 1
+        self.tag_names = _load_tag_names()
+
+        self._bitsets: Dict[str, int] = {}
+        self.paid = 0
+        for i, row in enumerate(rows):
+            bit = 1 << i
+            for tag in row.tags:
+                self._bitsets[tag] = self._bitsets.get(tag, 0) | bit
+            key = f"difficulty:{row.difficulty.lower()}"
+            self._bitsets[key] = self._bitsets.get(key, 0) | bit
+            if row.paid:
+                self.paid |= bit
+
+        self._expressions: "OrderedDict[Tuple[str, Optional[Callable]], int]" = OrderedDict()
+        # Question dicts are built the first time a row is returned, then reused (callers only read them)
+        self._questions: List[Optional[Dict]] = [None] * len(rows)
+
+    @classmethod
+    def from_catalog(cls, path: Path = CATALOG_PATH) -> "ProblemTable":
+        catalog = load_catalog(path)
+
+        def _order(problem):
+            fid = problem.frontend_id
+            return (0, int(fid), "") if fid and fid.isdigit() else (1, 0, problem.slug)
+
+        rows = [
+            ProblemRow(p.slug, p.title, p.difficulty, p.frontend_id, p.paid, tuple(normalize_tag(t) for t in p.tags))
+            for p in sorted(catalog.problems, key=_order)
+        ]
+        return cls(rows, complete=catalog.complete)
+
+    def _term(self, words: List[str], resolve: Optional[Callable[[str], Optional[str]]]) -> int:
+        """Bitset for a run of words: keywords and (possibly multi-word) tag names, ANDed."""
+        mask = self.all
+        i = 0
+        while i < len(words):
+            word = words[i]
+            if word in DIFFICULTIES:
+                mask &= self._bitsets.get(f"difficulty:{word}", 0)
+                i += 1
+                continue
+            if word in ("paid", "premium"):
+                mask &= self.paid
+                i += 1
+                continue
+            if word == "free":
+                mask &= self.all & ~self.paid
+                i += 1
+                continue
+            if word in _FILLER_WORDS:
+                i += 1
+                continue
+
+            # Longest run of words that names a tag exactly: "dynamic programming", "hash table"
+            for j in range(len(words), i, -1):
+                tag = normalize_tag(" ".join(words[i:j]))
+                if tag in self._bitsets:
+                    break
+                if j == i + 1 and word.endswith("s") and normalize_tag(word[:-1]) in self._bitsets:
+                    tag = normalize_tag(word[:-1])
+                    break
+            else:
+                tag = resolve(word) if resolve else None
+                if tag not in self._bitsets:
+                    raise QueryError(f"Unknown topic '{word}'")
+                j = i + 1
+            mask &= self._bitsets[tag]
+            i = j
+        return mask
+
+    def compile(self, expression: str, resolve: Optional[Callable[[str], Optional[str]]] = None) -> int:
+        """Bitset of the rows matching a filter expression (cached per expression and resolver)."""
+        text = " ".join(expression.lower().split())
+        # A word only a fuzzy resolver understands must still be an error for callers without one
+        key = (text, resolve)
+        if key in self._expressions:
+            self._expressions.move_to_end(key)
+            return self._expressions[key]
+
+        tokens = [_OPERATORS.get(t, t) for t in _TOKEN.findall(text.replace("-only", ""))]
+        position = 0
+
+        def peek() -> Optional[str]:
+            return tokens[position] if position < len(tokens) else None
+
+        def parse_or() -> int:
+            nonlocal position
+            mask = parse_and()
+            while peek() == "|":
+                position += 1
+                mask |= parse_and()
+            return mask
+
+        def parse_and() -> int:
+            nonlocal position
+            mask = parse_not()
+            while peek() not in (None, "|", ")"):
+                if peek() == "&":
+                    position += 1
+                mask &= parse_not()
+            return mask
+
+        def parse_not() -> int:
+            nonlocal position
+            token = peek()
+            if token == "!":
+                position += 1
+                return self.all & ~parse_not()
+            if token == "(":
+                position += 1
+                mask = parse_or()
+                if peek() != ")":
+                    raise QueryError("Missing ')'")
+                position += 1
+                return mask
+            if token in (None, "&", "|", ")"):
+                raise QueryError(f"Expected a topic, got '{token or 'end of query'}'")
+            words = []
+            while peek() not in (None, "&", "|", "!", "(", ")"):
+                words.append(tokens[position])
+                position += 1
+            return self._term(words, resolve)
+
+        if not tokens:
+            raise QueryError("Empty query")
+        mask = parse_or()
+        if position != len(tokens):
+            raise QueryError(f"Unexpected '{tokens[position]}'")
+
+        self._expressions[key] = mask
+        if len(self._expressions) > EXPRESSION_CACHE_SIZE:
+            self._expressions.popitem(last=False)
+        return mask
+
+    def search(
+        self,
+        expression: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        difficulty: Optional[str] = None,
+        include_paid: Optional[bool] = None,
+        offset: int = 0,
+        limit: int = 10,
+        resolve: Optional[Callable[[str], Optional[str]]] = None,
+    ) -> Tuple[int, List[Dict]]:
+        """(total matches, one page of questions). `tags` must all match, like LeetCode's filter.
+
+        Paid problems are left out unless `include_paid`, or, when it's None, unless
+        the expression asks about them ("heap and paid", "premium or free").
+        """
+        mask = self.compile(expression, resolve) if expression else self.all
+        for tag in tags or ():
+            mask &= self._bitsets.get(normalize_tag(tag), 0)
+        if difficulty:
+            mask &= self._bitsets.get(f"difficulty:{difficulty.lower()}", 0)
+        if include_paid is None:
+            include_paid = bool(expression and _PAID_WORDS.search(expression.lower()))
+        if not include_paid:
+            mask &= ~self.paid
+
+        page = []
+        for n, i in enumerate(_iter_bits(mask)):
+            if n < offset:
+                continue
+            if len(page) >= limit:
+                break
+            question = self._questions[i]
+            if question is None:
+                question = self._questions[i] = self.rows[i].as_question(self.tag_names)
+            page.append(question)
+        return mask.bit_count(), page
+
+
+_problem_table: Optional[ProblemTable] = None
+
+
+def get_problem_table() -> Optional[ProblemTable]:
+    """Table built from the problem catalog, or None when there is no catalog."""
+    global _problem_table
+    if _problem_table is None:
+        try:
+            _problem_table = ProblemTable.from_catalog()
+            logger.info(f"Loaded problem table with {len(_problem_table.rows)} problems (complete={_problem_table.complete})")
+        except FileNotFoundError:
+            return None
+    return _problem_table
@@ -1,8 +1,14 @@
+import os
+import re
+import time
+import shutil
+import asyncio
+import logging
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from llama_index.core import (
-    SimpleDirectoryReader,
     StorageContext,
     VectorStoreIndex,
     load_index_from_storage,
@@ -10,59 +16,269 @@ from llama_index.core import (
 )
 from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.llms.openai import OpenAI
+from llama_index.core.schema import TextNode
+
+from .rag_ingest import (
+    COMPANY_HEADER,
+    QuestionRecord,
+    chunk_by_company,
+    parse_pdf_pages,
+    parse_question_records,
+)
+from .tracing import span as trace_span
 
 THIS_DIR = Path(__file__).parent
 DATA_DIR = THIS_DIR.parent / "data"
 PERSIST_DIR = THIS_DIR / "rag_storage"
+# Each build lands in its own versions/<name> directory; CURRENT names the live one
+VERSIONS_DIR = PERSIST_DIR / "versions"
+CURRENT_POINTER = PERSIST_DIR / "CURRENT"
+LEGACY_VERSION = "legacy"
+KEEP_INDEX_VERSIONS = int(os.getenv("RAG_KEEP_INDEX_VERSIONS", "3"))
+INDEX_CHECK_INTERVAL = float(os.getenv("RAG_INDEX_CHECK_INTERVAL", "30"))
+
+# Approximate token budget for the retrieved context handed to the voice LLM
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "600"))
+# Set RAG_COMPACT=0 to return raw chunks (for before/after comparisons)
+RAG_COMPACT = os.getenv("RAG_COMPACT", "1") != "0"
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_company(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def compact_company_context(
+    chunks: List[Tuple[str, Optional[str]]],
+    company: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    token_budget: int = RAG_CONTEXT_TOKEN_BUDGET,
+) -> str:
+    """Dedupe rows across overlapping chunks, keep the requested company/difficulty, fit the budget.
+
+    `chunks` pairs each chunk's text with the company section it starts in (if known).
+    Returns an empty string when no question rows could be parsed.
+    """
+    records: Dict[Tuple[Optional[str], str], QuestionRecord] = {}
+    for text, start_company in chunks:
+        for record in parse_question_records(text, start_company):
+            records.setdefault((record.company, record.slug), record)
+
+    rows = list(records.values())
+    if company:
+        wanted = _normalize_company(company)
+        matching = [
+            r for r in rows
+            if r.company and (wanted in _normalize_company(r.company) or _normalize_company(r.company) in wanted)
+        ]
+        # Rows whose section is unknown are only a fallback when nothing matched outright
+        rows = matching or [r for r in rows if r.company is None]
+    if difficulty:
+        same_difficulty = [r for r in rows if r.difficulty.lower() == difficulty.lower()]
+        rows = same_difficulty or rows
+
+    rows.sort(key=lambda r: -r.asked)
+    lines = []
+    used = 0
+    for row in rows:
+        line = row.line()
+        cost = estimate_tokens(line)
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+
+    if not lines:
+        return ""
+    return "Company | Difficulty | Problem (slug) | Topics | Frequency\n" + "\n".join(lines)
+
+
+@dataclass
+class _IndexVersion:
+    name: str
+    index: VectorStoreIndex
+    section_starts: Dict[str, Optional[str]]
+
+
+def _section_starts(index: VectorStoreIndex) -> Dict[str, Optional[str]]:
+    """Which company section each stored chunk starts in, by reading chunks in page order."""
+    nodes = list(index.docstore.docs.values())
+
+    def _order(node):
+        page = str(node.metadata.get("page_label", "0"))
+        return (int(page) if page.isdigit() else 0, node.start_char_idx or 0)
+
+    starts: Dict[str, Optional[str]] = {}
+    current = None
+    for node in sorted(nodes, key=_order):
+        starts[node.node_id] = node.metadata.get("company") or current
+        headers = COMPANY_HEADER.findall(re.sub(r"\s+", " ", node.get_content()))
+        if headers:
+            current = headers[-1].strip()
+    return starts
+
+
+def read_current_version() -> Optional[str]:
+    """Name of the published index version, or the legacy flat layout, or None."""
+    try:
+        name = CURRENT_POINTER.read_text().strip()
+        if name and (VERSIONS_DIR / name).is_dir():
+            return name
+    except OSError:
+        pass
+    if (PERSIST_DIR / "docstore.json").exists():
+        return LEGACY_VERSION
+    return None
+
+
+def _version_dir(name: str) -> Path:
+    return PERSIST_DIR if name == LEGACY_VERSION else VERSIONS_DIR / name
+
+
+def _publish_version(name: str) -> None:
+    """Point CURRENT at a finished version; os.replace makes the switch atomic for readers."""
+    tmp_pointer = CURRENT_POINTER.with_name(f".CURRENT.{os.getpid()}")
+    tmp_pointer.write_text(name + "\n")
+    os.replace(tmp_pointer, CURRENT_POINTER)
+
+
+def _prune_versions(keep: str) -> None:
+    """Remove old versions, keeping the newest few so workers still loading one aren't broken."""
+    if not VERSIONS_DIR.exists():
+        return
+    versions = sorted(
+        (path for path in VERSIONS_DIR.iterdir() if path.is_dir() and not path.name.startswith(".")),
+        key=lambda path: path.name,
+    )
+    for path in versions[:-KEEP_INDEX_VERSIONS]:
+        if path.name != keep:
+            shutil.rmtree(path, ignore_errors=True)
 
 
 class LeetCodeRAG:
     def __init__(self):
-        self.index: Optional[VectorStoreIndex] = None
+        self._active: Optional[_IndexVersion] = None
+        self._swap_task: Optional[asyncio.Task] = None
+        self._watch_task: Optional[asyncio.Task] = None
         self._initialize_settings()
         self._load_or_create_index()
     
+    @property
+    def index(self) -> Optional[VectorStoreIndex]:
+        return self._active.index if self._active else None
+    
+    @property
+    def version(self) -> Optional[str]:
+        return self._active.name if self._active else None
+    
     def _initialize_settings(self):
         Settings.embed_model = OpenAIEmbedding(model="text-embedding-3-small")
         Settings.llm = OpenAI(model="gpt-4o-mini", temperature=0.1)
-        Settings.chunk_size = 2048
-        Settings.chunk_overlap = 200
+    
+    def _load_version(self, name: str) -> _IndexVersion:
+        storage_context = StorageContext.from_defaults(persist_dir=str(_version_dir(name)))
+        index = load_index_from_storage(storage_context)
+        return _IndexVersion(name, index, _section_starts(index))
     
     def _load_or_create_index(self):
-        try:
-            if PERSIST_DIR.exists():
-                storage_context = StorageContext.from_defaults(persist_dir=str(PERSIST_DIR))
-                self.index = load_index_from_storage(storage_context)
-            else:
-                self._create_index()
-        except Exception:
-            self._create_index()
+        name = read_current_version()
+        if name is not None:
+            try:
+                self._active = self._load_version(name)
+                logger.info(f"Loaded RAG index version {name}")
+                return
+            except Exception as e:
+                logger.warning(f"Could not load RAG index version {name}, building a new one: {e}")
+        self._create_index()
     
-    def _create_index(self):
+    def _build_nodes(self) -> List[TextNode]:
         if not DATA_DIR.exists():
             raise FileNotFoundError(f"Data directory not found: {DATA_DIR}")
         
-        documents = SimpleDirectoryReader(
-            input_dir=str(DATA_DIR),
-            required_exts=[".pdf"]
-        ).load_data()
-        
-        if not documents:
+        pdf_files = sorted(path for path in DATA_DIR.iterdir() if path.suffix.lower() == ".pdf")
+        if not pdf_files:
             raise ValueError(f"No PDF documents found in {DATA_DIR}")
         
-        self.index = VectorStoreIndex.from_documents(documents, show_progress=False)
+        # One node per company section (see rag_ingest), so no token-window splitting here
+        nodes = []
+        for pdf_file in pdf_files:
+            for chunk in chunk_by_company(parse_pdf_pages(pdf_file)):
+                nodes.append(TextNode(
+                    text=chunk.text,
+                    metadata={"file_name": pdf_file.name, **chunk.metadata},
+                    excluded_embed_metadata_keys=["file_name", "pages", "company_number"],
+                    excluded_llm_metadata_keys=["file_name", "pages", "company_number"],
+                ))
+        logger.info(f"Embedding {len(nodes)} company sections from {len(pdf_files)} PDF(s)")
+        return nodes
+    
+    def _create_index(self):
+        """Build a new index version, publish it and make it this process's active index."""
+        index = VectorStoreIndex(self._build_nodes(), show_progress=False)
+        
+        name = time.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
+        staging_dir = VERSIONS_DIR / f".building-{name}"
+        VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
+        index.storage_context.persist(persist_dir=str(staging_dir))
+        os.replace(staging_dir, VERSIONS_DIR / name)
+        _publish_version(name)
         
-        PERSIST_DIR.mkdir(parents=True, exist_ok=True)
-        self.index.storage_context.persist(persist_dir=str(PERSIST_DIR))
+        self._active = _IndexVersion(name, index, _section_starts(index))
+        logger.info(f"Published RAG index version {name}")
+        _prune_versions(keep=name)
+    
+    def _check_for_new_version(self):
+        """Cheap pointer read; loading a new version happens in the background."""
+        if self._swap_task is not None and not self._swap_task.done():
+            return
+        name = read_current_version()
+        if name is None or name == self.version:
+            return
+        self._swap_task = asyncio.create_task(self._swap_to(name))
     
-    async def query_company_questions(self, query: str, top_k: int = 5) -> str:
-        if not self.index:
+    async def _swap_to(self, name: str):
+        try:
+            loaded = await asyncio.to_thread(self._load_version, name)
+        except Exception as e:
+            logger.warning(f"Could not load RAG index version {name}, keeping {self.version}: {e}")
+            return
+        previous = self.version
+        # Queries already running keep their reference to the old index until they finish
+        self._active = loaded
+        logger.info(f"Swapped RAG index {previous} -> {name}")
+    
+    async def watch(self, interval: float = INDEX_CHECK_INTERVAL):
+        """Poll for new index versions so idle workers are current before their next query."""
+        while True:
+            await asyncio.sleep(interval)
+            self._check_for_new_version()
+    
+    def _ensure_watching(self):
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self.watch())
+    
+    async def query_company_questions(
+        self,
+        query: str,
+        top_k: int = 5,
+        company: Optional[str] = None,
+        difficulty: Optional[str] = None,
+    ) -> str:
+        self._ensure_watching()
+        active = self._active
+        if not active:
             return "RAG system not initialized."
         
         try:
             enhanced_query = f"COMPANY: {query} interview questions LeetCode problems difficulty topics"
-            retriever = self.index.as_retriever(similarity_top_k=top_k)
-            nodes = await retriever.aretrieve(enhanced_query)
+            retriever = active.index.as_retriever(similarity_top_k=top_k)
+            with trace_span("rag.retrieve", top_k=top_k, index_version=active.name):
+                nodes = await retriever.aretrieve(enhanced_query)
             
             if not nodes:
                 return "I couldn't find relevant information about that company."
@@ -72,16 +288,29 @@ class LeetCodeRAG:
                 content = node.get_content().strip()
                 if content:
                     context_parts.append(f"[Context {i}]\n{content}")
+            raw_context = "\n\n".join(context_parts)
+            
+            if not RAG_COMPACT:
+                return raw_context
             
-            return "\n\n".join(context_parts)
+            with trace_span("rag.compact") as span:
+                compacted = compact_company_context(
+                    [(node.get_content(), active.section_starts.get(node.node.node_id)) for node in nodes],
+                    company=company,
+                    difficulty=difficulty,
+                )
+                span.set(raw_tokens=estimate_tokens(raw_context), compacted_tokens=estimate_tokens(compacted))
+            logger.info(
+                f"RAG context compacted from ~{estimate_tokens(raw_context)} to "
+                f"~{estimate_tokens(compacted)} tokens ({len(nodes)} chunks)"
+            )
+            return compacted or raw_context
             
         except Exception as e:
             return f"Error retrieving information: {str(e)}"
     
     def rebuild_index(self):
-        if PERSIST_DIR.exists():
-            import shutil
-            shutil.rmtree(PERSIST_DIR)
+        """Build and publish a new version; running workers pick it up without restarting."""
         self._create_index()
 
 
@@ -95,7 +324,7 @@ def get_rag_instance() -> LeetCodeRAG:
     return _rag_instance
 
 
-async def query_leetcode_rag(query: str) -> str:
+async def query_leetcode_rag(query: str, company: Optional[str] = None, difficulty: Optional[str] = None) -> str:
     rag = get_rag_instance()
-    return await rag.query_company_questions(query)
+    return await rag.query_company_questions(query, company=company, difficulty=difficulty)
 
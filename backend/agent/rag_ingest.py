@@ -0,0 +1,204 @@
+"""
+Ingestion stage of the RAG index build: PDF pages -> one chunk per company section.
+
+Page text is extracted in parallel across a process pool (PDF text extraction
+is CPU-bound), then the ordered pages are stitched back together and cut on
+`COMPANY #n:` headers instead of fixed token windows, so every chunk holds
+exactly one company's questions. Very large sections are further split on
+their EASY/MEDIUM/HARD tables, repeating the company header in each part.
+"""
+
+import logging
+import os
+import re
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INGEST_WORKERS = int(os.getenv("RAG_INGEST_WORKERS", str(os.cpu_count() or 1)))
+# Sections longer than this are split on their difficulty tables (~2k tokens)
+MAX_SECTION_CHARS = int(os.getenv("RAG_MAX_SECTION_CHARS", "8000"))
+
+_COMPANY_START = re.compile(r"COMPANY\s+#(\d+):\s+([^\n=]+?)\s*(?:\n|=)")
+_TABLE_START = re.compile(r"(?:EASY|MEDIUM|HARD)\s+QUESTIONS")
+# Cross-company statistics appended after the last company section
+_STATISTICS_START = re.compile(r"📈\s*OVERALL\s+STATISTICS")
+STATISTICS_COMPANY = "ALL COMPANIES"
+
+# Patterns over whitespace-normalized text
+COMPANY_HEADER = re.compile(r"COMPANY #\d+: ([A-Z0-9&.'\- ]+?) (?:=|📊|$)")
+_QUESTION_RECORD = re.compile(
+    r"#\d+ - (?P<title>.+?) Difficulty: (?P<difficulty>Easy|Medium|Hard)"
+    r"(?: Frequency: [^(]*\(Asked (?P<asked>\d+)/(?P<out_of>\d+)\))?"
+    r"(?: Topics: (?P<topics>.+?))?"
+    r" 🔗 Link: https?://leetcode\.com/problems/(?P<slug>[a-z0-9-]+)/?"
+)
+
+
+@dataclass
+class QuestionRecord:
+    company: Optional[str]
+    title: str
+    slug: str
+    difficulty: str
+    topics: str
+    asked: int
+
+    def line(self) -> str:
+        asked = f" | asked {self.asked}/5" if self.asked else ""
+        return f"{(self.company or 'Unknown').title()} | {self.difficulty} | {self.title} ({self.slug}) | {self.topics}{asked}"
+
+
+@dataclass
+class SectionChunk:
+    company: str
+    company_number: int
+    text: str
+    pages: List[int] = field(default_factory=list)
+    part: Optional[str] = None
+
+    @property
+    def metadata(self) -> dict:
+        metadata = {
+            "company": self.company,
+            "company_number": self.company_number,
+            "page_label": str(self.pages[0]) if self.pages else "0",
+            "pages": ",".join(str(page) for page in self.pages),
+        }
+        if self.part:
+            metadata["section"] = self.part
+        return metadata
+
+
+def _extract_page_range(args: Tuple[str, int, int]) -> List[Tuple[int, str]]:
+    """Process-pool worker: extract the text of pages [start, end) of one PDF."""
+    path, start, end = args
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return [(number + 1, reader.pages[number].extract_text() or "") for number in range(start, end)]
+
+
+def parse_pdf_pages(path: Path, workers: int = INGEST_WORKERS) -> List[Tuple[int, str]]:
+    """Extract (page number, text) for every page, in page order, using up to `workers` processes."""
+    from pypdf import PdfReader
+
+    page_count = len(PdfReader(str(path)).pages)
+    workers = max(1, min(workers, page_count))
+    # A few batches per worker keeps the pool busy without re-opening the PDF for every page
+    batch = max(1, -(-page_count // (workers * 4)))
+    ranges = [(str(path), start, min(start + batch, page_count)) for start in range(0, page_count, batch)]
+
+    started = time.perf_counter()
+    if workers == 1:
+        results = [_extract_page_range(r) for r in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_extract_page_range, ranges))
+    pages = [page for result in results for page in result]
+
+    logger.info(
+        f"Parsed {page_count} pages of {path.name} with {workers} workers "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return pages
+
+
+def _split_tables(chunk: SectionChunk) -> List[SectionChunk]:
+    """Split an oversized section on its difficulty tables, keeping the header with each part."""
+    starts = [m.start() for m in _TABLE_START.finditer(chunk.text)]
+    if len(chunk.text) <= MAX_SECTION_CHARS or len(starts) < 2:
+        return [chunk]
+
+    header = chunk.text[:starts[0]].rstrip()
+    bounds = starts + [len(chunk.text)]
+    parts = []
+    for start, end in zip(bounds, bounds[1:]):
+        table = chunk.text[start:end].strip()
+        parts.append(SectionChunk(
+            company=chunk.company,
+            company_number=chunk.company_number,
+            text=f"{header}\n\n{table}",
+            pages=chunk.pages,
+            part=table.split(None, 1)[0].title(),
+        ))
+    return parts
+
+
+def chunk_by_company(pages: List[Tuple[int, str]]) -> List[SectionChunk]:
+    """Cut ordered page texts into one chunk per company section.
+
+    The table of contents before the first header is dropped; the cross-company
+    statistics at the end become a chunk of their own.
+    """
+    # Remember where each page starts so chunks can report the pages they span
+    text_parts, page_offsets, offset = [], [], 0
+    for number, text in pages:
+        page_offsets.append((offset, number))
+        text_parts.append(text)
+        offset += len(text) + 1
+    full_text = "\n".join(text_parts)
+
+    starts = [page_start for page_start, _ in page_offsets]
+
+    def _pages_between(start: int, end: int) -> List[int]:
+        first = max(0, bisect_right(starts, start) - 1)
+        last = bisect_left(starts, end)
+        return [number for _, number in page_offsets[first:last]]
+
+    statistics = _STATISTICS_START.search(full_text)
+    sections_end = len(full_text)
+    if statistics:
+        # Include the ==== banner above the statistics heading
+        sections_end = len(full_text[:statistics.start()].rstrip("= \n"))
+
+    headers = list(_COMPANY_START.finditer(full_text, 0, sections_end))
+    chunks: List[SectionChunk] = []
+    for index, match in enumerate(headers):
+        end = headers[index + 1].start() if index + 1 < len(headers) else sections_end
+        text = full_text[match.start():end].strip()
+        chunks.extend(_split_tables(SectionChunk(
+            company=re.sub(r"\s+", " ", match.group(2)).strip(),
+            company_number=int(match.group(1)),
+            text=text,
+            pages=_pages_between(match.start(), end),
+        )))
+
+    if statistics:
+        chunks.append(SectionChunk(
+            company=STATISTICS_COMPANY,
+            company_number=0,
+            text=full_text[sections_end:].strip(),
+            pages=_pages_between(sections_end, len(full_text)),
+        ))
+
+    if not headers:
+        logger.warning("No company headers found; the PDF layout may have changed")
+    return chunks
+
+
+def parse_question_records(text: str, company: Optional[str] = None) -> List[QuestionRecord]:
+    """Extract question rows from a chunk, tracking which company section each row is in."""
+    text = re.sub(r"\s+", " ", text)
+    headers = [(m.start(), m.group(1).strip()) for m in COMPANY_HEADER.finditer(text)]
+    records = []
+    for match in _QUESTION_RECORD.finditer(text):
+        current = company
+        for position, name in headers:
+            if position > match.start():
+                break
+            current = name
+        records.append(QuestionRecord(
+            company=current,
+            title=match.group("title").strip(),
+            slug=match.group("slug"),
+            difficulty=match.group("difficulty"),
+            topics=(match.group("topics") or "").strip(),
+            asked=int(match.group("asked") or 0),
+        ))
+    return records
@@ -0,0 +1,268 @@
+"""
+Offline "what should I do next?" recommendations from problem topic tags.
+
+Every catalog problem is a sparse tf-idf vector over its LeetCode topic tags
+plus a difficulty feature, L2-normalized so a dot product is cosine similarity.
+The top neighbours of every problem are precomputed through an inverted tag
+index when the catalog is built and persisted next to the problem data, so
+`recommend_next()` during a session is a dictionary lookup and a short scan -
+no network call, no embedding call.
+
+Build or refresh the catalog with build_problem_catalog.py.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = Path(os.getenv("PROBLEM_CATALOG_PATH", str(Path(__file__).parent / "problem_catalog.json")))
+TAGS_PATH = Path(__file__).parent / "leetcode_tags.json"
+# Neighbours stored per problem; enough to survive a long session of solved problems
+NEIGHBORS_PER_PROBLEM = int(os.getenv("RECOMMENDER_NEIGHBORS", "30"))
+# Weight of the shared-difficulty feature relative to a typical topic tag
+DIFFICULTY_WEIGHT = float(os.getenv("RECOMMENDER_DIFFICULTY_WEIGHT", "0.5"))
+CATALOG_FORMAT = 2
+# Catalog sources that hold the whole LeetCode problem set (rather than a subset)
+COMPLETE_SOURCES = ("leetcode",)
+
+SparseVector = Dict[str, float]
+
+
+@dataclass
+class CatalogProblem:
+    slug: str
+    title: str
+    difficulty: str
+    tags: List[str] = field(default_factory=list)
+    # How often the problem shows up in interviews (or any "commonness" signal); breaks ties
+    popularity: int = 0
+    frontend_id: Optional[str] = None
+    paid: bool = False
+
+
+def _load_tag_names() -> Dict[str, str]:
+    try:
+        with open(TAGS_PATH) as f:
+            return {name.lower(): slug for name, slug in json.load(f)["mapping"].items()}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+_TAG_NAMES = _load_tag_names()
+# Abbreviations the company PDF uses in its topic column
+_TAG_ABBREVIATIONS = {
+    "dfs": "depth-first-search",
+    "bfs": "breadth-first-search",
+    "heap": "heap-priority-queue",
+}
+
+
+def normalize_tag(tag: str) -> str:
+    """Map a topic name ("Hash Table") or slug ("hash-table") to the LeetCode slug."""
+    cleaned = tag.strip().lower()
+    if cleaned in _TAG_ABBREVIATIONS:
+        return _TAG_ABBREVIATIONS[cleaned]
+    if cleaned in _TAG_NAMES:
+        return _TAG_NAMES[cleaned]
+    return "-".join(cleaned.replace("&", " ").split())
+
+
+def _unit(weights: SparseVector) -> SparseVector:
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {key: w / norm for key, w in weights.items()} if norm else {}
+
+
+@dataclass
+class Catalog:
+    problems: List[CatalogProblem]
+    neighbors: List[List[Tuple[int, float]]]
+    source: str
+    # Size of the problem set the source reported while the catalog was built, if it did
+    total: Optional[int] = None
+
+    @property
+    def complete(self) -> bool:
+        """Whether this is the whole problem set, so a miss really means "no such problem"."""
+        return self.source in COMPLETE_SOURCES and self.total is not None and len(self.problems) >= self.total
+
+
+def load_catalog(path: Path = CATALOG_PATH) -> Catalog:
+    """Read a catalog written by ProblemRecommender.save()."""
+    with open(path) as f:
+        catalog = json.load(f)
+    if catalog.get("format") != CATALOG_FORMAT:
+        raise ValueError(f"Unsupported problem catalog format: {catalog.get('format')}; rebuild it")
+    tags = catalog["tags"]
+    problems = [
+        CatalogProblem(slug, title, difficulty, [tags[i] for i in tag_ids], popularity, frontend_id, paid)
+        for slug, title, difficulty, tag_ids, popularity, frontend_id, paid in catalog["problems"]
+    ]
+    neighbors = [[(i, score) for i, score in row] for row in catalog["neighbors"]]
+    return Catalog(problems, neighbors, catalog.get("source", ""), catalog.get("total"))
+
+
+class ProblemRecommender:
+    """Tag-similarity index over a problem catalog with precomputed nearest neighbours."""
+
+    def __init__(
+        self,
+        problems: Sequence[CatalogProblem],
+        neighbors: Optional[List[List[Tuple[int, float]]]] = None,
+    ):
+        self.problems = list(problems)
+        self._by_slug = {p.slug: i for i, p in enumerate(self.problems)}
+
+        tag_counts = Counter(tag for p in self.problems for tag in {normalize_tag(t) for t in p.tags})
+        total = max(len(self.problems), 1)
+        # Rare tags ("Eulerian Circuit") say more about a problem than "Array" does
+        self._idf = {tag: math.log(1 + total / count) for tag, count in tag_counts.items()}
+        self._vectors = [self.vectorize(p.tags, p.difficulty) for p in self.problems]
+
+        self._postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for i, vector in enumerate(self._vectors):
+            for key, weight in vector.items():
+                self._postings[key].append((i, weight))
+
+        if neighbors is None or len(neighbors) != len(self.problems):
+            started = time.perf_counter()
+            neighbors = [self._nearest(vector, exclude={i}) for i, vector in enumerate(self._vectors)]
+            logger.info(
+                f"Precomputed neighbours for {len(self.problems)} problems in "
+                f"{(time.perf_counter() - started) * 1000:.0f}ms"
+            )
+        self._neighbors = neighbors
+
+    def vectorize(self, tags: Iterable[str], difficulty: Optional[str] = None) -> SparseVector:
+        """Unit-length sparse vector for a tag set; unseen tags get the rarest-tag weight."""
+        unseen = math.log(1 + max(len(self.problems), 1))
+        weights = {f"tag:{tag}": self._idf.get(tag, unseen) for tag in {normalize_tag(t) for t in tags}}
+        if difficulty and weights:
+            weights[f"difficulty:{difficulty.lower()}"] = DIFFICULTY_WEIGHT * max(weights.values())
+        return _unit(weights)
+
+    def _nearest(
+        self,
+        vector: SparseVector,
+        exclude: Iterable[int] = (),
+        limit: Optional[int] = NEIGHBORS_PER_PROBLEM,
+    ) -> List[Tuple[int, float]]:
+        """Cosine neighbours through the inverted index; only problems sharing a topic qualify."""
+        scores: Dict[int, float] = defaultdict(float)
+        for key, weight in vector.items():
+            if key.startswith("tag:"):
+                for i, other in self._postings.get(key, ()):
+                    scores[i] += weight * other
+        for key, weight in vector.items():
+            if key.startswith("difficulty:"):
+                for i, other in self._postings.get(key, ()):
+                    if i in scores:
+                        scores[i] += weight * other
+        for i in exclude:
+            scores.pop(i, None)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -self.problems[item[0]].popularity))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(i, round(score, 4)) for i, score in ranked]
+
+    def get(self, slug: str) -> Optional[CatalogProblem]:
+        i = self._by_slug.get(slug)
+        return self.problems[i] if i is not None else None
+
+    def recommend_next(
+        self,
+        current_slug: Optional[str] = None,
+        solved_slugs: Iterable[str] = (),
+        difficulty: Optional[str] = None,
+        limit: int = 1,
+        tags: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[CatalogProblem, float]]:
+        """Related problems the user hasn't seen, best first, as (problem, similarity) pairs.
+
+        `tags` describes the current problem when it isn't in the catalog. With no
+        current problem at all, the most popular unseen problems are returned.
+        """
+        seen = set(solved_slugs)
+        if current_slug:
+            seen.add(current_slug)
+
+        def wanted(problem: CatalogProblem) -> bool:
+            if problem.slug in seen or problem.paid:
+                return False
+            return not difficulty or problem.difficulty.lower() == difficulty.lower()
+
+        picks: List[Tuple[CatalogProblem, float]] = []
+        current = self._by_slug.get(current_slug) if current_slug else None
+        if current is not None:
+            picks = [(self.problems[i], score) for i, score in self._neighbors[current] if wanted(self.problems[i])]
+            vector = self._vectors[current]
+        else:
+            vector = self.vectorize(tags or (), difficulty) if tags else {}
+
+        if len(picks) < limit and vector:
+            # The stored neighbours are used up (long session or a difficulty filter): score everything
+            picks = [(self.problems[i], score) for i, score in self._nearest(vector, limit=None) if wanted(self.problems[i])]
+
+        if len(picks) < limit:
+            chosen = {p.slug for p, _ in picks}
+            popular = sorted(
+                (p for p in self.problems if wanted(p) and p.slug not in chosen),
+                key=lambda p: -p.popularity,
+            )
+            picks.extend((p, 0.0) for p in popular[:limit - len(picks)])
+
+        return picks[:limit]
+
+    def save(self, path: Path = CATALOG_PATH, source: str = "", total: Optional[int] = None) -> None:
+        """Write problems and neighbour lists; tag strings are stored once and referenced by index.
+
+        `total` is the size of the problem set the source reported; a catalog only counts as
+        complete when it holds that many problems.
+        """
+        tags = sorted({tag for p in self.problems for tag in p.tags})
+        tag_index = {tag: i for i, tag in enumerate(tags)}
+        catalog = {
+            "format": CATALOG_FORMAT,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "source": source,
+            "total": total,
+            "tags": tags,
+            "problems": [
+                [p.slug, p.title, p.difficulty, [tag_index[t] for t in p.tags], p.popularity, p.frontend_id, p.paid]
+                for p in self.problems
+            ],
+            "neighbors": [[[i, score] for i, score in row] for row in self._neighbors],
+        }
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}")
+        with open(tmp_path, "w") as f:
+            json.dump(catalog, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path = CATALOG_PATH) -> "ProblemRecommender":
+        catalog = load_catalog(path)
+        return cls(catalog.problems, catalog.neighbors)
+
+
+_recommender: Optional[ProblemRecommender] = None
+
+
+def get_recommender() -> Optional[ProblemRecommender]:
+    """Catalog-backed recommender, or None when no catalog has been built yet."""
+    global _recommender
+    if _recommender is None:
+        try:
+            _recommender = ProblemRecommender.load()
+            logger.info(f"Loaded problem catalog with {len(_recommender.problems)} problems")
+        except FileNotFoundError:
+            logger.warning(f"No problem catalog at {CATALOG_PATH}; run build_problem_catalog.py")
+            return None
+    return _recommender
@@ -0,0 +1,217 @@
+"""
+Semantic search over problem statements with a local vector index.
+
+build_semantic_index.py embeds each problem's formatted description (title,
+difficulty, topics and statement, as shown in the editor) once, offline, and
+writes the unit-length float32 vectors as one raw row-major matrix next to a
+small JSON file describing the rows. At query time the matrix is memory-mapped
+(nothing is parsed, pages load on demand and are shared between worker
+processes), optionally narrowed to rows of a difficulty/tags, and scored with a
+single matrix-vector product plus argpartition for the top k.
+
+The embedder is pluggable and recorded in the index, so queries are always
+embedded the same way the rows were:
+- "openai": text-embedding-3-small (what the company-questions RAG uses)
+- "hashing": deterministic feature hashing of words and word pairs; no network,
+  no model, identical output on every machine - for tests and offline builds
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .recommender import normalize_tag
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = Path(os.getenv("SEMANTIC_INDEX_DIR", str(Path(__file__).parent / "semantic_index")))
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.json"
+HASHING_DIMENSIONS = 1024
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+OPENAI_BATCH_SIZE = 128
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """Feature-hashed bag of words and word bigrams; deterministic and offline."""
+
+    name = "hashing"
+
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+                # A hash-derived sign keeps colliding features from always adding up
+                vectors[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+        # Sublinear term frequency, so a word repeated ten times doesn't dominate
+        np.copysign(np.log1p(np.abs(vectors)), vectors, out=vectors)
+        return _normalize_rows(vectors)
+
+
+class OpenAIEmbedder:
+    name = "openai"
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL):
+        import openai
+
+        self.model = model
+        self._client = openai.OpenAI()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        rows = []
+        for start in range(0, len(texts), OPENAI_BATCH_SIZE):
+            response = self._client.embeddings.create(model=self.model, input=list(texts[start:start + OPENAI_BATCH_SIZE]))
+            rows.extend(item.embedding for item in response.data)
+        return _normalize_rows(np.asarray(rows, dtype=np.float32))
+
+
+EMBEDDERS = {
+    HashingEmbedder.name: HashingEmbedder,
+    OpenAIEmbedder.name: OpenAIEmbedder,
+}
+
+
+def get_embedder(name: str):
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder '{name}' (choose from {', '.join(EMBEDDERS)})")
+    return EMBEDDERS[name]()
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def problem_text(problem: Dict) -> str:
+    """What gets embedded for a problem formatted by format_problem_for_display."""
+    topics = ", ".join(problem.get("topics") or [])
+    return f"{problem['title']}\nDifficulty: {problem['difficulty']}\nTopics: {topics}\n\n{problem.get('description', '')}"
+
+
+def write_index(problems: List[Dict], embedder, index_dir: Path = INDEX_DIR) -> int:
+    """Embed formatted problems and replace the index at `index_dir`; returns the row count."""
+    vectors = embedder.embed([problem_text(p) for p in problems]).astype(np.float32, copy=False)
+    meta = {
+        "embedder": embedder.name,
+        "dimensions": int(vectors.shape[1]),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "problems": [
+            [p["id"], p["title"], p["difficulty"], [normalize_tag(t) for t in p.get("topics") or []]]
+            for p in problems
+        ],
+    }
+
+    # Write beside the live index, then swap directories so readers never see a half-written matrix
+    staging_dir = index_dir.with_name(f".{index_dir.name}.building-{os.getpid()}")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    staging_dir.mkdir(parents=True)
+    vectors.tofile(staging_dir / VECTORS_FILE)
+    with open(staging_dir / META_FILE, "w") as f:
+        json.dump(meta, f, separators=(",", ":"))
+
+    previous_dir = index_dir.with_name(f".{index_dir.name}.previous-{os.getpid()}")
+    if index_dir.exists():
+        os.replace(index_dir, previous_dir)
+    os.replace(staging_dir, index_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    return len(problems)
+
+
+class SemanticIndex:
+    def __init__(self, index_dir: Path = INDEX_DIR, embedder=None):
+        with open(index_dir / META_FILE) as f:
+            meta = json.load(f)
+        self.problems: List[Tuple[str, str, str, List[str]]] = [tuple(row) for row in meta["problems"]]
+        self.embedder_name = meta["embedder"]
+        self.embedder = embedder or get_embedder(self.embedder_name)
+        shape = (len(self.problems), meta["dimensions"])
+        if shape[0]:
+            self.matrix = np.memmap(index_dir / VECTORS_FILE, dtype=np.float32, mode="r", shape=shape)
+        else:
+            # mmap can't map an empty file
+            self.matrix = np.zeros(shape, dtype=np.float32)
+
+        self._difficulty = np.array([difficulty.lower() for _, _, difficulty, _ in self.problems])
+        self._tag_rows: Dict[str, np.ndarray] = {}
+
+    def _rows_with_tag(self, tag: str) -> np.ndarray:
+        if tag not in self._tag_rows:
+            self._tag_rows[tag] = np.array([tag in tags for _, _, _, tags in self.problems], dtype=bool)
+        return self._tag_rows[tag]
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        difficulty: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+    ) -> List[Dict]:
+        """Top-k problems by cosine similarity, optionally only among a difficulty and/or tags (all must match)."""
+        if not len(self.problems):
+            return []
+
+        mask = None
+        if difficulty:
+            mask = self._difficulty == difficulty.lower()
+        for tag in tags or ():
+            rows = self._rows_with_tag(normalize_tag(tag))
+            mask = rows if mask is None else mask & rows
+        candidates = np.flatnonzero(mask) if mask is not None else None
+        if candidates is not None and not len(candidates):
+            return []
+
+        query_vector = self.embedder.embed([query])[0]
+        matrix = self.matrix if candidates is None else self.matrix[candidates]
+        scores = matrix @ query_vector
+
+        k = min(max(k, 1), len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for position in top:
+            row = int(position if candidates is None else candidates[position])
+            slug, title, problem_difficulty, problem_tags = self.problems[row]
+            results.append({
+                "id": slug,
+                "title": title,
+                "difficulty": problem_difficulty,
+                "topics": problem_tags,
+                "score": round(float(scores[position]), 4),
+            })
+        return results
+
+
+_semantic_index: Optional[SemanticIndex] = None
+
+
+def get_semantic_index() -> Optional[SemanticIndex]:
+    """Memory-mapped index from build_semantic_index.py, or None if it hasn't been built."""
+    global _semantic_index
+    if _semantic_index is None:
+        try:
+            _semantic_index = SemanticIndex()
+            logger.info(f"Loaded semantic index: {len(_semantic_index.problems)} problems ({_semantic_index.embedder_name})")
+        except FileNotFoundError:
+            return None
+    return _semantic_index
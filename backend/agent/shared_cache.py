@@ -0,0 +1,146 @@
+"""
+File-backed cache and upstream request budget shared across processes.
+
+Both the API and the agent containers (and every uvicorn worker / agent job
+process inside them) can open the same SQLite file on a shared volume. Cached
+LeetCode responses are then fetched from leetcode.com once, and request slots
+are handed out from a single schedule so the combined request rate never
+exceeds the configured budget.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS budget (
+    bucket TEXT PRIMARY KEY,
+    next_slot REAL NOT NULL
+);
+"""
+
+
+class SharedCache:
+    """SQLite-backed key/value cache plus a cross-process request scheduler."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        # Entries are only ever replaced, never deleted; drop long-dead ones whenever a process opens the file
+        try:
+            purged = self.purge_expired()
+            if purged:
+                logger.info(f"Purged {purged} expired entries from {self.path}")
+        except sqlite3.Error as e:
+            logger.warning(f"Could not purge shared cache {self.path}: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """Return the cached value, or None if missing (or expired, unless allow_stale)."""
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if not allow_stale and expires_at < time.time():
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now, now + ttl),
+        )
+
+    def reserve_slot(self, bucket: str, interval: float, max_delay: Optional[float] = None) -> Optional[float]:
+        """Claim the next request slot for a bucket; returns how long to wait before using it.
+        
+        When the slot is more than `max_delay` seconds away nothing is claimed and None is
+        returned, so a caller that can't wait doesn't push everyone else's schedule back.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT next_slot FROM budget WHERE bucket = ?", (bucket,)).fetchone()
+            now = time.time()
+            slot = max(now, row[0]) if row else now
+            if max_delay is not None and slot - now > max_delay:
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute(
+                "INSERT OR REPLACE INTO budget (bucket, next_slot) VALUES (?, ?)",
+                (bucket, slot + interval),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return slot - now
+
+    def backoff(self, bucket: str, seconds: float) -> None:
+        """Push every process's next slot for a bucket at least `seconds` into the future."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT next_slot FROM budget WHERE bucket = ?", (bucket,)).fetchone()
+            resume_at = max(time.time() + seconds, row[0] if row else 0.0)
+            conn.execute(
+                "INSERT OR REPLACE INTO budget (bucket, next_slot) VALUES (?, ?)",
+                (bucket, resume_at),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def purge_expired(self, older_than: float = 7 * 24 * 3600) -> int:
+        """Drop entries that expired more than `older_than` seconds ago."""
+        cursor = self._connect().execute(
+            "DELETE FROM cache WHERE expires_at < ?", (time.time() - older_than,)
+        )
+        return cursor.rowcount
+
+
+_shared_cache: Optional[SharedCache] = None
+_shared_cache_loaded = False
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Get the shared cache configured by LEETCODE_SHARED_CACHE, or None when disabled."""
+    global _shared_cache, _shared_cache_loaded
+    if not _shared_cache_loaded:
+        _shared_cache_loaded = True
+        path = os.getenv("LEETCODE_SHARED_CACHE")
+        if path:
+            try:
+                _shared_cache = SharedCache(path)
+            except Exception as e:
+                logger.error(f"Could not open shared cache at {path}: {e}")
+    return _shared_cache
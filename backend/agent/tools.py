@@ -1,8 +1,11 @@
 import json
+import asyncio
 from pathlib import Path
 from difflib import get_close_matches
-from typing import Optional, Tuple
-from .leetcode_service import get_leetcode_service
+from typing import Iterable, List, Optional, Tuple
+from .leetcode_service import AGENT_DEADLINE, get_leetcode_service
+from .problem_table import QueryError, get_problem_table, is_expression
+from .recommender import get_recommender
 
 _leetcode_tags_cache = None
 
@@ -93,13 +96,35 @@ def _find_best_matching_tag(user_input: str) -> Tuple[str, Optional[str]]:
     return (user_input_lower, error_message)
 
 
+def _resolve_tag(word: str) -> Optional[str]:
+    leetcode_tag, suggestion_message = _find_best_matching_tag(word)
+    if suggestion_message and "not found" in suggestion_message:
+        return None
+    return leetcode_tag
+
+
 async def search_leetcode_problems(topic: str, difficulty: Optional[str] = None) -> str:
-    """Search for LeetCode problems by topic (e.g., "arrays", "dp", "trees")"""
+    """Search for LeetCode problems by topic (e.g., "arrays", "dp", "trees") or a tag expression ("graph and heap")"""
     leetcode = get_leetcode_service()
-    leetcode_tag, suggestion_message = _find_best_matching_tag(topic)
+    table = get_problem_table()
+    suggestion_message = None
     
     try:
-        problems = await leetcode.search_problems(tags=[leetcode_tag], difficulty=difficulty, limit=5)
+        # The local table answers any expression instantly; only the full problem set can stand in for LeetCode
+        if table is not None and (table.complete or is_expression(topic)):
+            leetcode_tag = topic
+            try:
+                total, problems = table.search(topic, difficulty=difficulty, limit=5, resolve=_resolve_tag)
+            except QueryError as e:
+                return json.dumps({"success": False, "message": f"Couldn't understand '{topic}': {e}"})
+            if not table.complete:
+                suggestion_message = "Searched the company interview problems only"
+        else:
+            leetcode_tag, suggestion_message = _find_best_matching_tag(topic)
+            problems = await leetcode.search_problems(
+                tags=[leetcode_tag], difficulty=difficulty, limit=5, deadline=AGENT_DEADLINE
+            )
+            total = None
         
         if not problems:
             if suggestion_message and "not found" in suggestion_message:
@@ -125,6 +150,8 @@ async def search_leetcode_problems(topic: str, difficulty: Optional[str] = None)
             "count": len(formatted_problems)
         }
         
+        if total is not None:
+            response["total_matches"] = total
         if suggestion_message:
             response["note"] = suggestion_message
         
@@ -139,7 +166,7 @@ async def select_leetcode_problem(problem_id: str) -> str:
     leetcode = get_leetcode_service()
     
     try:
-        problem_details = await leetcode.get_problem_details(problem_id)
+        problem_details = await leetcode.get_problem_details(problem_id, deadline=AGENT_DEADLINE)
         
         if not problem_details:
             return json.dumps({"success": False, "message": f"Problem '{problem_id}' not found."})
@@ -149,3 +176,67 @@ async def select_leetcode_problem(problem_id: str) -> str:
         
     except Exception as e:
         return json.dumps({"success": False, "message": f"Error fetching problem: {str(e)}"})
+
+
+async def recommend_next_problem(
+    current_slug: Optional[str],
+    seen_slugs: Iterable[str] = (),
+    difficulty: Optional[str] = None,
+    current_topics: Optional[List[str]] = None,
+) -> str:
+    """Pick related problems the user hasn't seen from the local catalog (no network call)"""
+    recommender = get_recommender()
+    if recommender is None:
+        return json.dumps({"success": False, "message": "Problem recommendations are not available."})
+    
+    picks = recommender.recommend_next(
+        current_slug, seen_slugs, difficulty=difficulty, limit=3, tags=current_topics
+    )
+    if not picks:
+        return json.dumps({"success": False, "message": "No new problems left to recommend."})
+    
+    return json.dumps({
+        "success": True,
+        "after": current_slug,
+        "problems": [
+            {
+                "id": problem.slug,
+                "title": problem.title,
+                "difficulty": problem.difficulty,
+                "topics": problem.tags,
+                "similarity": score,
+            }
+            for problem, score in picks
+        ],
+        "count": len(picks)
+    })
+
+
+async def semantic_search_problems(
+    description: str,
+    difficulty: Optional[str] = None,
+    topic: Optional[str] = None,
+) -> str:
+    """Find problems whose statements match a free-form description (local vector index)"""
+    from .semantic_search import get_semantic_index
+    
+    index = get_semantic_index()
+    if index is None:
+        return json.dumps({"success": False, "message": "Semantic search is not available."})
+    
+    tags = [_find_best_matching_tag(topic)[0]] if topic else None
+    try:
+        # Embedding the query may call the embedding API, so keep it off the event loop
+        problems = await asyncio.to_thread(index.search, description, 5, difficulty, tags)
+    except Exception as e:
+        return json.dumps({"success": False, "message": f"Error searching problems: {str(e)}"})
+    
+    if not problems:
+        return json.dumps({"success": False, "message": f"No problems found matching '{description}'."})
+    
+    return json.dumps({
+        "success": True,
+        "description": description,
+        "problems": problems,
+        "count": len(problems)
+    })
@@ -0,0 +1,417 @@
+"""
+Span-based tracing of conversation turns in the agent worker.
+
+Every user turn becomes a trace: a root `turn` span from the user finishing
+speaking until the agent is done replying, with child spans for speech
+endpointing, each LLM pass, TTS synthesis, every function tool call, and the
+upstream I/O those tools do (LeetCode, RAG retrieval, OpenAI, code runner).
+
+Spans are exported from a background thread, either as JSON lines to a local
+file or as OTLP/HTTP JSON to a collector (AGENT_TRACE_EXPORT=file|otlp). With
+no exporter configured, spans are no-ops.
+
+Summarize a trace file (per-stage latency percentiles):
+    python -m agent.tracing traces/agent-traces.jsonl [--session ROOM]
+"""
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import secrets
+import statistics
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_EXPORT = os.getenv("AGENT_TRACE_EXPORT", "")
+TRACE_FILE = Path(os.getenv("AGENT_TRACE_FILE", Path(__file__).parent.parent / "traces" / "agent-traces.jsonl"))
+OTLP_ENDPOINT = os.getenv("AGENT_TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+SERVICE_NAME = "codecoach-agent"
+
+MAX_BATCH = 256
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "_tracer")
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: Dict,
+                 start_ns: Optional[int] = None):
+        self._tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = end_ns or time.time_ns()
+            self._tracer._export(self)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns else None
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    def set(self, **attributes) -> None:
+        pass
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Creates spans and hands finished ones to an exporter thread."""
+
+    def __init__(self, exporter: Optional["_Exporter"] = None):
+        self.exporter = exporter
+        self.resource: Dict = {"service.name": SERVICE_NAME}
+        # Root for spans started outside any span context (e.g. tools run in framework tasks)
+        self.active_turn: Optional[Span] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, parent: Optional[Span] = None, start_ns: Optional[int] = None, **attributes):
+        if not self.enabled:
+            return _NOOP_SPAN
+        parent = parent or _current_span.get() or self.active_turn
+        return Span(self, name, parent, attributes, start_ns)
+
+    def record(self, name: str, start_ns: int, end_ns: int, parent: Optional[Span] = None, **attributes) -> None:
+        """Add an already-finished span (e.g. from a metrics event that reports a duration)."""
+        span = self.start_span(name, parent=parent, start_ns=start_ns, **attributes)
+        span.end(end_ns)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator:
+        """Child of the current span (or the active turn) for the duration of the block."""
+        span = self.start_span(name, **attributes)
+        if span is _NOOP_SPAN:
+            yield span
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.set(error=f"{type(e).__name__}: {e}"[:200])
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def _export(self, span: Span) -> None:
+        if self.exporter is not None:
+            self.exporter.submit(span, self.resource)
+
+    def flush(self) -> None:
+        if self.exporter is not None:
+            self.exporter.flush()
+
+
+class _Exporter(ABC):
+    """Batches finished spans on a daemon thread so exporting never blocks the event loop."""
+
+    def __init__(self):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._flushed = threading.Event()
+        threading.Thread(target=self._run, name="trace-exporter", daemon=True).start()
+
+    def submit(self, span: Span, resource: Dict) -> None:
+        self._queue.put((span, dict(resource)))
+
+    def flush(self, timeout: float = 5.0) -> None:
+        self._flushed.clear()
+        self._queue.put(None)
+        self._flushed.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            # Block for the first span, then take whatever else is already queued
+            items = [self._queue.get()]
+            while len(items) < MAX_BATCH:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            batch = [item for item in items if item is not None]
+            if batch:
+                try:
+                    self.write(batch)
+                except Exception as e:
+                    logger.warning(f"Trace export failed, dropping {len(batch)} spans: {e}")
+            if None in items:
+                self._flushed.set()
+
+    @abstractmethod
+    def write(self, batch: List) -> None:
+        """Send one batch of (span, resource) pairs; runs on the export thread."""
+
+
+class FileExporter(_Exporter):
+    """One JSON object per span, appended to a local file."""
+
+    def __init__(self, path: Path = TRACE_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__()
+
+    def write(self, batch: List) -> None:
+        with open(self.path, "a") as f:
+            for span, resource in batch:
+                f.write(json.dumps({**span.to_dict(), "resource": resource}, default=str) + "\n")
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class OTLPExporter(_Exporter):
+    """OTLP/HTTP with JSON encoding, accepted by the OpenTelemetry Collector, Jaeger and Tempo."""
+
+    def __init__(self, endpoint: str = OTLP_ENDPOINT):
+        self.endpoint = endpoint
+        super().__init__()
+
+    def write(self, batch: List) -> None:
+        by_resource: Dict[str, List] = {}
+        for span, resource in batch:
+            by_resource.setdefault(json.dumps(resource, sort_keys=True), []).append(span)
+
+        payload = {"resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes(json.loads(resource))},
+                "scopeSpans": [{
+                    "scope": {"name": "agent.tracing"},
+                    "spans": [
+                        {
+                            "traceId": span.trace_id,
+                            "spanId": span.span_id,
+                            **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                            "name": span.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.end_ns),
+                            "attributes": _otlp_attributes(span.attributes),
+                            "status": {"code": 2 if span.status == "error" else 1},
+                        }
+                        for span in spans
+                    ],
+                }],
+            }
+            for resource, spans in by_resource.items()
+        ]}
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Get or create this process's tracer, configured from AGENT_TRACE_EXPORT."""
+    global _tracer
+    if _tracer is None:
+        exporter = None
+        if TRACE_EXPORT == "file":
+            exporter = FileExporter()
+        elif TRACE_EXPORT == "otlp":
+            exporter = OTLPExporter()
+        elif TRACE_EXPORT:
+            logger.warning(f"Unknown AGENT_TRACE_EXPORT={TRACE_EXPORT!r}; tracing disabled")
+        _tracer = Tracer(exporter)
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """Shorthand for get_tracer().span(...)."""
+    return get_tracer().span(name, **attributes)
+
+
+class TurnTracer:
+    """Turns AgentSession events into one trace per user turn."""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._turn: Optional[Span] = None
+        self._user_stopped_ns: Optional[int] = None
+        self._turn_index = 0
+
+    def attach(self, session) -> None:
+        if not self.tracer.enabled:
+            return
+        session.on("user_state_changed", self._on_user_state_changed)
+        session.on("agent_state_changed", self._on_agent_state_changed)
+        session.on("metrics_collected", self._on_metrics_collected)
+
+    def _end_turn(self) -> None:
+        if self._turn is not None:
+            self._turn.end()
+            if self.tracer.active_turn is self._turn:
+                self.tracer.active_turn = None
+            self._turn = None
+
+    def _on_user_state_changed(self, event) -> None:
+        if event.new_state == "speaking":
+            # The user barged in or started a new turn; whatever was in flight is over
+            self._end_turn()
+        elif event.old_state == "speaking" and event.new_state == "listening":
+            self._end_turn()
+            self._turn_index += 1
+            self._user_stopped_ns = time.time_ns()
+            self._turn = self.tracer.start_span("turn", parent=None, turn=self._turn_index)
+            self.tracer.active_turn = self._turn
+
+    def _on_agent_state_changed(self, event) -> None:
+        if self._turn is None:
+            return
+        if event.new_state == "speaking" and "first_audio_ms" not in self._turn.attributes:
+            self._turn.set(first_audio_ms=round((time.time_ns() - self._user_stopped_ns) / 1e6, 1))
+        elif event.new_state == "listening":
+            self._end_turn()
+
+    def _on_metrics_collected(self, event) -> None:
+        if self._turn is None:
+            return
+        metrics = event.metrics
+        kind = type(metrics).__name__
+        now = time.time_ns()
+
+        if kind == "EOUMetrics":
+            delay = getattr(metrics, "end_of_utterance_delay", 0) or 0
+            self.tracer.record(
+                "stt.endpointing", self._user_stopped_ns, self._user_stopped_ns + int(delay * 1e9), parent=self._turn,
+                transcription_delay_ms=round((getattr(metrics, "transcription_delay", 0) or 0) * 1000, 1),
+            )
+        elif kind == "LLMMetrics":
+            duration = getattr(metrics, "duration", 0) or 0
+            self.tracer.record(
+                "llm", now - int(duration * 1e9), now, parent=self._turn,
+                ttft_ms=round((getattr(metrics, "ttft", 0) or 0) * 1000, 1),
+                prompt_tokens=getattr(metrics, "prompt_tokens", None),
+                completion_tokens=getattr(metrics, "completion_tokens", None),
+            )
+        elif kind == "TTSMetrics":
+            duration = getattr(metrics, "duration", 0) or 0
+            self.tracer.record(
+                "tts", now - int(duration * 1e9), now, parent=self._turn,
+                ttfb_ms=round((getattr(metrics, "ttfb", 0) or 0) * 1000, 1),
+                characters=getattr(metrics, "characters_count", None),
+            )
+
+    async def close(self) -> None:
+        self._end_turn()
+        self.tracer.flush()
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(path: Path, session: Optional[str] = None) -> Dict[str, Dict]:
+    """Per-stage latency percentiles from a JSONL trace file.
+
+    Stages are span names (duration) plus every numeric `*_ms` attribute
+    (e.g. `llm.ttft_ms`, `turn.first_audio_ms`).
+    """
+    samples: Dict[str, List[float]] = {}
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if session and record.get("resource", {}).get("session.id") != session:
+                continue
+            samples.setdefault(record["name"], []).append(record["duration_ms"])
+            for key, value in record.get("attributes", {}).items():
+                if key.endswith("_ms") and isinstance(value, (int, float)):
+                    samples.setdefault(f"{record['name']}.{key}", []).append(value)
+
+    return {
+        stage: {
+            "count": len(values),
+            "p50_ms": round(_percentile(values, 50), 1),
+            "p90_ms": round(_percentile(values, 90), 1),
+            "p99_ms": round(_percentile(values, 99), 1),
+            "max_ms": round(max(values), 1),
+            "mean_ms": round(statistics.fmean(values), 1),
+        }
+        for stage, values in sorted(samples.items())
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-stage latency percentiles from an agent trace file")
+    parser.add_argument("path", nargs="?", default=str(TRACE_FILE))
+    parser.add_argument("--session", help="only spans from this room")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    summary = summarize(Path(args.path), args.session)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    width = max((len(stage) for stage in summary), default=5)
+    print(f"{'stage':<{width}}  {'count':>6}  {'p50':>8}  {'p90':>8}  {'p99':>8}  {'max':>8}")
+    for stage, row in summary.items():
+        print(
+            f"{stage:<{width}}  {row['count']:>6}  {row['p50_ms']:>8.1f}  {row['p90_ms']:>8.1f}  "
+            f"{row['p99_ms']:>8.1f}  {row['max_ms']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Per-turn response latency as the user experiences it.
+
+Measures the time from the user finishing speaking to the agent starting to
+speak and counts tool round-trips before the reply. Samples are tagged with
+the context mode so "inject" and "tool" sessions can be compared from logs.
+"""
+
+import logging
+import statistics
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class TurnLatencyRecorder:
+    """Collects user-stopped → agent-speaking latency for one session."""
+
+    def __init__(self, context_mode: str):
+        self.context_mode = context_mode
+        self.samples_ms: List[float] = []
+        self.tool_hops: List[int] = []
+        self._user_stopped_at: Optional[float] = None
+        self._turn_tool_hops = 0
+
+    def attach(self, session) -> None:
+        session.on("user_state_changed", self._on_user_state_changed)
+        session.on("agent_state_changed", self._on_agent_state_changed)
+        session.on("function_tools_executed", self._on_function_tools_executed)
+
+    def _on_user_state_changed(self, event) -> None:
+        if event.old_state == "speaking" and event.new_state == "listening":
+            self._user_stopped_at = time.perf_counter()
+            self._turn_tool_hops = 0
+
+    def _on_function_tools_executed(self, event) -> None:
+        if self._user_stopped_at is not None:
+            self._turn_tool_hops += 1
+
+    def _on_agent_state_changed(self, event) -> None:
+        if event.new_state != "speaking" or self._user_stopped_at is None:
+            return
+        latency_ms = (time.perf_counter() - self._user_stopped_at) * 1000
+        self._user_stopped_at = None
+        self.samples_ms.append(latency_ms)
+        self.tool_hops.append(self._turn_tool_hops)
+        logger.info(
+            f"turn_latency_ms={latency_ms:.0f} context_mode={self.context_mode} "
+            f"tool_hops={self._turn_tool_hops}"
+        )
+
+    def summary(self) -> dict:
+        if not self.samples_ms:
+            return {"context_mode": self.context_mode, "turns": 0}
+        return {
+            "context_mode": self.context_mode,
+            "turns": len(self.samples_ms),
+            "p50_ms": round(_percentile(self.samples_ms, 50)),
+            "p90_ms": round(_percentile(self.samples_ms, 90)),
+            "mean_ms": round(statistics.fmean(self.samples_ms)),
+            "mean_tool_hops": round(statistics.fmean(self.tool_hops), 2),
+        }
+
+    async def log_summary(self) -> None:
+        logger.info(f"Session turn latency: {self.summary()}")
@@ -1,6 +1,9 @@
 """
 Run the FastAPI server.
 Usage: python -m api
+
+API_MODE=development (default): one process, autoreload on code changes.
+API_MODE=production: gunicorn with API_WORKERS uvicorn workers (see api/serving.py).
 """
 
 import os
@@ -9,21 +12,31 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+API_MODE = os.getenv("API_MODE", "development")
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", "8000"))
-    
+
+    if API_MODE not in ("development", "production"):
+        raise SystemExit(f"Unknown API_MODE '{API_MODE}' (development or production)")
+
     print(f"""
 ╔═══════════════════════════════════════╗
 ║   Interview Coach API Server         ║
 ║   Running on http://localhost:{port}   ║
+║   Mode: {API_MODE:<30}║
 ╚═══════════════════════════════════════╝
     """)
-    
-    uvicorn.run(
-        "api.server:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True, 
-        log_level="info"
-    )
 
+    if API_MODE == "production":
+        from api.serving import serve
+
+        serve(port)
+    else:
+        uvicorn.run(
+            "api.server:app",
+            host="0.0.0.0",
+            port=port,
+            reload=True,
+            log_level="info"
+        )
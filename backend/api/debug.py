@@ -0,0 +1,75 @@
+"""
+/debug endpoints: on-demand CPU profiles, memory snapshots and event-loop health.
+
+Not mounted unless DIAGNOSTICS_TOKEN is set; every call needs
+`Authorization: Bearer $DIAGNOSTICS_TOKEN`. Each uvicorn worker is its own
+process, so a request profiles whichever worker it lands on (the `pid` in
+/debug/loop says which).
+"""
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from agent.diagnostics import (
+    DEFAULT_SAMPLE_INTERVAL_MS,
+    MAX_PROFILE_SECONDS,
+    TRACEMALLOC_FRAMES,
+    DiagnosticsBusy,
+    check_token,
+    collapse,
+    get_memory_tracker,
+    get_profiler,
+    loop_stats,
+)
+
+
+def require_token(authorization: Optional[str] = Header(None)):
+    if not check_token(authorization):
+        raise HTTPException(status_code=401, detail="Invalid diagnostics token")
+
+
+router = APIRouter(prefix="/debug", dependencies=[Depends(require_token)])
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def cpu_profile(seconds: float = 10.0, interval_ms: float = DEFAULT_SAMPLE_INTERVAL_MS, include_idle: bool = False):
+    """Sample every thread for `seconds` and return collapsed stacks (flamegraph.pl / speedscope input)."""
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {MAX_PROFILE_SECONDS:.0f}]")
+
+    try:
+        # The sampler runs off the loop so the loop's own stack shows up in the samples
+        counts = await asyncio.to_thread(get_profiler().profile, seconds, interval_ms, include_idle)
+    except DiagnosticsBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return collapse(counts)
+
+
+@router.post("/memory/start")
+async def start_memory_tracing(frames: int = Query(TRACEMALLOC_FRAMES, ge=1)):
+    """Start tracemalloc; allocations made before this call are not tracked."""
+    return get_memory_tracker().start(frames)
+
+
+@router.get("/memory/snapshot")
+async def memory_snapshot(limit: int = 20):
+    """Top allocation sites, plus growth since the previous and the first snapshot."""
+    try:
+        return await asyncio.to_thread(get_memory_tracker().snapshot, limit)
+    except RuntimeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/memory/stop")
+async def stop_memory_tracing():
+    """Stop tracemalloc and drop its snapshots (tracing slows allocation-heavy code)."""
+    return get_memory_tracker().stop()
+
+
+@router.get("/loop")
+async def event_loop_stats(seconds: float = 1.0):
+    """asyncio task counts by coroutine and event-loop lag measured over `seconds`."""
+    return await loop_stats(min(seconds, MAX_PROFILE_SECONDS))
@@ -0,0 +1,158 @@
+"""
+Cacheable JSON responses: stable ETags, conditional GETs and body compression.
+"""
+
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth the CPU spent compressing them
+MIN_COMPRESS_SIZE = 1024
+
+PROBLEM_CACHE_CONTROL = "public, max-age=3600, stale-while-revalidate=86400"
+# POST replies: intermediaries don't cache POST, and conditional requests don't apply to it
+UNCACHEABLE_CACHE_CONTROL = "no-store"
+
+
+def encode_json(payload: Any) -> bytes:
+    """Serialize a payload to JSON bytes with orjson."""
+    return orjson.dumps(payload)
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the serialized body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+@dataclass
+class EncodedPayload:
+    """A serialized JSON body, its ETag and lazily built compressed variants."""
+    body: bytes
+    etag: str
+    _variants: Dict[str, bytes] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "EncodedPayload":
+        body = encode_json(payload)
+        return cls(body=body, etag=make_etag(body))
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """Return the body in the given content-encoding (None for identity)."""
+        if encoding is None:
+            return self.body
+        if encoding not in self._variants:
+            if encoding == "br":
+                self._variants[encoding] = brotli.compress(self.body, quality=5)
+            else:
+                self._variants[encoding] = gzip.compress(self.body, compresslevel=6)
+        return self._variants[encoding]
+
+
+class PayloadCache:
+    """Small LRU of encoded payloads with a per-entry time-to-live."""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, EncodedPayload]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[EncodedPayload]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, payload = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, key: Hashable, payload: EncodedPayload) -> None:
+        self._entries[key] = (time.monotonic(), payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of If-None-Match against our ETag (RFC 9110 13.1.2)."""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _choose_encoding(accept_encoding: str, size: int) -> Optional[str]:
+    """Pick the best content-encoding the client accepts, or None."""
+    if size < MIN_COMPRESS_SIZE:
+        return None
+
+    accepted = set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(token.strip().lower())
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def cached_json_response(
+    request: Request,
+    payload: EncodedPayload,
+    cache_control: str,
+) -> Response:
+    """Build a JSON response honoring If-None-Match and Accept-Encoding (GET/HEAD routes only)."""
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+
+    return _encoded_response(request, payload, headers)
+
+
+def json_response(request: Request, payload: EncodedPayload) -> Response:
+    """Compressed JSON response for non-GET routes: no ETag, no conditional handling, not stored."""
+    headers = {
+        "Cache-Control": UNCACHEABLE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    return _encoded_response(request, payload, headers)
+
+
+def _encoded_response(request: Request, payload: EncodedPayload, headers: Dict[str, str]) -> Response:
+    encoding = _choose_encoding(request.headers.get("accept-encoding", ""), len(payload.body))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(
+        content=payload.encoded(encoding),
+        media_type="application/json",
+        headers=headers,
+    )
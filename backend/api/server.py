@@ -1,23 +1,34 @@
 import os
 import uuid
-import json
-import traceback
+import asyncio
 from io import StringIO
 import sys as python_sys
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
 from typing import Optional, List, Any
 from livekit import api
 from dotenv import load_dotenv
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from agent.leetcode_service import get_leetcode_service
+from agent.diagnostics import diagnostics_enabled
+from agent.leetcode_service import API_DEADLINE, get_leetcode_service
+from agent.problem_table import QueryError, get_problem_table
+from agent.code_runner import RUNNER_TIMEOUT, get_code_runner, parse_test_lines
+from agent.grading import Submission, TestSet, get_grading_runner, grade_batch
+from api.responses import (
+    EncodedPayload,
+    PayloadCache,
+    cached_json_response,
+    json_response,
+    PROBLEM_CACHE_CONTROL,
+)
 
 
 load_dotenv()
 
-app = FastAPI(title="Interview Coach API")
+app = FastAPI(title="Interview Coach API", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,8 +36,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+if diagnostics_enabled():
+    from api.debug import router as debug_router
+
+    app.include_router(debug_router)
+
+_problem_payloads = PayloadCache(max_entries=1024, ttl=3600.0)
+_search_payloads = PayloadCache(max_entries=256, ttl=300.0)
+
+
+def preload_shared_data():
+    """Build the read-only lookup data now rather than on first request.
+
+    The production server calls this once before forking workers, so they all
+    share one copy. Nothing here may open sockets or start threads or processes.
+    """
+    get_problem_table()
+    
+    from agent.semantic_search import INDEX_DIR, get_semantic_index
+    
+    if INDEX_DIR.exists():
+        get_semantic_index()
+
 
 class TokenRequest(BaseModel):
     """Request body for token generation"""
@@ -91,20 +125,46 @@ class SearchProblemsRequest(BaseModel):
     """Request body for searching LeetCode problems"""
     tags: Optional[List[str]] = None
     difficulty: Optional[str] = None
-    limit: int = 10
+    limit: int = Field(10, ge=1, le=50)
+    # Boolean tag expression, e.g. "medium graph and heap and not paid" (served from the local problem table)
+    query: Optional[str] = None
+    offset: int = Field(0, ge=0)
 
 
 @app.post("/leetcode/search")
-async def search_leetcode_problems(request: SearchProblemsRequest):
-    """Search LeetCode problems by tags and difficulty."""
+async def search_leetcode_problems(request: SearchProblemsRequest, http_request: Request):
+    """Search LeetCode problems by tags and difficulty, or by a boolean tag expression."""
+    cache_key = (tuple(request.tags or ()), request.difficulty, request.limit, request.query, request.offset)
+    payload = _search_payloads.get(cache_key)
+    if payload is not None:
+        return json_response(http_request, payload)
+    
     leetcode = get_leetcode_service()
+    table = get_problem_table()
+    total = None
     
     try:
-        problems = await leetcode.search_problems(
-            tags=request.tags,
-            difficulty=request.difficulty,
-            limit=request.limit
-        )
+        if table is not None and (table.complete or request.query):
+            try:
+                total, problems = table.search(
+                    request.query,
+                    tags=request.tags,
+                    difficulty=request.difficulty,
+                    offset=request.offset,
+                    limit=request.limit,
+                )
+            except QueryError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid query: {str(e)}")
+        elif request.query:
+            raise HTTPException(status_code=503, detail="Query expressions need the problem catalog (run build_problem_catalog.py)")
+        else:
+            problems = await leetcode.search_problems(
+                tags=request.tags,
+                difficulty=request.difficulty,
+                limit=request.limit,
+                deadline=API_DEADLINE,
+                skip=request.offset
+            )
         
         if not problems:
             return {"problems": [], "message": "No problems found matching criteria"}
@@ -116,26 +176,64 @@ async def search_leetcode_problems(request: SearchProblemsRequest):
             "topics": [tag["name"] for tag in p.get("topicTags", [])]
         } for p in problems]
         
-        return {"problems": simplified}
+        result = {"problems": simplified}
+        if total is not None:
+            result.update(total=total, offset=request.offset)
+        payload = EncodedPayload.from_payload(result)
+        _search_payloads.put(cache_key, payload)
+        return json_response(http_request, payload)
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching problems: {str(e)}")
+
+
+class SemanticSearchRequest(BaseModel):
+    """Request body for searching problem statements by meaning"""
+    query: str
+    difficulty: Optional[str] = None
+    tags: Optional[List[str]] = None
+    limit: int = Field(10, ge=1, le=50)
+
+
+@app.post("/leetcode/semantic-search")
+async def semantic_search_problems(request: SemanticSearchRequest):
+    """Find problems whose statements match a description, from the local semantic index."""
+    # Imported here so numpy and the index only load for servers that use semantic search
+    from agent.semantic_search import get_semantic_index
+    
+    index = get_semantic_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Semantic index not built (run build_semantic_index.py)")
+    
+    try:
+        problems = await asyncio.to_thread(index.search, request.query, request.limit, request.difficulty, request.tags)
+        return {"problems": problems}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching problems: {str(e)}")
 
 
 @app.get("/leetcode/problem/{title_slug}")
-async def get_leetcode_problem(title_slug: str):
+async def get_leetcode_problem(title_slug: str, http_request: Request):
     """Get detailed problem information including description and code template."""
+    payload = _problem_payloads.get(title_slug)
+    if payload is not None:
+        return cached_json_response(http_request, payload, PROBLEM_CACHE_CONTROL)
+    
     leetcode = get_leetcode_service()
     
     try:
-        problem_details = await leetcode.get_problem_details(title_slug)
+        problem_details = await leetcode.get_problem_details(title_slug, deadline=API_DEADLINE)
         
         if not problem_details:
             raise HTTPException(status_code=404, detail="Problem not found")
         
         formatted = leetcode.format_problem_for_display(problem_details)
         
-        return formatted
+        payload = EncodedPayload.from_payload(formatted)
+        _problem_payloads.put(title_slug, payload)
+        return cached_json_response(http_request, payload, PROBLEM_CACHE_CONTROL)
         
     except HTTPException:
         raise
@@ -152,87 +250,47 @@ class RunCodeRequest(BaseModel):
 
 @app.post("/run-code")
 async def run_code(request: RunCodeRequest):
-    """Execute user's code against test cases."""
-    try:
-        test_lines = [line.strip() for line in request.test_cases.strip().split('\n') if line.strip()]
-        
-        exec_globals = {
-            '__builtins__': __builtins__,
-            'List': list,
-            'Optional': type(None),
-            'Dict': dict,
-            'Set': set,
-        }
-        
-        exec(request.code, exec_globals)
-        
-        if 'Solution' not in exec_globals:
-            return {
-                "success": False,
-                "error": "No Solution class found in code"
-            }
-        
-        solution = exec_globals['Solution']()
-        
-        method_name = next((name for name in dir(solution) 
-                           if not name.startswith('_') and callable(getattr(solution, name))), None)
-        
-        if not method_name:
-            return {"success": False, "error": "No solution method found"}
-        
-        method = getattr(solution, method_name)
-        import inspect
-        sig = inspect.signature(method)
-        param_count = len(sig.parameters)
-        
-        if len(test_lines) % param_count != 0:
-            return {
-                "success": False,
-                "error": f"Test case count mismatch. Method expects {param_count} parameters, but got {len(test_lines)} values."
-            }
-        
-        test_cases = [test_lines[i:i+param_count] for i in range(0, len(test_lines), param_count)]
-        
-        results = []
-        all_passed = True
-        
-        for test_num, test_inputs_str in enumerate(test_cases, 1):
-            try:
-                inputs = [json.loads(input_str) for input_str in test_inputs_str]
-                result = method(*inputs)
-                input_display = ", ".join(test_inputs_str)
-                
-                results.append({
-                    "test_case": test_num,
-                    "input": input_display,
-                    "output": str(result),
-                    "passed": True,
-                    "error": None
-                })
-                
-            except Exception as e:
-                all_passed = False
-                input_display = ", ".join(test_inputs_str) if test_inputs_str else "N/A"
-                results.append({
-                    "test_case": test_num,
-                    "input": input_display,
-                    "output": None,
-                    "passed": False,
-                    "error": str(e)
-                })
-        
-        return {
-            "success": True,
-            "all_passed": all_passed,
-            "results": results
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "error": f"Execution error: {str(e)}",
-            "traceback": traceback.format_exc()
-        }
+    """Execute user's code against test cases in an isolated process."""
+    test_lines = parse_test_lines(request.test_cases)
+    return await get_code_runner().run(request.code, test_lines)
+
+
+MAX_BATCH_SUBMISSIONS = int(os.getenv("MAX_BATCH_SUBMISSIONS", "500"))
+
+
+class BatchSubmission(BaseModel):
+    """One submission in a batch grading request"""
+    id: Optional[str] = None
+    code: str
+    problem_id: str
+
+
+class BatchGradeRequest(BaseModel):
+    """Request body for grading many submissions against one test set"""
+    submissions: List[BatchSubmission]
+    test_cases: str
+    expected_outputs: Optional[str] = None
+    # Per-submission limit; capped at the runner's own limit so one batch can't pin the pool
+    timeout: Optional[float] = Field(None, gt=0, le=RUNNER_TIMEOUT)
+
+
+@app.post("/grade/batch")
+async def grade_submissions(request: BatchGradeRequest):
+    """Grade many submissions against a shared test set; returns a compact result table."""
+    if not request.submissions:
+        raise HTTPException(status_code=400, detail="No submissions to grade")
+    if len(request.submissions) > MAX_BATCH_SUBMISSIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many submissions ({len(request.submissions)} > {MAX_BATCH_SUBMISSIONS})"
+        )
+    
+    tests = TestSet.parse(request.test_cases, request.expected_outputs)
+    submissions = [
+        Submission(id=s.id or str(i), problem_id=s.problem_id, code=s.code)
+        for i, s in enumerate(request.submissions)
+    ]
+    return await grade_batch(submissions, tests, get_grading_runner(), timeout=request.timeout)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+"""
+Production serving for the API: gunicorn master + uvicorn workers.
+
+`API_MODE=production python -m api` runs this instead of the autoreloading dev
+server:
+- API_WORKERS processes (default: one per core), each on uvloop + httptools
+- The app is imported and its read-only data (tag bitset table, semantic index)
+  built once in the master before forking, then gc.freeze()d, so workers share
+  those pages copy-on-write instead of each building their own
+- SIGTERM drains: workers stop accepting, finish in-flight requests for up to
+  API_GRACEFUL_TIMEOUT seconds, then exit
+- Each worker answers 503 above API_LIMIT_CONCURRENCY open connections/requests
+  rather than queueing without bound, and closes idle keep-alive connections
+  after API_KEEPALIVE_SECONDS
+- With more than one worker the LeetCode request budget and response cache go
+  through LEETCODE_SHARED_CACHE (a default file under the temp dir if unset),
+  so the workers together stay within LEETCODE_MIN_REQUEST_INTERVAL
+- Each worker starts its own /run-code and /grade/batch runner pools, so
+  unless CODE_RUNNER_POOL_SIZE / GRADER_POOL_SIZE are set, the usual
+  per-process defaults are divided between the workers (at least one
+  process each) instead of every worker taking them all
+"""
+
+import gc
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from gunicorn.app.base import BaseApplication
+
+from agent.code_runner import RUNNER_POOL_SIZE
+from agent.grading import GRADER_POOL_SIZE
+
+try:
+    from uvicorn_worker import UvicornWorker
+except ImportError:  # uvicorn-worker is the maintained home; uvicorn.workers still ships it
+    from uvicorn.workers import UvicornWorker
+
+logger = logging.getLogger(__name__)
+
+API_WORKERS = int(os.getenv("API_WORKERS", str(os.cpu_count() or 1)))
+API_LIMIT_CONCURRENCY = int(os.getenv("API_LIMIT_CONCURRENCY", "1000"))
+API_KEEPALIVE_SECONDS = int(os.getenv("API_KEEPALIVE_SECONDS", "5"))
+API_GRACEFUL_TIMEOUT = int(os.getenv("API_GRACEFUL_TIMEOUT", "30"))
+API_BACKLOG = int(os.getenv("API_BACKLOG", "2048"))
+# Recycle a worker after this many requests (0 = never), with jitter so they don't all restart at once
+API_MAX_REQUESTS = int(os.getenv("API_MAX_REQUESTS", "0"))
+API_MAX_REQUESTS_JITTER = int(os.getenv("API_MAX_REQUESTS_JITTER", "0"))
+# Used when several workers run without LEETCODE_SHARED_CACHE; see serve()
+DEFAULT_SHARED_CACHE = Path(tempfile.gettempdir()) / "codecoach" / "leetcode_cache.sqlite3"
+
+
+class ProductionWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "limit_concurrency": API_LIMIT_CONCURRENCY,
+        "timeout_graceful_shutdown": API_GRACEFUL_TIMEOUT,
+        "server_header": False,
+    }
+
+
+class ProductionServer(BaseApplication):
+    def __init__(self, port: int, workers: int = API_WORKERS):
+        self.port = port
+        self.workers = max(1, workers)
+        super().__init__()
+
+    def load_config(self):
+        settings = {
+            "bind": f"0.0.0.0:{self.port}",
+            "workers": self.workers,
+            "worker_class": ProductionWorker,
+            "preload_app": True,
+            "keepalive": API_KEEPALIVE_SECONDS,
+            "graceful_timeout": API_GRACEFUL_TIMEOUT,
+            "backlog": API_BACKLOG,
+            "max_requests": API_MAX_REQUESTS,
+            "max_requests_jitter": API_MAX_REQUESTS_JITTER,
+            "accesslog": None,
+            "loglevel": "info",
+        }
+        for key, value in settings.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # With preload_app this runs once, in the master, before any fork
+        from api.server import app, preload_shared_data
+
+        preload_shared_data()
+        # Move everything allocated so far out of the GC's view, so collections in the
+        # workers don't touch (and un-share) the preloaded objects
+        gc.freeze()
+        logger.info(f"Preloaded shared data in pid {os.getpid()}; forking {self.workers} workers")
+        return app
+
+
+def serve(port: int, workers: int = API_WORKERS):
+    if workers > 1 and not os.getenv("LEETCODE_SHARED_CACHE"):
+        # The LeetCode throttle, breaker and caches are per process unless they share this file:
+        # N workers without it would hit LeetCode at N times LEETCODE_MIN_REQUEST_INTERVAL's rate
+        os.environ["LEETCODE_SHARED_CACHE"] = str(DEFAULT_SHARED_CACHE)
+        logger.warning(
+            f"LEETCODE_SHARED_CACHE is not set; sharing the LeetCode request budget between "
+            f"{workers} workers through {DEFAULT_SHARED_CACHE}"
+        )
+    if workers > 1:
+        # Runner pools are per worker and each runner process may use CODE_RUNNER_MEMORY_MB:
+        # with the single-process defaults, N workers would start N times the processes
+        for name, size in (("CODE_RUNNER_POOL_SIZE", RUNNER_POOL_SIZE), ("GRADER_POOL_SIZE", GRADER_POOL_SIZE)):
+            if not os.getenv(name):
+                os.environ[name] = str(max(1, size // workers))
+                logger.info(f"{name}={os.environ[name]} per worker ({size} split between {workers} workers)")
+    ProductionServer(port, workers).run()
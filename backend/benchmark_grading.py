@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch grading throughput.
+
+Grades a synthetic cohort of Two Sum submissions (mostly correct, some wrong,
+some crashing, optionally a few that never terminate) and reports
+submissions/sec for:
+1. One at a time through a single runner, like separate /run-code calls
+2. The batch grader spread over the grading pool
+
+Run:
+    python benchmark_grading.py [--submissions 64] [--workers N] [--hangs 0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agent.code_runner import CodeRunnerPool, parse_test_lines
+from agent.grading import GRADER_POOL_SIZE, Submission, TestSet, grade_batch
+
+TEST_CASES = "[2,7,11,15]\n9\n[3,2,4]\n6\n[3,3]\n6\n" + "[%s]\n%d" % (",".join(str(i) for i in range(2000)), 3997)
+EXPECTED = "[0,1]\n[1,2]\n[0,1]\n[1998,1999]"
+
+CORRECT = """
+class Solution:
+    def twoSum(self, nums: List[int], target: int) -> List[int]:
+        seen = {}
+        for i, n in enumerate(nums):
+            if target - n in seen:
+                return [seen[target - n], i]
+            seen[n] = i
+"""
+
+QUADRATIC = """
+class Solution:
+    def twoSum(self, nums: List[int], target: int) -> List[int]:
+        for i in range(len(nums)):
+            for j in range(i + 1, len(nums)):
+                if nums[i] + nums[j] == target:
+                    return [i, j]
+"""
+
+WRONG = """
+class Solution:
+    def twoSum(self, nums: List[int], target: int) -> List[int]:
+        return [0, 1]
+"""
+
+CRASHING = """
+class Solution:
+    def twoSum(self, nums: List[int], target: int) -> List[int]:
+        return nums[len(nums)]
+"""
+
+HANGING = """
+class Solution:
+    def twoSum(self, nums: List[int], target: int) -> List[int]:
+        while True:
+            pass
+"""
+
+
+def make_submissions(count: int, hangs: int):
+    variants = [CORRECT, CORRECT, QUADRATIC, WRONG, CRASHING]
+    submissions = [
+        Submission(id=f"s{i}", problem_id="two-sum", code=variants[i % len(variants)])
+        for i in range(count - hangs)
+    ]
+    submissions += [Submission(id=f"hang{i}", problem_id="two-sum", code=HANGING) for i in range(hangs)]
+    return submissions
+
+
+async def run_sequential(submissions, timeout):
+    runner = CodeRunnerPool(size=1, timeout=timeout)
+    await runner.start()
+    started = time.perf_counter()
+    for submission in submissions:
+        # What /run-code does per request: split the raw test text again every time
+        await runner.run(submission.code, parse_test_lines(TEST_CASES))
+    elapsed = time.perf_counter() - started
+    await runner.close()
+    return elapsed
+
+
+async def run_batch(submissions, workers, timeout):
+    runner = CodeRunnerPool(size=workers, timeout=timeout)
+    await runner.start()
+    tests = TestSet.parse(TEST_CASES, EXPECTED)
+    started = time.perf_counter()
+    table = await grade_batch(submissions, tests, runner)
+    elapsed = time.perf_counter() - started
+    await runner.close()
+    return elapsed, table
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=GRADER_POOL_SIZE)
+    parser.add_argument("--hangs", type=int, default=0, help="submissions that loop forever")
+    parser.add_argument("--timeout", type=float, default=2.0)
+    args = parser.parse_args()
+
+    submissions = make_submissions(args.submissions, args.hangs)
+
+    sequential = await run_sequential(submissions, args.timeout)
+    batch, table = await run_batch(submissions, args.workers, args.timeout)
+
+    report = {
+        "submissions": len(submissions),
+        "workers": args.workers,
+        "cpus": os.cpu_count(),
+        "sequential_per_sec": round(len(submissions) / sequential, 1),
+        "batch_per_sec": round(len(submissions) / batch, 1),
+        "speedup": round(sequential / batch, 2),
+        "statuses": table["summary"]["statuses"],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the bitset problem table against a plain scan over the same rows.
+
+Uses agent/problem_catalog.json when it holds the full LeetCode problem set
+(build_problem_catalog.py --source leetcode); otherwise generates a synthetic
+set of the same size (~3,300 problems, 1-5 tags each, LeetCode's difficulty
+mix) from the real tag list. Reports microseconds per query for:
+1. A linear scan evaluating the filter on every row
+2. The bitset table with the expression compiled on the first call
+3. The bitset table with the compiled expression cached
+
+Run:
+    python benchmark_problem_table.py [--problems 3300] [--repeat 2000]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agent.problem_table import ProblemRow, ProblemTable
+from agent.recommender import CATALOG_PATH, TAGS_PATH
+
+# Expression, and the same filter as a row predicate for the scan baseline
+QUERIES = [
+    ("medium graph heap free", lambda r: r.difficulty == "Medium" and {"graph", "heap-priority-queue"} <= set(r.tags) and not r.paid),
+    ("(tree or graph) and not hard", lambda r: ("tree" in r.tags or "graph" in r.tags) and r.difficulty != "Hard"),
+    ("dynamic programming and not array", lambda r: "dynamic-programming" in r.tags and "array" not in r.tags),
+    ("array", lambda r: "array" in r.tags),
+    ("hash table and (string or sorting) and easy", lambda r: "hash-table" in r.tags and ("string" in r.tags or "sorting" in r.tags) and r.difficulty == "Easy"),
+]
+PAGE_SIZE = 10
+
+
+def synthetic_table(count: int, seed: int = 7) -> ProblemTable:
+    rng = random.Random(seed)
+    with open(TAGS_PATH) as f:
+        tags = json.load(f)["slugs"]
+    # A few tags ("array", "string", ...) are on a large share of problems, most are rare
+    weights = [1.0 / (rank + 1) for rank in range(len(tags))]
+    rows = []
+    for i in range(count):
+        chosen = tuple(dict.fromkeys(rng.choices(tags, weights, k=rng.randint(1, 5))))
+        difficulty = rng.choices(["Easy", "Medium", "Hard"], [0.25, 0.52, 0.23])[0]
+        rows.append(ProblemRow(f"problem-{i + 1}", f"Problem {i + 1}", difficulty, str(i + 1), rng.random() < 0.15, chosen))
+    return ProblemTable(rows, complete=True)
+
+
+def scan(rows, predicate):
+    matches = [r for r in rows if predicate(r)]
+    return len(matches), matches[:PAGE_SIZE]
+
+
+def per_query_us(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--problems", type=int, default=3300, help="size of the synthetic set")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    table = None
+    if CATALOG_PATH.exists():
+        table = ProblemTable.from_catalog()
+    source = "catalog"
+    if table is None or not table.complete:
+        table = synthetic_table(args.problems)
+        source = "synthetic"
+
+    results = []
+    for expression, predicate in QUERIES:
+        total, _ = table.search(expression, include_paid=True)
+
+        def compile_and_search():
+            table._expressions.clear()
+            table.search(expression, include_paid=True, limit=PAGE_SIZE)
+
+        results.append({
+            "query": expression,
+            "matches": total,
+            "scan_us": round(per_query_us(lambda: scan(table.rows, predicate), max(args.repeat // 20, 1)), 1),
+            "bitset_cold_us": round(per_query_us(compile_and_search, args.repeat), 1),
+            "bitset_cached_us": round(per_query_us(lambda: table.search(expression, include_paid=True, limit=PAGE_SIZE), args.repeat), 1),
+        })
+
+    report = {
+        "source": source,
+        "problems": len(table.rows),
+        "page_size": PAGE_SIZE,
+        "queries": results,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Build the problem catalog and similarity index used for "next problem" recommendations.
+
+Sources:
+- pdf (default): every question in data/*.pdf, with topics from the PDF and
+  popularity = how often the companies in the PDF ask it
+- leetcode: the full problem set (including paid-only problems, which are
+  flagged), paged from LeetCode's GraphQL API. A page that still fails after
+  a few retries aborts the build, and the catalog records LeetCode's own
+  problem count, so only a catalog holding all of them counts as complete
+
+Writes agent/problem_catalog.json (or PROBLEM_CATALOG_PATH) with the problems
+and their precomputed nearest neighbours.
+
+Run:
+    python build_problem_catalog.py [--source pdf|leetcode] [--test two-sum]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agent.recommender import CATALOG_PATH, CatalogProblem, ProblemRecommender, normalize_tag
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent / "data"
+LEETCODE_PAGE_SIZE = 100
+LEETCODE_PAGE_ATTEMPTS = 4
+
+
+def problems_from_pdf() -> List[CatalogProblem]:
+    from agent.rag_ingest import chunk_by_company, parse_pdf_pages, parse_question_records
+
+    problems: Dict[str, CatalogProblem] = {}
+    for pdf_file in sorted(DATA_DIR.glob("*.pdf")):
+        for chunk in chunk_by_company(parse_pdf_pages(pdf_file)):
+            for record in parse_question_records(chunk.text, chunk.company):
+                problem = problems.setdefault(record.slug, CatalogProblem(
+                    slug=record.slug,
+                    title=record.title,
+                    difficulty=record.difficulty,
+                    tags=[normalize_tag(t) for t in record.topics.split(",") if t.strip()],
+                ))
+                problem.popularity += max(record.asked, 1)
+    return list(problems.values())
+
+
+async def fetch_leetcode_page(leetcode, skip: int) -> Tuple[Optional[int], List[Dict]]:
+    """One page of the problem list and LeetCode's total, retried; raises if LeetCode won't answer."""
+    for attempt in range(1, LEETCODE_PAGE_ATTEMPTS + 1):
+        page = await leetcode.get_problem_page(skip, LEETCODE_PAGE_SIZE)
+        if page is not None:
+            return page
+        if attempt < LEETCODE_PAGE_ATTEMPTS:
+            delay = 2 ** attempt
+            logger.warning(f"Page at {skip} failed (attempt {attempt}/{LEETCODE_PAGE_ATTEMPTS}); retrying in {delay}s")
+            await asyncio.sleep(delay)
+    # An empty page here would silently truncate the catalog
+    raise RuntimeError(f"LeetCode problem list page at {skip} failed after {LEETCODE_PAGE_ATTEMPTS} attempts")
+
+
+async def problems_from_leetcode() -> Tuple[List[CatalogProblem], Optional[int]]:
+    """Every LeetCode problem, and the total LeetCode reported for the list."""
+    from agent.leetcode_service import get_leetcode_service
+
+    leetcode = get_leetcode_service()
+    problems = []
+    skip = 0
+    while True:
+        total, page = await fetch_leetcode_page(leetcode, skip)
+        problems.extend(
+            CatalogProblem(
+                slug=p["titleSlug"],
+                title=p["title"],
+                difficulty=p["difficulty"],
+                tags=[tag["slug"] for tag in p.get("topicTags", [])],
+                frontend_id=p.get("questionFrontendId"),
+                paid=p.get("isPaidOnly", False),
+            )
+            for p in page
+        )
+        skip += LEETCODE_PAGE_SIZE
+        logger.info(f"Fetched {len(problems)} of {total} problems")
+        # Only a short page is the end of the list
+        if len(page) < LEETCODE_PAGE_SIZE:
+            break
+    return problems, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the problem recommendation catalog")
+    parser.add_argument("--source", choices=["pdf", "leetcode"], default="pdf")
+    parser.add_argument("--output", type=Path, default=CATALOG_PATH)
+    parser.add_argument("--test", metavar="SLUG", help="Print recommendations for a problem after building")
+    args = parser.parse_args()
+
+    total: Optional[int] = None
+    if args.source == "pdf":
+        problems = problems_from_pdf()
+    else:
+        problems, total = asyncio.run(problems_from_leetcode())
+        if total is None or len(problems) < total:
+            logger.warning(f"Fetched {len(problems)} of {total} problems; the catalog will not count as complete")
+    if not problems:
+        logger.error(f"No problems found from source '{args.source}'")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    recommender = ProblemRecommender(problems)
+    recommender.save(args.output, source=args.source, total=total)
+    logger.info(
+        f"Wrote {len(problems)} problems to {args.output} "
+        f"(index built in {(time.perf_counter() - started) * 1000:.0f}ms)"
+    )
+
+    if args.test:
+        started = time.perf_counter()
+        picks = ProblemRecommender.load(args.output).recommend_next(args.test, limit=5)
+        logger.info(f"Recommendations after {args.test} (load + query {(time.perf_counter() - started) * 1000:.0f}ms):")
+        for problem, score in picks:
+            logger.info(f"  {score:.3f}  {problem.title} ({problem.difficulty}) - {', '.join(problem.tags)}")
+
+
+if __name__ == "__main__":
+    main()
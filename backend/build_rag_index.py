@@ -5,7 +5,8 @@ Script to build or rebuild the RAG index for LeetCode company questions.
 This script:
 1. Loads the leetcode.pdf from the data/ directory
 2. Creates embeddings using OpenAI
-3. Stores the index in agent/rag_storage/
+3. Stores the index as a new version under agent/rag_storage/versions/ and
+   publishes it; running agents swap to it without restarting
 
 Run this script:
 - After first setup
@@ -91,7 +92,9 @@ def main():
             import asyncio
             
             async def test_query():
-                result = await rag.query_company_questions("What are the top Google interview questions?")
+                result = await rag.query_company_questions(
+                    "What are the top Google interview questions?", company="Google"
+                )
                 logger.info("\nTest Query: 'What are the top Google interview questions?'")
                 logger.info("\nResult:")
                 logger.info("-" * 80)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Build the semantic search index over problem statements.
+
+Fetches every free problem in the problem catalog (agent/problem_catalog.json)
+from LeetCode, formats it the way the editor shows it, embeds it and writes
+agent/semantic_index/ (or SEMANTIC_INDEX_DIR). Running agents and API workers
+load the index on their first semantic search.
+
+Run:
+    python build_semantic_index.py [--embedder openai|hashing] [--limit N]
+    python build_semantic_index.py --fixtures loadtest/fixtures.json --embedder hashing
+    python build_semantic_index.py --test "fixed size sliding window over a string"
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+load_dotenv()
+
+from agent.leetcode_service import get_leetcode_service
+from agent.recommender import load_catalog
+from agent.semantic_search import INDEX_DIR, SemanticIndex, get_embedder, write_index
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def problems_from_leetcode(limit: Optional[int]) -> List[Dict]:
+    leetcode = get_leetcode_service()
+    slugs = [p.slug for p in load_catalog().problems if not p.paid][:limit]
+    problems = []
+    for i, slug in enumerate(slugs, 1):
+        details = await leetcode.get_problem_details(slug)
+        if details and not details.get("isPaidOnly"):
+            problems.append(leetcode.format_problem_for_display(details))
+        else:
+            logger.warning(f"Skipping {slug}: details unavailable")
+        if i % 50 == 0:
+            logger.info(f"Fetched {i}/{len(slugs)} problems")
+    return problems
+
+
+def problems_from_fixtures(path: Path) -> List[Dict]:
+    """Recorded GraphQL `question` objects, e.g. the load-test fixtures."""
+    leetcode = get_leetcode_service()
+    with open(path) as f:
+        questions = json.load(f)["questions"]
+    return [leetcode.format_problem_for_display(q) for q in questions if not q.get("isPaidOnly")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embedder", default="openai", help="openai or hashing")
+    parser.add_argument("--fixtures", type=Path, help="build from recorded question objects instead of LeetCode")
+    parser.add_argument("--limit", type=int, help="only the first N catalog problems")
+    parser.add_argument("--output", type=Path, default=INDEX_DIR)
+    parser.add_argument("--test", metavar="QUERY", help="search the index after building")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        problems = problems_from_fixtures(args.fixtures)
+    else:
+        problems = asyncio.run(problems_from_leetcode(args.limit))
+    if not problems:
+        logger.error("No problems to index")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    count = write_index(problems, get_embedder(args.embedder), args.output)
+    logger.info(f"Indexed {count} problems with '{args.embedder}' in {time.perf_counter() - started:.1f}s -> {args.output}")
+
+    if args.test:
+        index = SemanticIndex(args.output)
+        started = time.perf_counter()
+        results = index.search(args.test, k=5)
+        logger.info(f"'{args.test}' ({(time.perf_counter() - started) * 1000:.1f}ms):")
+        for result in results:
+            logger.info(f"  {result['score']:.3f}  {result['title']} ({result['difficulty']}) - {', '.join(result['topics'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Check that API startup stays fast and free of the voice-agent stack.
+
+Imports api.server in a fresh interpreter under `python -X importtime`, then
+fails (exit code 1) if:
+1. Any voice-agent module is imported (livekit.agents, its plugins, livekit.rtc,
+   openai, llama_index, agent.coach, ...), showing the chain that pulled it in
+2. Total import time exceeds the budget
+
+Prints the slowest top-level imports either way. Run it in CI or before
+shipping an API image:
+    python check_import_budget.py [--budget-ms 1500] [--top 15]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+BACKEND_DIR = Path(__file__).parent
+TARGET_MODULE = "api.server"
+# The API must never need these; they belong to the agent worker
+FORBIDDEN_PREFIXES = (
+    "livekit.agents",
+    "livekit.plugins",
+    "livekit.rtc",
+    "openai",
+    "llama_index",
+    "agent.coach",
+    "agent.rag",
+)
+DEFAULT_BUDGET_MS = float(os.getenv("API_IMPORT_BUDGET_MS", "1500"))
+
+# "import time:       412 |       1893 |   agent.leetcode_service"
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_imports(module: str = TARGET_MODULE) -> List[Tuple[int, int, str]]:
+    """(depth, cumulative microseconds, module name) per import, in -X importtime order (children first)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        tail = [line for line in result.stderr.splitlines() if not line.startswith("import time:")][-5:]
+        raise RuntimeError(f"import {module} failed:\n" + "\n".join(tail))
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            rows.append((depth, int(match.group(2)), match.group(4)))
+    return rows
+
+
+def import_chain(rows: List[Tuple[int, int, str]], index: int) -> List[str]:
+    """Who imported rows[index]: parents are the next rows with a smaller depth."""
+    depth, _, name = rows[index]
+    chain = [name]
+    for parent_depth, _, parent in rows[index + 1:]:
+        if parent_depth < depth:
+            chain.append(parent)
+            depth = parent_depth
+    return chain
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15, help="slowest top-level imports to list")
+    parser.add_argument("--module", default=TARGET_MODULE, help="module whose import is measured")
+    args = parser.parse_args()
+
+    try:
+        rows = measure_imports(args.module)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+
+    top_level = [(cumulative, name) for depth, cumulative, name in rows if depth == 0]
+    total_ms = sum(cumulative for cumulative, _ in top_level) / 1000
+
+    print(f"import {args.module}: {total_ms:.0f}ms across {len(rows)} modules (budget {args.budget_ms:.0f}ms)")
+    for cumulative, name in sorted(top_level, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    violations = [
+        i for i, (_, _, name) in enumerate(rows)
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in FORBIDDEN_PREFIXES)
+    ]
+    failed = False
+    if violations:
+        failed = True
+        print(f"\nFAIL: API startup imports the voice-agent stack ({len(violations)} modules), e.g.:")
+        reported = set()
+        for i in violations:
+            chain = import_chain(rows, i)
+            # One line per distinct entry point into the forbidden modules
+            if chain[-1] in reported:
+                continue
+            reported.add(chain[-1])
+            print("  " + " <- ".join(chain))
+    if total_ms > args.budget_ms:
+        failed = True
+        print(f"\nFAIL: {total_ms:.0f}ms is over the {args.budget_ms:.0f}ms import budget")
+
+    if failed:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Load Testing Package
+"""
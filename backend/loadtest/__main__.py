@@ -0,0 +1,393 @@
+"""
+Load test for the API server.
+
+Drives /token, /leetcode/search, /leetcode/problem/{slug} and /run-code at a
+fixed open-loop request rate with a configurable route mix and mix of
+submission types (including pathologically slow code), then writes per-route
+throughput, latency percentiles and error rates as JSON. Latency covers every
+request that got an HTTP response. A /run-code reply counts as an error when
+its outcome differs from the one its submission kind should produce (a 200 can
+carry a timeout or crash), and "submissions" reports each kind's outcomes and
+latency.
+
+With --start-server (the default) it launches a local API server whose
+LeetCode upstream is the recorded-response stand-in in leetcode_stub.py, so
+runs are reproducible and never touch leetcode.com.
+
+Usage:
+    python -m loadtest --rate 50 --duration 30 \\
+        --mix token=1,search=3,problem=5,run_code=2 \\
+        --submissions ok=8,error=1,slow=1 --output results.json
+    python -m loadtest --workers 4                       # production mode: gunicorn, 4 workers
+    python -m loadtest --url http://localhost:8000 --no-start-server
+    python -m loadtest --baseline results-main.json   # adds deltas against an earlier run
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from .leetcode_stub import load_fixtures, start_stub
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+SUBMISSIONS = {
+    # Correct solution for the fixture problem
+    "ok": """
+class Solution:
+    def twoSum(self, nums: List[int], target: int) -> List[int]:
+        seen = {}
+        for i, n in enumerate(nums):
+            if target - n in seen:
+                return [seen[target - n], i]
+            seen[n] = i
+""",
+    # Raises on every test
+    "error": """
+class Solution:
+    def twoSum(self, nums: List[int], target: int) -> List[int]:
+        return nums[len(nums)]
+""",
+    # Doesn't compile
+    "syntax": """
+class Solution:
+    def twoSum(self, nums: List[int], target: int) -> List[int]
+        return []
+""",
+    # Burns CPU until the runner's time limit kills it
+    "slow": """
+class Solution:
+    def twoSum(self, nums: List[int], target: int) -> List[int]:
+        while True:
+            pass
+""",
+}
+# What /run-code should report for each submission kind (see run_outcome)
+EXPECTED_OUTCOMES = {"ok": "passed", "error": "test_errors", "syntax": "failed", "slow": "timeout"}
+TWO_SUM_TESTS = "[2,7,11,15]\n9\n[3,2,4]\n6\n[3,3]\n6"
+
+SEARCHES = [
+    {"tags": ["array"], "limit": 10},
+    {"tags": ["hash-table"], "difficulty": "MEDIUM", "limit": 10},
+    {"tags": ["string"], "difficulty": "EASY", "limit": 5},
+    {"tags": ["design"], "limit": 10},
+    {"difficulty": "HARD", "limit": 20},
+]
+
+
+def parse_weights(spec: str, allowed) -> Dict[str, float]:
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in allowed:
+            raise SystemExit(f"Unknown name {name!r}; expected one of {', '.join(allowed)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def run_outcome(result: Dict) -> str:
+    """Classify a /run-code body: passed, test_errors, timeout or failed (didn't run)."""
+    if not result.get("success"):
+        return "timeout" if result.get("timed_out") else "failed"
+    if any(test.get("error") for test in result.get("results") or ()):
+        return "test_errors"
+    return "passed"
+
+
+def _percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+
+def _latency(samples: List[float]) -> Dict:
+    return {
+        "p50": _percentile(samples, 50),
+        "p90": _percentile(samples, 90),
+        "p99": _percentile(samples, 99),
+        "max": round(max(samples), 2) if samples else None,
+        "mean": round(statistics.fmean(samples), 2) if samples else None,
+    }
+
+
+class LoadTest:
+    def __init__(self, base_url: str, mix: Dict[str, float], submissions: Dict[str, float], seed: int):
+        self.base_url = base_url
+        self.mix = mix
+        self.submissions = submissions
+        self.random = random.Random(seed)
+        self.slugs = list(load_fixtures())
+        self.requests: Dict[str, int] = {route: 0 for route in mix}
+        # Latency of every request that got an HTTP response, whatever its status or outcome
+        self.samples: Dict[str, List[float]] = {route: [] for route in mix}
+        self.errors: Dict[str, Dict[str, int]] = {route: {} for route in mix}
+        # /run-code outcomes and latency per submission kind; an HTTP 200 can still be a failed run
+        self.outcomes: Dict[str, Dict[str, int]] = {kind: {} for kind in submissions}
+        self.kind_samples: Dict[str, List[float]] = {kind: [] for kind in submissions}
+
+    def _pick(self, weights: Dict[str, float]) -> str:
+        return self.random.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _request(self, route: str):
+        """(method, path, body, submission kind or None)."""
+        if route == "token":
+            return "POST", "/token", {"participant_name": f"load-{self.random.randrange(10**6)}"}, None
+        if route == "search":
+            return "POST", "/leetcode/search", self.random.choice(SEARCHES), None
+        if route == "problem":
+            return "GET", f"/leetcode/problem/{self.random.choice(self.slugs)}", None, None
+        kind = self._pick(self.submissions)
+        body = {"code": SUBMISSIONS[kind], "problem_id": "two-sum", "test_cases": TWO_SUM_TESTS}
+        return "POST", "/run-code", body, kind
+
+    async def _one(self, client: httpx.AsyncClient, route: str) -> None:
+        method, path, body, kind = self._request(route)
+        self.requests[route] += 1
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.samples[route].append(latency_ms)
+            failure = None if response.status_code < 400 else f"http_{response.status_code}"
+            if kind and not failure:
+                self.kind_samples[kind].append(latency_ms)
+                try:
+                    outcome = run_outcome(response.json())
+                except ValueError:
+                    outcome = "failed"
+                self.outcomes[kind][outcome] = self.outcomes[kind].get(outcome, 0) + 1
+                # A slow submission timing out is the server doing its job
+                if outcome != EXPECTED_OUTCOMES[kind]:
+                    failure = f"unexpected_{outcome}"
+        except httpx.TimeoutException:
+            failure = "timeout"
+        except httpx.HTTPError as e:
+            failure = type(e).__name__
+        if failure:
+            self.errors[route][failure] = self.errors[route].get(failure, 0) + 1
+
+    async def run(self, rate: float, duration: float, max_in_flight: int, timeout: float) -> Dict:
+        """Open-loop: requests are issued on schedule whether or not earlier ones have finished."""
+        limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+        slots = asyncio.Semaphore(max_in_flight)
+        total = int(rate * duration)
+        dropped = 0
+
+        async def _limited(route: str):
+            try:
+                await self._one(client, route)
+            finally:
+                slots.release()
+
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=timeout, limits=limits) as client:
+            tasks = []
+            started = time.perf_counter()
+            for i in range(total):
+                delay = started + i / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                route = self._pick(self.mix)
+                if slots.locked():
+                    # Client-side saturation: count it instead of silently slowing the offered rate
+                    dropped += 1
+                    self.requests[route] += 1
+                    self.errors[route]["client_saturated"] = self.errors[route].get("client_saturated", 0) + 1
+                    continue
+                await slots.acquire()
+                tasks.append(asyncio.create_task(_limited(route)))
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+        routes = {}
+        for route in self.mix:
+            attempts = self.requests[route]
+            failed = sum(self.errors[route].values())
+            ok = attempts - failed
+            routes[route] = {
+                "requests": attempts,
+                "ok": ok,
+                "throughput_rps": round(ok / elapsed, 2),
+                "error_rate": round(failed / attempts, 4) if attempts else 0.0,
+                "errors": self.errors[route],
+                "latency_ms": _latency(self.samples[route]),
+            }
+        submissions = {
+            kind: {
+                "expected": EXPECTED_OUTCOMES[kind],
+                "outcomes": outcomes,
+                "unexpected": sum(n for outcome, n in outcomes.items() if outcome != EXPECTED_OUTCOMES[kind]),
+                "latency_ms": _latency(self.kind_samples[kind]),
+            }
+            for kind, outcomes in self.outcomes.items()
+            if "run_code" in self.mix
+        }
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "offered_rate": rate,
+            "client_saturated": dropped,
+            "routes": routes,
+            "submissions": submissions,
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(stub_delay_ms: float, upstream_interval: float, workers: int = 0) -> tuple:
+    """Start the stand-in and a local API server pointed at it; returns (base_url, process, stub).
+
+    workers=0 runs a single plain uvicorn process; otherwise the production
+    server (API_MODE=production) with that many workers.
+    """
+    stub = start_stub(delay_ms=stub_delay_ms)
+    port = _free_port()
+    env = {
+        **os.environ,
+        "LEETCODE_GRAPHQL_URL": f"http://127.0.0.1:{stub.server_address[1]}/graphql",
+        "LEETCODE_MIN_REQUEST_INTERVAL": str(upstream_interval),
+        # /token only signs a JWT locally, so placeholder credentials are enough
+        "LIVEKIT_URL": os.getenv("LIVEKIT_URL", "ws://localhost:7880"),
+        "LIVEKIT_API_KEY": os.getenv("LIVEKIT_API_KEY", "loadtest"),
+        "LIVEKIT_API_SECRET": os.getenv("LIVEKIT_API_SECRET", "loadtest-secret-loadtest-secret-0000"),
+    }
+    env.pop("LEETCODE_SHARED_CACHE", None)
+    if workers:
+        env.update(API_MODE="production", API_WORKERS=str(workers), PORT=str(port))
+        # Workers must share one request budget; a fresh file keeps earlier runs' responses out
+        env["LEETCODE_SHARED_CACHE"] = os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "leetcode_cache.sqlite3")
+        command = [sys.executable, "-m", "api"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "api.server:app", "--host", "127.0.0.1",
+                   "--port", str(port), "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("API server exited during start-up")
+        try:
+            if httpx.get(base_url + "/", timeout=1.0).status_code == 200:
+                return base_url, process, stub
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("API server did not become ready within 30s")
+
+
+def compare(current: Dict, baseline: Dict) -> Dict:
+    """Per-route relative change against an earlier result file (positive = higher than baseline)."""
+    deltas = {}
+    for route, now in current["routes"].items():
+        before = baseline.get("routes", {}).get(route)
+        if not before:
+            continue
+        entry = {}
+        for key in ("p50", "p90", "p99"):
+            if now["latency_ms"][key] and before["latency_ms"].get(key):
+                entry[f"{key}_change"] = round(now["latency_ms"][key] / before["latency_ms"][key] - 1, 3)
+        if before.get("throughput_rps"):
+            entry["throughput_change"] = round(now["throughput_rps"] / before["throughput_rps"] - 1, 3)
+        entry["error_rate_delta"] = round(now["error_rate"] - before.get("error_rate", 0.0), 4)
+        deltas[route] = entry
+    return {"baseline_commit": baseline.get("commit"), "routes": deltas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="target an already-running server instead of starting one")
+    parser.add_argument("--no-start-server", dest="start_server", action="store_false")
+    parser.add_argument("--rate", type=float, default=20.0, help="requests per second offered")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--mix", default="token=1,search=3,problem=5,run_code=2")
+    parser.add_argument("--submissions", default="ok=8,error=1,syntax=1,slow=0",
+                        help=f"run_code submission mix over: {', '.join(SUBMISSIONS)}")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="start the server in production mode with N workers (0 = one plain uvicorn process)")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=30.0, help="client request timeout (s)")
+    parser.add_argument("--stub-delay-ms", type=float, default=80.0, help="simulated LeetCode latency")
+    parser.add_argument("--upstream-interval", type=float, default=0.0,
+                        help="LEETCODE_MIN_REQUEST_INTERVAL for the started server")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", default=None, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    mix = parse_weights(args.mix, ("token", "search", "problem", "run_code"))
+    submissions = parse_weights(args.submissions, tuple(SUBMISSIONS))
+    submissions = {kind: weight for kind, weight in submissions.items() if weight > 0}
+
+    process = stub = None
+    if args.url:
+        base_url = args.url
+    elif args.start_server:
+        base_url, process, stub = start_server(args.stub_delay_ms, args.upstream_interval, args.workers)
+    else:
+        base_url = "http://localhost:8000"
+
+    try:
+        test = LoadTest(base_url, mix, submissions, args.seed)
+        results = asyncio.run(test.run(args.rate, args.duration, args.max_in_flight, args.timeout))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if stub is not None:
+            stub.shutdown()
+
+    report = {
+        "commit": _git_commit(),
+        "target": base_url,
+        "config": {
+            "rate": args.rate,
+            "duration": args.duration,
+            "mix": mix,
+            "submissions": submissions,
+            "stub_delay_ms": args.stub_delay_ms if process else None,
+            "workers": args.workers if process else None,
+            "seed": args.seed,
+        },
+        **results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
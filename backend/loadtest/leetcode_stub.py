@@ -0,0 +1,111 @@
+"""
+Recorded-response stand-in for LeetCode's GraphQL API.
+
+Serves the two queries LeetCodeService makes (problem search and problem
+details) from recorded responses in fixtures.json, so load tests never touch
+leetcode.com and give the same answers on every run. An optional delay
+imitates upstream latency.
+
+Usage: python -m loadtest.leetcode_stub [--port 8765] [--delay-ms 80]
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+FIXTURES_PATH = Path(__file__).parent / "fixtures.json"
+
+
+def load_fixtures(path: Path = FIXTURES_PATH) -> Dict[str, Dict]:
+    """Recorded `question` objects keyed by title slug."""
+    with open(path) as f:
+        return {q["titleSlug"]: q for q in json.load(f)["questions"]}
+
+
+def answer(body: Dict, questions: Dict[str, Dict]) -> Dict:
+    """Build the GraphQL response a recorded LeetCode would give for this request body."""
+    query = body.get("query", "")
+    variables = body.get("variables") or {}
+
+    if "questionData" in query:
+        question = questions.get(variables.get("titleSlug"))
+        return {"data": {"question": question}}
+
+    if "problemsetQuestionList" in query:
+        filters = variables.get("filters") or {}
+        tags = set(filters.get("tags") or [])
+        difficulty = (filters.get("difficulty") or "").lower()
+        matches = [
+            {key: q[key] for key in (
+                "questionId", "questionFrontendId", "title", "titleSlug", "difficulty", "topicTags", "isPaidOnly"
+            )}
+            for q in questions.values()
+            if (not tags or tags <= {t["slug"] for t in q["topicTags"]})
+            and (not difficulty or q["difficulty"].lower() == difficulty)
+        ]
+        skip = variables.get("skip") or 0
+        limit = variables.get("limit") or 50
+        return {"data": {"problemsetQuestionList": {
+            "total": len(matches),
+            "questions": matches[skip:skip + limit],
+        }}}
+
+    return {"errors": [{"message": "Query not recorded by the stand-in"}]}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    questions: Dict[str, Dict] = {}
+    delay: float = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", "0"))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_error(400, "Invalid JSON")
+            return
+        if self.delay:
+            time.sleep(self.delay)
+        payload = json.dumps(answer(body, self.questions)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port: int = 0, delay_ms: float = 0.0, fixtures: Optional[Path] = None) -> ThreadingHTTPServer:
+    """Serve the stand-in on a background thread; the bound port is `server.server_address[1]`."""
+    handler = type("StubHandler", (_Handler,), {
+        "questions": load_fixtures(fixtures or FIXTURES_PATH),
+        "delay": delay_ms / 1000,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recorded LeetCode GraphQL stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = start_stub(args.port, args.delay_ms)
+    print(f"LeetCode stand-in on http://127.0.0.1:{server.server_address[1]}/graphql")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
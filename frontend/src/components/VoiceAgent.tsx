@@ -2,6 +2,7 @@ import { useState, useEffect, useRef } from "react"
 import { Button } from "@/components/ui/button"
 import { Room, RoomEvent, Track } from "livekit-client"
 import { getToken } from "@/lib/api"
+import { FrameAssembler } from "@/lib/framing"
 import type { Problem } from "@/types"
 
 interface VoiceAgentProps {
@@ -19,6 +20,7 @@ export function VoiceAgent({ problem, currentCode, cursorPosition, onTranscriptU
   const [isMuted, setIsMuted] = useState(false)
   const [room, setRoom] = useState<Room | null>(null)
   const audioRef = useRef<HTMLAudioElement>(null)
+  const problemCacheRef = useRef(new Map<string, Problem>())
 
   const startCall = async () => {
     setIsConnecting(true)
@@ -42,16 +44,27 @@ export function VoiceAgent({ problem, currentCode, cursorPosition, onTranscriptU
       })
 
       // Listen for data messages from the agent
-      newRoom.on(RoomEvent.DataReceived, (payload, _participant, _kind, _topic) => {
+      const assembler = new FrameAssembler()
+      newRoom.on(RoomEvent.DataReceived, async (payload, _participant, _kind, _topic) => {
         try {
-          const decoder = new TextDecoder()
-          const message = JSON.parse(decoder.decode(payload))
+          const message = await assembler.push(payload)
+          if (!message) return
           
-          console.log("=== DATA RECEIVED FROM AGENT ===", message)
+          console.log("=== DATA RECEIVED FROM AGENT ===", message.type)
           
           if (message.type === "problem_selected" && message.problem) {
             console.log("=== LOADING PROBLEM ON SCREEN ===", message.problem.title)
+            problemCacheRef.current.set(message.problem.id, message.problem)
             onProblemSelected(message.problem)
+          } else if (message.type === "problem_selected" && message.problem_ref) {
+            const cached = problemCacheRef.current.get(message.problem_ref)
+            if (cached) {
+              console.log("=== LOADING CACHED PROBLEM ON SCREEN ===", cached.title)
+              onProblemSelected(cached)
+            } else {
+              const request = JSON.stringify({ type: "problem_request", slug: message.problem_ref })
+              newRoom.localParticipant.publishData(new TextEncoder().encode(request), { reliable: true })
+            }
           } else if (message.type === "solution_generated" && message.solution) {
             console.log("=== SOLUTION GENERATED ===")
             onSolutionGenerated(message.solution)
@@ -131,6 +144,7 @@ export function VoiceAgent({ problem, currentCode, cursorPosition, onTranscriptU
       type: "code_update",
       code: currentCode,
       problem: problem?.description || "",
+      test_cases: problem?.testCases || "",
       cursor_line: cursorPosition.line,
       cursor_column: cursorPosition.column,
     })
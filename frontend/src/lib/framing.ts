@@ -0,0 +1,51 @@
+// Reassembles framed data-channel messages sent by the agent (backend/agent/framing.py).
+// Plain JSON messages pass through untouched; "frame" messages are buffered until
+// every chunk has arrived, then base64-decoded, inflated and parsed.
+
+interface Frame {
+  type: "frame"
+  id: string
+  index: number
+  count: number
+  encoding: "deflate"
+  data: string
+}
+
+const decoder = new TextDecoder()
+
+async function inflate(data: string): Promise<string> {
+  const bytes = Uint8Array.from(atob(data), (c) => c.charCodeAt(0))
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"))
+  return await new Response(stream).text()
+}
+
+export class FrameAssembler {
+  private pending = new Map<string, string[]>()
+
+  // Returns the decoded message, or null while a framed message is still incomplete.
+  async push(payload: Uint8Array): Promise<any | null> {
+    const message = JSON.parse(decoder.decode(payload))
+    if (message.type !== "frame") {
+      return message
+    }
+
+    const frame = message as Frame
+    let parts = this.pending.get(frame.id)
+    if (!parts) {
+      parts = new Array(frame.count)
+      this.pending.set(frame.id, parts)
+    }
+    parts[frame.index] = frame.data
+
+    for (let i = 0; i < frame.count; i++) {
+      if (parts[i] === undefined) return null
+    }
+
+    this.pending.delete(frame.id)
+    return JSON.parse(await inflate(parts.join("")))
+  }
+
+  reset() {
+    this.pending.clear()
+  }
+}